@@ -0,0 +1,148 @@
+"""BM25 Index - Incrementally maintained inverted index for lexical search."""
+
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+# Words, plus dotted/hyphenated compounds such as "ERR-1042" or "v2.3.1"
+TOKEN_PATTERN = re.compile(r"\w+(?:[-.]\w+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase ``text`` and split it into index terms.
+
+    Compound identifiers are kept whole and also split into their parts, so
+    "ERR-1042" matches queries for "err-1042" as well as "1042".
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        terms.append(token)
+        if "-" in token or "." in token:
+            terms.extend(re.split(r"[-.]", token))
+    return terms
+
+
+class BM25Index:
+    """
+    Inverted index with Okapi BM25 scoring.
+
+    Postings map each term to per-document term frequencies, and document
+    lengths are tracked so that adds and removes are proportional to the
+    document's own size. Not thread-safe; callers serialise access.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        Initialize BM25 Index.
+
+        Args:
+            k1: Term-frequency saturation
+            b: Document length normalisation
+        """
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[Hashable, int]] = {}
+        self._doc_terms: Dict[Hashable, Counter] = {}
+        self._doc_lengths: Dict[Hashable, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def add(self, doc_id: Hashable, text: str):
+        """Index a document, replacing any previous version."""
+        self.remove(doc_id)
+        terms = Counter(tokenize(text))
+        self._doc_terms[doc_id] = terms
+        self._doc_lengths[doc_id] = sum(terms.values())
+        self._total_length += self._doc_lengths[doc_id]
+        for term, count in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = count
+
+    def remove(self, doc_id: Hashable):
+        """Drop a document from the index."""
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+
+    def search(
+        self,
+        query: str,
+        top_k: Optional[int] = 10,
+        require_all: bool = False,
+        allowed: Optional[Set[Hashable]] = None,
+    ) -> List[Tuple[Hashable, float]]:
+        """
+        Rank documents against a query.
+
+        Args:
+            query: Query text
+            top_k: Maximum results (None returns every match)
+            require_all: Only return documents containing every query term
+            allowed: Restrict results to these document IDs
+
+        Returns:
+            List of (doc_id, score), best first
+        """
+        terms = set(tokenize(query))
+        if not terms or not self._doc_terms:
+            return []
+        if require_all and any(term not in self._postings for term in terms):
+            return []
+
+        n_docs = len(self._doc_terms)
+        avg_length = max(self._total_length / n_docs, 1.0)
+        scores: Dict[Hashable, float] = {}
+        matched: Dict[Hashable, int] = {}
+
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                if allowed is not None and doc_id not in allowed:
+                    continue
+                norm = tf + self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+                matched[doc_id] = matched.get(doc_id, 0) + 1
+
+        if require_all:
+            scores = {doc_id: s for doc_id, s in scores.items() if matched[doc_id] == len(terms)}
+
+        ranked: Iterable[Tuple[Hashable, float]] = scores.items()
+        if top_k is None:
+            return sorted(ranked, key=lambda item: item[1], reverse=True)
+        return heapq.nlargest(top_k, ranked, key=lambda item: item[1])
+
+
+def reciprocal_rank_fusion(rankings: List[List[Hashable]], k: int = 60) -> List[Tuple[Hashable, float]]:
+    """
+    Fuse several rankings with reciprocal rank fusion.
+
+    Each list contributes ``1 / (k + rank)`` per document. Scores are
+    divided by the best achievable total, so a document ranked first by
+    every list scores 1.0.
+
+    Args:
+        rankings: Document IDs from each ranker, best first
+        k: Rank damping constant
+
+    Returns:
+        List of (doc_id, fused score), best first
+    """
+    fused: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    best = len(rankings) / (k + 1) if rankings else 1.0
+    return sorted(((doc_id, score / best) for doc_id, score in fused.items()), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,190 @@
+"""Text Chunker - Splits long knowledge content into overlapping, token-aware chunks."""
+
+import hashlib
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from bm25_index import TOKEN_PATTERN, tokenize
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"\S+")
+CHUNK_ID_PATTERN = re.compile(r"knowledge_(\d+)(?:#(\d+))?")
+
+
+class TextChunker:
+    """
+    Splits text into windows of at most ``chunk_tokens`` tokens.
+
+    Consecutive windows share ``overlap_tokens`` tokens so that a passage
+    cut at a boundary is still whole in one of the chunks. Tokens come from
+    the embedding model's tokenizer when one is given (so chunks fit the
+    model's input limit), otherwise whitespace-separated words are counted.
+    Chunk edges are widened to the nearest word boundary.
+    """
+
+    def __init__(self, chunk_tokens: int = 200, overlap_tokens: int = 40, tokenizer: Optional[Any] = None):
+        """
+        Initialize Text Chunker.
+
+        Args:
+            chunk_tokens: Maximum tokens per chunk
+            overlap_tokens: Tokens shared by consecutive chunks
+            tokenizer: Hugging Face fast tokenizer (None counts words)
+        """
+        if not 0 <= overlap_tokens < chunk_tokens:
+            raise ValueError("overlap_tokens must be smaller than chunk_tokens")
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.tokenizer = tokenizer
+
+    def _spans(self, text: str) -> List[Tuple[int, int]]:
+        """Character span of every token in ``text``."""
+        if self.tokenizer is not None:
+            try:
+                encoding = self.tokenizer(
+                    text, add_special_tokens=False, return_offsets_mapping=True, truncation=False, verbose=False
+                )
+                return [tuple(span) for span in encoding["offset_mapping"]]
+            except Exception as e:
+                logger.warning(f"Tokenizer offsets unavailable, counting words instead: {e}")
+                self.tokenizer = None
+        return [match.span() for match in WORD_PATTERN.finditer(text)]
+
+    def split(self, text: str) -> List[str]:
+        """
+        Split text into chunks.
+
+        Args:
+            text: Text to split
+
+        Returns:
+            List of chunks; text that already fits is returned whole
+        """
+        spans = self._spans(text)
+        if len(spans) <= self.chunk_tokens:
+            return [text]
+
+        chunks = []
+        step = self.chunk_tokens - self.overlap_tokens
+        for first in range(0, len(spans), step):
+            window = spans[first:first + self.chunk_tokens]
+            start, end = window[0][0], window[-1][1]
+            while start > 0 and not text[start - 1].isspace():
+                start -= 1
+            end = WORD_PATTERN.match(text, end).end() if end < len(text) and not text[end].isspace() else end
+            chunks.append(text[start:end].strip())
+            if first + self.chunk_tokens >= len(spans):
+                break
+        return chunks
+
+
+def select_chunk(chunks: List[str], query: str) -> str:
+    """
+    Pick the chunk sharing the most terms with ``query``.
+
+    Args:
+        chunks: Chunks of one entry
+        query: Search query
+
+    Returns:
+        Best matching chunk (the first one on ties)
+    """
+    if len(chunks) == 1:
+        return chunks[0]
+    terms = set(tokenize(query))
+    return max(chunks, key=lambda chunk: len(terms.intersection(tokenize(chunk))))
+
+
+def highlight_snippets(text: str, query: str, max_snippets: int = 2, width: int = 160) -> List[str]:
+    """
+    Passages of ``text`` around query terms, with the terms wrapped in ``<em>``.
+
+    Args:
+        text: Text to excerpt
+        query: Search query
+        max_snippets: Maximum snippets
+        width: Approximate characters per snippet
+
+    Returns:
+        Snippets in text order; the start of the text when no term occurs
+    """
+    terms = set(tokenize(query))
+    hits = [m.span() for m in TOKEN_PATTERN.finditer(text) if terms.intersection(tokenize(m.group()))]
+    if not hits:
+        if len(text) <= width:
+            return [text] if text else []
+        end = text.rfind(" ", 0, width)
+        return [text[:end if end > 0 else width].rstrip() + " …"]
+
+    snippets = []
+    covered = 0
+    for hit_start, hit_end in hits:
+        if hit_start < covered:
+            continue
+        start = max(0, hit_start - width // 3)
+        if start > 0:
+            space = text.find(" ", start, hit_start)
+            start = space + 1 if space >= 0 else start
+        end = min(len(text), start + width)
+        if end < len(text):
+            space = text.rfind(" ", hit_end, end)
+            end = space if space > 0 else end
+        marked, last = [], start
+        for span_start, span_end in hits:
+            if start <= span_start and span_end <= end:
+                marked.append(f"{text[last:span_start]}<em>{text[span_start:span_end]}</em>")
+                last = span_end
+        marked.append(text[last:end])
+        snippets.append(("… " if start > 0 else "") + "".join(marked).strip() + (" …" if end < len(text) else ""))
+        covered = end
+        if len(snippets) == max_snippets:
+            break
+    return snippets
+
+
+def chunk_vector_id(entry_id: int, chunk: int) -> str:
+    """Vector ID of one chunk; the first chunk keeps the unchunked ID."""
+    return f"knowledge_{entry_id}" if chunk == 0 else f"knowledge_{entry_id}#{chunk}"
+
+
+def parse_chunk_vector_id(vector_id: str) -> Optional[Tuple[int, int]]:
+    """(entry ID, chunk index) for a knowledge vector ID, or None for other IDs."""
+    match = CHUNK_ID_PATTERN.fullmatch(vector_id)
+    if match is None:
+        return None
+    return int(match.group(1)), int(match.group(2) or 0)
+
+
+def content_hash(entry: Dict[str, Any], chunker: Optional[TextChunker] = None) -> str:
+    """Fingerprint of everything that determines an entry's vectors, including the chunk layout."""
+    layout = f"{chunker.chunk_tokens}:{chunker.overlap_tokens}" if chunker else "whole"
+    tags = ",".join(entry.get("tags") or [])
+    payload = "\0".join([entry["title"], entry["content"], entry.get("category") or "", tags, layout])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def chunk_metadata(
+    entry: Dict[str, Any],
+    text: str,
+    chunk: int,
+    chunks: int,
+    entry_hash: Optional[str] = None,
+    tokens: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Vector metadata for one chunk: the parent entry's fields, the chunk text and its LLM token count."""
+    metadata = {
+        "id": entry["id"],
+        "title": entry["title"],
+        "content": text,
+        "category": entry["category"],
+        "tags": entry.get("tags") or [],
+        "chunk": chunk,
+        "chunks": chunks,
+    }
+    if entry_hash is not None:
+        metadata["content_hash"] = entry_hash
+    if tokens is not None:
+        metadata["tokens"] = tokens
+    return metadata
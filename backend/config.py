@@ -14,14 +14,79 @@ class Settings(BaseSettings):  # type: ignore[misc]
     pinecone_environment: str = os.getenv("PINECONE_ENVIRONMENT", "us-east-1-aws")
     pinecone_index_name: str = os.getenv("PINECONE_INDEX_NAME", "jarvis-index")
 
+    # Vector Store ("pinecone", "local", or "auto" = Pinecone if an API key is set, else local)
+    vector_db_backend: str = os.getenv("VECTOR_DB_BACKEND", "auto")
+    vector_store_path: str = os.getenv("VECTOR_STORE_PATH", "./data/vector_store")
+    vector_store_save_interval: float = float(os.getenv("VECTOR_STORE_SAVE_INTERVAL", "60"))  # seconds; 0 = only on shutdown
+    vector_index_type: str = os.getenv("VECTOR_INDEX_TYPE", "flat")  # "flat" (exact) or "hnsw"
+    hnsw_m: int = int(os.getenv("HNSW_M", "16"))
+    hnsw_ef_construction: int = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+    hnsw_ef_search: int = int(os.getenv("HNSW_EF_SEARCH", "64"))
+    vector_quantization: str = os.getenv("VECTOR_QUANTIZATION", "none")  # "none", "int8" or "pq"
+    pq_subspaces: int = int(os.getenv("PQ_SUBSPACES", "96"))
+    quantization_rerank_factor: int = int(os.getenv("QUANTIZATION_RERANK_FACTOR", "4"))
+    vector_filter_fields: str = os.getenv("VECTOR_FILTER_FIELDS", "category,tags")  # metadata fields indexed for filters
+
+    # Retrieval ("vector" = dense only, "hybrid" = BM25 + vector fused by reciprocal rank)
+    retrieval_mode: str = os.getenv("RETRIEVAL_MODE", "hybrid")
+    hybrid_candidates: int = int(os.getenv("HYBRID_CANDIDATES", "20"))  # fetched from each ranker before fusion
+    hybrid_rrf_k: int = int(os.getenv("HYBRID_RRF_K", "60"))
+    search_max_results: int = int(os.getenv("SEARCH_MAX_RESULTS", "1000"))  # deepest result /search pages reach
+
+    # Cross-encoder reranking of chat context (empty model disables it)
+    rerank_model: str = os.getenv("RERANK_MODEL", "")  # e.g. cross-encoder/ms-marco-MiniLM-L-6-v2
+    rerank_candidates: int = int(os.getenv("RERANK_CANDIDATES", "20"))
+    rerank_top_k: int = int(os.getenv("RERANK_TOP_K", "3"))
+    rerank_budget_ms: float = float(os.getenv("RERANK_BUDGET_MS", "150"))  # 0 waits for the model
+    rerank_cache_size: int = int(os.getenv("RERANK_CACHE_SIZE", "10000"))
+
     # LLM Configuration
     llm_model_path: str = os.getenv("LLM_MODEL_PATH", os.path.join(os.path.dirname(__file__), "models/llama-2-7b-chat.Q4_K_M.gguf"))
     llm_context_window: int = int(os.getenv("LLM_CONTEXT_WINDOW", "2048"))
     llm_max_tokens: int = int(os.getenv("LLM_MAX_TOKENS", "512"))
+    context_min_source_tokens: int = int(os.getenv("CONTEXT_MIN_SOURCE_TOKENS", "32"))  # shortest truncated source kept
     llm_temperature: float = float(os.getenv("LLM_TEMPERATURE", "0.7"))
+    llm_speculative: str = os.getenv("LLM_SPECULATIVE", "none")  # "none", "prompt_lookup" or "draft_model"
+    llm_speculative_tokens: int = int(os.getenv("LLM_SPECULATIVE_TOKENS", "10"))  # drafted per round
+    llm_prompt_lookup_ngram: int = int(os.getenv("LLM_PROMPT_LOOKUP_NGRAM", "2"))
+    llm_draft_model_path: str = os.getenv("LLM_DRAFT_MODEL_PATH", "")  # small GGUF with the same vocabulary
+    llm_prompt_cache: str = os.getenv("LLM_PROMPT_CACHE", "ram")  # KV state cache: "none", "ram" or "disk"
+    llm_prompt_cache_mb: int = int(os.getenv("LLM_PROMPT_CACHE_MB", "1024"))
+    llm_prompt_cache_dir: str = os.getenv("LLM_PROMPT_CACHE_DIR", "./data/prompt_cache")
+    llm_use_mmap: bool = os.getenv("LLM_USE_MMAP", "true").lower() == "true"  # page GGUF weights in on demand
+    llm_max_queue_size: int = int(os.getenv("LLM_MAX_QUEUE_SIZE", "8"))  # waiting requests before 503
+    embedding_workers: int = int(os.getenv("EMBEDDING_WORKERS", "2"))
+
+    # Multi-turn chat sessions (llama.cpp KV state kept between turns)
+    session_history_tokens: int = int(os.getenv("SESSION_HISTORY_TOKENS", "768"))  # transcript size that triggers compaction
+    session_memory_mb: int = int(os.getenv("SESSION_MEMORY_MB", "1024"))
+    session_disk_dir: str = os.getenv("SESSION_DISK_DIR", "./data/sessions")  # "" drops states instead of spilling
+    session_disk_mb: int = int(os.getenv("SESSION_DISK_MB", "8192"))
+    session_ttl_seconds: float = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+    session_max: int = int(os.getenv("SESSION_MAX", "256"))
+
+    # Semantic response cache for /chat
+    response_cache_enabled: bool = os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() == "true"
+    response_cache_threshold: float = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.95"))
+    response_cache_ttl_seconds: float = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+    response_cache_max_entries: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
 
     # Embedding Model
     embedding_model: str = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    embedding_cache_size_mb: int = int(os.getenv("EMBEDDING_CACHE_SIZE_MB", "64"))
+    embedding_batch_window_ms: float = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "3"))  # 0 disables micro-batching
+    embedding_max_batch_size: int = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "32"))
+    embedding_backend: str = os.getenv("EMBEDDING_BACKEND", "torch")  # "torch", "onnx" or "onnx_int8"
+    embedding_onnx_path: str = os.getenv("EMBEDDING_ONNX_PATH", "")  # "" uses onnx/model.onnx from the model repo
+    embedding_onnx_dir: str = os.getenv("EMBEDDING_ONNX_DIR", "./data/onnx")  # quantized model and parity records
+    embedding_onnx_threads: int = int(os.getenv("EMBEDDING_ONNX_THREADS", "0"))  # 0 = all cores
+    embedding_parity_threshold: float = float(os.getenv("EMBEDDING_PARITY_THRESHOLD", "0.99"))  # min cosine vs torch; 0 skips
+    embedding_cache_path: str = os.getenv("EMBEDDING_CACHE_PATH", "./data/embedding_cache.sqlite")  # empty = memory only
+    embedding_cache_disk_entries: int = int(os.getenv("EMBEDDING_CACHE_DISK_ENTRIES", "200000"))  # 0 = unbounded
+
+    # Chunking (knowledge content is split into overlapping chunks, one vector each)
+    chunk_size_tokens: int = int(os.getenv("CHUNK_SIZE_TOKENS", "200"))  # 0 disables chunking
+    chunk_overlap_tokens: int = int(os.getenv("CHUNK_OVERLAP_TOKENS", "40"))
 
     # API Configuration
     api_host: str = os.getenv("API_HOST", "0.0.0.0")
@@ -30,6 +95,22 @@ class Settings(BaseSettings):  # type: ignore[misc]
 
     # Database
     knowledge_base_path: str = os.getenv("KNOWLEDGE_BASE_PATH", "./data/knowledge_base.json")
+    knowledge_base_backend: str = os.getenv("KNOWLEDGE_BASE_BACKEND", "auto")  # "json", "sqlite" or "auto" (by file suffix)
+    knowledge_base_import_path: str = os.getenv("KNOWLEDGE_BASE_IMPORT_PATH", "")  # JSON KB imported into a new SQLite KB; "" = <path>.json
+    knowledge_base_fsync_interval_ms: float = float(os.getenv("KNOWLEDGE_BASE_FSYNC_INTERVAL_MS", "50"))
+    knowledge_base_compact_threshold: int = int(os.getenv("KNOWLEDGE_BASE_COMPACT_THRESHOLD", "1000"))
+
+    # Bulk ingestion
+    bulk_batch_size: int = int(os.getenv("BULK_BATCH_SIZE", "512"))  # items embedded and persisted together
+    vector_upsert_batch_size: int = int(os.getenv("VECTOR_UPSERT_BATCH_SIZE", "100"))
+    vector_upsert_workers: int = int(os.getenv("VECTOR_UPSERT_WORKERS", "4"))
+
+    # Startup (models load in the background; GET /ready reports when they are done)
+    startup_warmup: bool = os.getenv("STARTUP_WARMUP", "true").lower() == "true"  # one warm-up inference per model
+
+    # Vector index reconciliation (re-embed changed entries, delete orphaned vectors)
+    index_sync_on_startup: bool = os.getenv("INDEX_SYNC_ON_STARTUP", "true").lower() == "true"
+    index_sync_interval_seconds: float = float(os.getenv("INDEX_SYNC_INTERVAL_SECONDS", "0"))  # 0 = startup only
 
     class Config:
         env_file = ".env"
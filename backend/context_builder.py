@@ -0,0 +1,199 @@
+"""Context Builder - Packs retrieved sources into the LLM context window."""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Shortest boundary overlap between two sources that is trimmed, in words
+MIN_OVERLAP_WORDS = 8
+# Longest boundary overlap searched for, in words (covers the chunk overlap)
+MAX_OVERLAP_WORDS = 256
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _boundary_overlap(head: List[str], tail: List[str]) -> int:
+    """Number of words at the end of ``head`` that repeat at the start of ``tail``."""
+    longest = min(len(head), len(tail), MAX_OVERLAP_WORDS)
+    for size in range(longest, MIN_OVERLAP_WORDS - 1, -1):
+        if head[-size:] == tail[:size]:
+            return size
+    return 0
+
+
+class ContextBuilder:
+    """
+    Builds RAG prompts that fit the model's context window.
+
+    Sources are taken in rank order until the window is full, keeping room
+    for the generated answer. Duplicate sources are dropped, text repeated
+    at the boundary of overlapping chunks is trimmed, and the last source
+    that does not fit is truncated rather than overflowing the window.
+
+    Token counts come from the vector metadata (``tokens``, written when the
+    chunk was indexed) or from an LRU cache, so sources are tokenized at
+    most once.
+    """
+
+    def __init__(
+        self,
+        count_tokens: Callable[[str], int],
+        context_window: int = 2048,
+        reserved_tokens: int = 512,
+        prompt_prefix: str = "",
+        min_source_tokens: int = 32,
+        cache_size: int = 10000,
+    ):
+        """
+        Initialize Context Builder.
+
+        Args:
+            count_tokens: Counts tokens with the LLM's tokenizer
+            context_window: Model context window in tokens
+            reserved_tokens: Tokens kept free for the generated answer
+            prompt_prefix: Fixed text every prompt starts with
+            min_source_tokens: Smallest truncated source worth including
+            cache_size: Token counts kept in the LRU cache
+        """
+        self.count_tokens = count_tokens
+        self.context_window = context_window
+        self.reserved_tokens = reserved_tokens
+        self.prompt_prefix = prompt_prefix
+        self.min_source_tokens = min_source_tokens
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Fixed parts of the prompt, counted once
+        self._prefix_tokens = count_tokens(prompt_prefix + "Relevant information:\n\n\nUser Query: ") + 1  # + BOS
+        self._item_tokens = count_tokens("10. \n")
+
+        self.prompts = 0
+        self.prompt_tokens = 0
+        self.duplicates_removed = 0
+        self.sources_truncated = 0
+        self.sources_dropped = 0
+
+    def count(self, text: str) -> int:
+        """Token count of ``text``, cached by content."""
+        key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            tokens = self._cache.get(key)
+            if tokens is not None:
+                self._cache.move_to_end(key)
+                return tokens
+        tokens = self.count_tokens(text)
+        with self._lock:
+            self._cache[key] = tokens
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return tokens
+
+    def _truncate(self, text: str, tokens: int, budget: int) -> Tuple[str, int]:
+        """Cut ``text`` at a word boundary so it fits in ``budget`` tokens."""
+        words = text.split()
+        keep = max(int(len(words) * budget / tokens), 1)
+        while keep > 0:
+            cut = " ".join(words[:keep]) + " …"
+            cut_tokens = self.count_tokens(cut)
+            if cut_tokens <= budget:
+                return cut, cut_tokens
+            keep = int(keep * budget / cut_tokens) if cut_tokens > budget * 1.05 else keep - max(keep // 20, 1)
+        return "", 0
+
+    def _dedupe(self, sources: List[Dict[str, Any]]) -> Tuple[List[Tuple[Dict[str, Any], str, Optional[int]]], int]:
+        """Drop repeated sources and trim text overlapping an earlier source; also returns the number dropped."""
+        kept: List[Tuple[Dict[str, Any], str, Optional[int]]] = []
+        seen: List[str] = []
+        kept_words: List[List[str]] = []
+        for source in sources:
+            metadata = source.get("metadata", {})
+            text = metadata.get("content") or ""
+            normalized = _normalize(text)
+            if not normalized or any(normalized in earlier for earlier in seen):
+                continue
+
+            tokens = metadata.get("tokens")
+            words = text.split()
+            for earlier in kept_words:
+                leading = _boundary_overlap(earlier, words)  # this chunk continues an earlier one
+                trailing = _boundary_overlap(words[leading:], earlier)  # this chunk leads into an earlier one
+                if leading or trailing:
+                    words = words[leading:len(words) - trailing]
+                    text, tokens = " ".join(words), None
+            if not words:
+                continue
+
+            seen.append(normalized)
+            kept_words.append(words)
+            kept.append((source, text, tokens))
+        return kept, len(sources) - len(kept)
+
+    def build(
+        self, query: str, sources: List[Dict[str, Any]], history: str = "", history_tokens: int = 0
+    ) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Build a prompt within the token budget.
+
+        Args:
+            query: User query
+            sources: Retrieved sources, best first
+            history: Earlier conversation turns, placed after the prompt prefix
+            history_tokens: Token count of ``history``
+
+        Returns:
+            (prompt, sources included in it)
+        """
+        fixed = self._prefix_tokens + history_tokens + self.count_tokens(query)
+        budget = self.context_window - self.reserved_tokens - fixed
+        candidates, duplicates = self._dedupe(sources)
+        lines: List[str] = []
+        used: List[Dict[str, Any]] = []
+        truncated = 0
+        for source, text, tokens in candidates:
+            tokens = self.count(text) if tokens is None else tokens
+            if tokens + self._item_tokens > budget:
+                room = budget - self._item_tokens
+                if room < self.min_source_tokens:
+                    break
+                text, tokens = self._truncate(text, tokens, room)
+                if not text:
+                    break
+                truncated = 1
+            lines.append(f"{len(lines) + 1}. {text}\n")
+            used.append(source)
+            budget -= tokens + self._item_tokens
+            if truncated:
+                break
+
+        if budget < 0:
+            logger.warning(f"Query leaves no room for context ({-budget} tokens over budget)")
+
+        context = "Relevant information:\n" + "".join(lines) if lines else ""
+        with self._lock:
+            self.prompts += 1
+            self.prompt_tokens += self.context_window - self.reserved_tokens - budget
+            self.duplicates_removed += duplicates
+            self.sources_truncated += truncated
+            self.sources_dropped += len(candidates) - len(used)
+        return f"{self.prompt_prefix}{history}{context}\n\nUser Query: {query}", used
+
+    def stats(self) -> Dict[str, Any]:
+        """Packing counters."""
+        with self._lock:
+            return {
+                "context_window": self.context_window,
+                "reserved_tokens": self.reserved_tokens,
+                "prompts": self.prompts,
+                "avg_prompt_tokens": round(self.prompt_tokens / self.prompts, 1) if self.prompts else 0.0,
+                "duplicates_removed": self.duplicates_removed,
+                "sources_truncated": self.sources_truncated,
+                "sources_dropped": self.sources_dropped,
+                "cached_counts": len(self._cache),
+            }
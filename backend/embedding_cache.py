@@ -0,0 +1,225 @@
+"""Embedding Cache - Memory LRU with an optional SQLite tier for embeddings."""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Keys per SQLite "IN (...)" query, below the host-parameter limit of older SQLite builds
+DISK_QUERY_CHUNK = 500
+
+
+class EmbeddingCache:
+    """
+    Caches embeddings keyed by model name plus a hash of the text.
+
+    The memory tier is an LRU bounded by total vector bytes. The optional
+    disk tier is a SQLite table that survives restarts, bounded by entry
+    count with least recently used rows pruned; disk hits are promoted back
+    into memory. Disk I/O runs under its own lock, so memory lookups
+    (``get_cached``, cheap enough for the event loop) never wait for it.
+    """
+
+    def __init__(
+        self, max_bytes: int = 64 * 1024 * 1024, disk_path: Optional[str] = None, max_disk_entries: int = 200000
+    ):
+        """
+        Initialize Embedding Cache.
+
+        Args:
+            max_bytes: Memory budget for cached vectors
+            disk_path: SQLite file for the persistent tier (None disables it)
+            max_disk_entries: Rows kept in the disk tier (0 = unbounded)
+        """
+        self.max_bytes = max_bytes
+        self.max_disk_entries = max_disk_entries
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._disk_entries = 0  # upper bound on rows; recounted before pruning
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+        if disk_path:
+            try:
+                Path(disk_path).parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(disk_path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")  # a cache may lose its last writes on power loss
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings "
+                    "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL DEFAULT 0)"
+                )
+                columns = {row[1] for row in self._db.execute("PRAGMA table_info(embeddings)")}
+                if "last_used" not in columns:  # created by an older version
+                    self._db.execute("ALTER TABLE embeddings ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+                self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+                self._db.commit()
+                self._disk_entries = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            except Exception as e:
+                logger.error(f"Failed to open embedding cache at {disk_path}: {e}")
+                self._db = None
+
+    @staticmethod
+    def make_key(model_name: str, text: str) -> str:
+        """Cache key for ``text`` embedded by ``model_name``."""
+        return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: np.ndarray):
+        """Insert into the memory tier and evict least recently used entries."""
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.nbytes
+        self._entries[key] = vector
+        self._bytes += vector.nbytes
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def get_cached(self, key: str) -> Optional[np.ndarray]:
+        """
+        Memory-tier lookup that never touches the disk tier.
+
+        A miss is not counted; it is counted by the ``get_many`` that follows.
+        """
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return vector
+
+    def get_many(self, keys: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up several keys, reading the disk tier for memory misses.
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Cached vector or None for each key
+        """
+        results: List[Optional[np.ndarray]] = [None] * len(keys)
+        missing: Dict[str, List[int]] = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    results[i] = vector
+                    self.hits += 1
+                else:
+                    missing.setdefault(key, []).append(i)
+
+        rows = self._read_disk(list(missing)) if missing else []
+        with self._lock:
+            for key, blob in rows:
+                vector = np.frombuffer(blob, dtype=np.float32)
+                self._remember(key, vector)
+                for i in missing.pop(key):
+                    results[i] = vector
+                    self.disk_hits += 1
+            self.misses += sum(len(positions) for positions in missing.values())
+
+        return results
+
+    def _read_disk(self, keys: List[str]) -> List[tuple]:
+        """(key, blob) rows of the disk tier for ``keys``, marking them recently used."""
+        if self._db is None:
+            return []
+        rows = []
+        with self._db_lock:
+            try:
+                for start in range(0, len(keys), DISK_QUERY_CHUNK):
+                    chunk = keys[start:start + DISK_QUERY_CHUNK]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows.extend(
+                        self._db.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk)
+                    )
+                if rows:
+                    now = time.time()
+                    self._db.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, key) for key, _ in rows]
+                    )
+                    self._db.commit()
+            except Exception as e:
+                logger.error(f"Error reading embedding cache: {e}")
+        return rows
+
+    def put_many(self, items: List[tuple]):
+        """
+        Store vectors.
+
+        Args:
+            items: List of (key, vector) pairs
+        """
+        vectors = [(key, np.asarray(vector, dtype=np.float32)) for key, vector in items]
+        with self._lock:
+            for key, vector in vectors:
+                self._remember(key, vector)
+
+        if self._db is None or not items:
+            return
+        now = time.time()
+        with self._db_lock:
+            try:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                    [(key, vector.tobytes(), now) for key, vector in vectors],
+                )
+                self._disk_entries += len(vectors)
+                if self.max_disk_entries and self._disk_entries > self.max_disk_entries:
+                    self._prune_disk()
+                self._db.commit()
+            except Exception as e:
+                logger.error(f"Error writing embedding cache: {e}")
+
+    def _prune_disk(self):
+        """Delete least recently used disk rows down to 90% of the cap (caller holds ``_db_lock``)."""
+        self._disk_entries = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = self._disk_entries - int(self.max_disk_entries * 0.9)
+        if self._disk_entries <= self.max_disk_entries or excess <= 0:
+            return
+        self._db.execute(
+            "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)", (excess,)
+        )
+        self._disk_entries -= excess
+        self.disk_evictions += excess
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and memory usage."""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "memory_bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "disk_evictions": self.disk_evictions,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+    def close(self):
+        """Close the disk tier."""
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -1,28 +1,167 @@
-"""Embedding Manager - Handles text embeddings using sentence transformers."""
+"""Embedding Manager - Handles text embeddings using sentence transformers or ONNX Runtime."""
 
 import logging
-from typing import List, Any
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Any, Optional, Callable, Dict
 import numpy as np
 
+from embedding_cache import EmbeddingCache
+
 logger = logging.getLogger(__name__)
 
 
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-text requests into batched model calls.
+
+    A worker thread waits for the first request, keeps collecting for up to
+    ``window_ms`` or until ``max_batch_size`` texts are queued, then embeds
+    them in one call and resolves each caller's future.
+    """
+
+    def __init__(self, encode_fn: Callable[[List[str]], List[List[float]]], window_ms: float = 3.0, max_batch_size: int = 32):
+        """
+        Initialize Embedding Batcher.
+
+        Args:
+            encode_fn: Embeds a list of texts
+            window_ms: How long to wait for more requests after the first
+            max_batch_size: Largest batch sent to the model
+        """
+        self.encode_fn = encode_fn
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self.items = 0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        """Queue ``text``; the returned future resolves to its embedding."""
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.window
+            stopping = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._process(batch)
+            if stopping:
+                return
+
+    def _process(self, batch: List[tuple]):
+        try:
+            vectors = self.encode_fn([text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.items += len(batch)
+        for (_, future), vector in zip(batch, vectors):
+            future.set_result(vector)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch counters."""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "queued": self._queue.qsize(),
+        }
+
+    def close(self):
+        """Stop the worker after draining queued requests."""
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+
 class EmbeddingManager:
-    """Manages text embeddings using sentence transformers."""
+    """
+    Manages text embeddings using sentence transformers.
 
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    The "onnx" and "onnx_int8" backends run the same model with ONNX
+    Runtime (int8 weights for the latter) without loading torch. Before an
+    optimized model is used its embeddings are compared with the torch
+    model's; if they disagree the torch backend is used instead.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        cache: Optional[EmbeddingCache] = None,
+        batch_window_ms: float = 0.0,
+        max_batch_size: int = 32,
+        backend: str = "torch",
+        onnx_path: str = "",
+        onnx_dir: str = "./data/onnx",
+        onnx_threads: int = 0,
+        parity_threshold: float = 0.99,
+    ):
         """
         Initialize Embedding Manager.
 
         Args:
             model_name: HuggingFace model name for embeddings
+            cache: Optional cache consulted before running the model
+            batch_window_ms: Micro-batching window for single-text requests (0 disables batching)
+            max_batch_size: Largest micro-batch sent to the model
+            backend: Runtime: "torch", "onnx" or "onnx_int8"
+            onnx_path: Exported ONNX model ("" uses the export in the model repo)
+            onnx_dir: Directory for the quantized model and parity records
+            onnx_threads: ONNX Runtime intra-op threads (0 uses all cores)
+            parity_threshold: Lowest cosine similarity to the torch embeddings accepted (0 skips the check)
         """
         self.model_name = model_name
+        self.cache = cache
+        self.backend = backend
+        self.onnx_path = onnx_path
+        self.onnx_dir = onnx_dir
+        self.onnx_threads = onnx_threads
+        self.parity_threshold = parity_threshold
+        self.parity: Optional[float] = None
         self.model = None
+        self.batcher: Optional[EmbeddingBatcher] = None
+        self.texts_encoded = 0
+        self.encode_seconds = 0.0
         self._initialize_model()
+        # Backends' embeddings differ slightly, so they do not share cache entries
+        self.cache_namespace = model_name if self.backend == "torch" else f"{model_name}#{self.backend}"
+
+        if self.model is not None and batch_window_ms > 0:
+            self.batcher = EmbeddingBatcher(self._embed_with_cache, window_ms=batch_window_ms, max_batch_size=max_batch_size)
 
     def _initialize_model(self):
         """Initialize the embedding model."""
+        if self.backend in ("onnx", "onnx_int8") and self._initialize_onnx_model():
+            return
+        if self.backend != "torch":
+            logger.warning(f"Embedding backend '{self.backend}' unavailable; using torch")
+            self.backend = "torch"
+
         try:
             from sentence_transformers import SentenceTransformer
 
@@ -37,6 +176,131 @@ class EmbeddingManager:
             logger.error(f"Failed to initialize embedding model: {e}")
             self.model = None
 
+    def _initialize_onnx_model(self) -> bool:
+        """Load the model with ONNX Runtime and check it against torch; returns whether it is used."""
+        try:
+            from onnx_embedder import OnnxEmbedder, parity_check
+
+            logger.info(f"Loading embedding model with ONNX Runtime ({self.backend}): {self.model_name}...")
+            model = OnnxEmbedder(
+                self.model_name,
+                onnx_path=self.onnx_path,
+                quantize=self.backend == "onnx_int8",
+                cache_dir=self.onnx_dir,
+                num_threads=self.onnx_threads,
+            )
+
+        except ImportError:
+            logger.warning("onnxruntime not installed. Install with: pip install onnxruntime")
+            return False
+        except Exception as e:
+            logger.error(f"Failed to initialize ONNX embedding model: {e}")
+            return False
+
+        if self.parity_threshold > 0:
+            self.parity = parity_check(model, self.model_name, record_dir=self.onnx_dir)
+            if self.parity is not None and self.parity < self.parity_threshold:
+                logger.error(
+                    f"ONNX embeddings diverge from torch (min cosine {self.parity:.5f} < {self.parity_threshold})"
+                )
+                return False
+            if self.parity is not None:
+                logger.info(f"ONNX embeddings match torch (min cosine {self.parity:.5f})")
+
+        self.model = model
+        logger.info("Embedding model loaded successfully!")
+        return True
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Run the model on a batch of texts; returns a (len(texts), dim) float32 array."""
+        started = time.perf_counter()
+        embeddings: Any = self.model.encode(texts)
+        self.texts_encoded += len(texts)
+        self.encode_seconds += time.perf_counter() - started
+        return np.asarray(embeddings, dtype=np.float32).reshape(len(texts), -1)
+
+    def _encode_and_cache(self, texts: List[str]) -> List[List[float]]:
+        """Encode texts (deduplicated) in one batch and store the results in the cache."""
+        unique = list(dict.fromkeys(texts))
+        encoded = dict(zip(unique, self._encode(unique)))
+        if self.cache is not None:
+            self.cache.put_many([(EmbeddingCache.make_key(self.cache_namespace, t), v) for t, v in encoded.items()])
+        return [encoded[text].tolist() for text in texts]
+
+    def _embed_with_cache(self, texts: List[str]) -> List[List[float]]:
+        """Serve texts from the cache, disk tier included, and encode the rest in one batch."""
+        if self.cache is None:
+            return self._encode(texts).tolist()
+
+        keys = [EmbeddingCache.make_key(self.cache_namespace, text) for text in texts]
+        vectors: List[Any] = [v.tolist() if v is not None else None for v in self.cache.get_many(keys)]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            encoded = self._encode_and_cache([texts[i] for i in missing])
+            for i, vector in zip(missing, encoded):
+                vectors[i] = vector
+        return vectors
+
+    def warm_up(self) -> float:
+        """
+        Embed a short text once so the first request does not pay for lazy initialization.
+
+        Returns:
+            Seconds taken (0.0 without a model)
+        """
+        if self.model is None:
+            return 0.0
+
+        try:
+            started = time.perf_counter()
+            self.model.encode(["warm-up"])  # bypasses the cache and the stats on purpose
+            seconds = time.perf_counter() - started
+            logger.info(f"Embedding warm-up took {seconds:.2f}s")
+            return seconds
+
+        except Exception as e:
+            logger.error(f"Error warming up embedding model: {e}")
+            return 0.0
+
+    def submit(self, text: str) -> Future:
+        """
+        Request an embedding without blocking.
+
+        Memory-cache hits resolve immediately; misses are micro-batched when
+        the batcher is enabled, and the batch worker reads the disk tier, so
+        this is safe to call from the event loop. Errors resolve to a random fallback vector, as
+        with ``embed_text``.
+
+        Args:
+            text: Input text to embed
+
+        Returns:
+            Future resolving to the embedding vector
+        """
+        if self.batcher is None or self.model is None:
+            future: Future = Future()
+            future.set_result(self.embed_text(text))
+            return future
+
+        if self.cache is not None:
+            cached = self.cache.get_cached(EmbeddingCache.make_key(self.cache_namespace, text))
+            if cached is not None:
+                future = Future()
+                future.set_result(cached.tolist())
+                return future
+
+        result: Future = Future()
+
+        def relay(batched: Future):
+            try:
+                result.set_result(batched.result())
+            except Exception as e:
+                logger.error(f"Error embedding text: {e}")
+                result.set_result(np.random.rand(384).tolist())
+
+        self.batcher.submit(text).add_done_callback(relay)
+        return result
+
     def embed_text(self, text: str) -> List[float]:
         """
         Generate embedding for text.
@@ -51,57 +315,56 @@ class EmbeddingManager:
             logger.warning("Embedding model not available, returning random vector")
             return np.random.rand(384).tolist()
 
-        try:
-            embedding: Any = self.model.encode(text, convert_to_tensor=False)
-            # Handle different return types from sentence-transformers
-            if isinstance(embedding, np.ndarray):
-                return embedding.tolist()
-            elif hasattr(embedding, 'tolist'):
-                result = embedding.tolist()
-                return result if isinstance(result[0], float) else [float(x) for row in result for x in (row if isinstance(row, list) else [row])]
-            elif isinstance(embedding, list):
-                return [float(x) if not isinstance(x, (int, float)) else x for x in embedding]
-            else:
-                return [float(x) for x in embedding]
-
-        except Exception as e:
-            logger.error(f"Error embedding text: {e}")
-            return np.random.rand(384).tolist()
+        if self.batcher is not None:
+            return self.submit(text).result()
+        return self.embed_texts([text])[0]
 
-    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+    def embed_texts(self, texts: List[str], strict: bool = False) -> List[List[float]]:
         """
         Generate embeddings for multiple texts.
 
+        Cached texts are served from the embedding cache; the rest are
+        encoded in a single batch and added to it.
+
         Args:
             texts: List of texts to embed
+            strict: Raise instead of returning random vectors when the model
+                is unavailable or fails (for vectors that are stored)
 
         Returns:
             List of embedding vectors
         """
         if self.model is None:
+            if strict:
+                raise RuntimeError("Embedding model not available")
             logger.warning("Embedding model not available, returning random vectors")
             return [np.random.rand(384).tolist() for _ in texts]
 
         try:
-            embeddings: Any = self.model.encode(texts, convert_to_tensor=False)
-            # Handle different return types from sentence-transformers
-            if isinstance(embeddings, np.ndarray):
-                return embeddings.tolist()
-            elif hasattr(embeddings, 'tolist'):
-                result = embeddings.tolist()
-                return [[float(x) for x in row] if isinstance(row, list) else [float(embeddings[0])] for row in result]
-            elif isinstance(embeddings, list):
-                if embeddings and isinstance(embeddings[0], list):
-                    return [[float(x) if not isinstance(x, (int, float)) else x for x in row] for row in embeddings]
-                else:
-                    return [[float(x) if not isinstance(x, (int, float)) else x for x in embeddings]]
-            else:
-                return [[float(x) for x in embeddings]]
+            return self._embed_with_cache(texts)
 
         except Exception as e:
+            if strict:
+                raise
             logger.error(f"Error embedding texts: {e}")
             return [np.random.rand(384).tolist() for _ in texts]
 
+    def stats(self) -> Dict[str, Any]:
+        """Runtime and encoding counters."""
+        return {
+            "backend": self.backend,
+            "parity_min_cosine": round(self.parity, 5) if self.parity is not None else None,
+            "texts_encoded": self.texts_encoded,
+            "avg_ms_per_text": round(self.encode_seconds * 1000 / self.texts_encoded, 3) if self.texts_encoded else 0.0,
+        }
+
+    def close(self):
+        """Stop the batcher and close the cache."""
+        if self.batcher is not None:
+            self.batcher.close()
+        if self.cache is not None:
+            self.cache.close()
+
     def get_embedding_dimension(self) -> int:
         """Get the dimension of embeddings."""
         if self.model is None:
@@ -0,0 +1,304 @@
+"""HNSW Index - Approximate nearest-neighbour graph for cosine similarity."""
+
+import heapq
+import logging
+import math
+import random
+from pathlib import Path
+from typing import Any, List, Dict, Tuple, Optional, Set
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class HNSWIndex:
+    """
+    Hierarchical Navigable Small World graph over L2-normalised vectors.
+
+    Vectors are addressed by string labels. Inserting an existing label
+    tombstones the old node and adds a fresh one; deletes only tombstone,
+    so the graph stays navigable until ``rebuild`` is called.
+
+    ``to_arrays`` and ``from_arrays`` convert the graph to and from flat
+    NumPy arrays, so a saved index loads without re-inserting every vector.
+    With ``storage_path`` the node vectors live in a disk-backed memmap
+    instead of RAM.
+    """
+
+    def __init__(
+        self,
+        dimension: int,
+        m: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 64,
+        seed: Optional[int] = None,
+        storage_path: Optional[Path] = None,
+    ):
+        """
+        Initialize HNSW Index.
+
+        Args:
+            dimension: Embedding dimension
+            m: Max neighbours per node on upper layers (2*m on layer 0)
+            ef_construction: Candidate list size while inserting
+            ef_search: Default candidate list size while querying
+            seed: Random seed for level assignment
+            storage_path: File backing the node vectors (None keeps them in RAM)
+        """
+        self.dimension = dimension
+        self.m = m
+        self.m0 = 2 * m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.level_mult = 1 / math.log(max(m, 2))
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self.storage_path = storage_path
+
+        self.vectors = self._allocate(1024)
+        self.labels: List[str] = []
+        self.label_to_node: Dict[str, int] = {}
+        self.deleted: Set[int] = set()
+        self.graph: List[List[List[int]]] = []  # graph[node][level] -> neighbour nodes
+        self.entry_point: Optional[int] = None
+        self.max_level = -1
+
+    def _allocate(self, capacity: int, keep: int = 0) -> np.ndarray:
+        """Vector storage for ``capacity`` nodes, keeping the first ``keep`` rows of the current one."""
+        if self.storage_path is None:
+            vectors = np.zeros((capacity, self.dimension), dtype=np.float32)
+            if keep:
+                vectors[:keep] = self.vectors[:keep]
+            return vectors
+        if keep:
+            self.vectors.flush()
+        nbytes = capacity * self.dimension * 4
+        self.storage_path.touch(exist_ok=True)
+        if self.storage_path.stat().st_size < nbytes:
+            with open(self.storage_path, "r+b") as f:
+                f.truncate(nbytes)
+        return np.memmap(self.storage_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+
+    def __len__(self) -> int:
+        return len(self.label_to_node)
+
+    @property
+    def tombstone_ratio(self) -> float:
+        """Fraction of graph nodes that are deleted."""
+        return len(self.deleted) / len(self.labels) if self.labels else 0.0
+
+    def _similarity(self, nodes: List[int], query: np.ndarray) -> np.ndarray:
+        return self.vectors[nodes] @ query
+
+    def _search_layer(self, query: np.ndarray, entry_points: List[int], ef: int, level: int) -> List[Tuple[float, int]]:
+        """Best-first search on one layer; returns up to ef (similarity, node) pairs."""
+        visited = set(entry_points)
+        sims = self._similarity(entry_points, query)
+        candidates = [(-float(s), n) for s, n in zip(sims, entry_points)]  # max-heap on similarity
+        heapq.heapify(candidates)
+        results = [(float(s), n) for s, n in zip(sims, entry_points)]  # min-heap on similarity
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            neg_sim, node = heapq.heappop(candidates)
+            if -neg_sim < results[0][0] and len(results) >= ef:
+                break
+
+            neighbours = [n for n in self.graph[node][level] if n not in visited]
+            if not neighbours:
+                continue
+            visited.update(neighbours)
+
+            for sim, n in zip(self._similarity(neighbours, query), neighbours):
+                sim = float(sim)
+                if len(results) < ef or sim > results[0][0]:
+                    heapq.heappush(candidates, (-sim, n))
+                    heapq.heappush(results, (sim, n))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+
+        return sorted(results, reverse=True)
+
+    def _shrink(self, node: int, level: int, limit: int):
+        """Keep only the ``limit`` most similar neighbours of ``node``."""
+        neighbours = self.graph[node][level]
+        if len(neighbours) <= limit:
+            return
+        sims = self._similarity(neighbours, self.vectors[node])
+        keep = np.argsort(-sims)[:limit]
+        self.graph[node][level] = [neighbours[i] for i in keep]
+
+    def add(self, label: str, vector: np.ndarray):
+        """
+        Insert a normalised vector under ``label``.
+
+        Args:
+            label: Vector id
+            vector: L2-normalised embedding
+        """
+        old = self.label_to_node.pop(label, None)
+        if old is not None:
+            self.deleted.add(old)
+
+        node = len(self.labels)
+        if node >= self.vectors.shape[0]:
+            self.vectors = self._allocate(self.vectors.shape[0] * 2, keep=node)
+        self.vectors[node] = vector
+        self.labels.append(label)
+        self.label_to_node[label] = node
+
+        level = int(-math.log(1.0 - self._rng.random()) * self.level_mult)
+        self.graph.append([[] for _ in range(level + 1)])
+
+        if self.entry_point is None:
+            self.entry_point = node
+            self.max_level = level
+            return
+
+        query = self.vectors[node]
+        current = [self.entry_point]
+        for lvl in range(self.max_level, level, -1):
+            current = [self._search_layer(query, current, 1, lvl)[0][1]]
+
+        for lvl in range(min(level, self.max_level), -1, -1):
+            found = self._search_layer(query, current, self.ef_construction, lvl)
+            limit = self.m0 if lvl == 0 else self.m
+            neighbours = [n for _, n in found[: self.m]]
+            self.graph[node][lvl] = neighbours
+            for n in neighbours:
+                self.graph[n][lvl].append(node)
+                self._shrink(n, lvl, limit)
+            current = [n for _, n in found]
+
+        if level > self.max_level:
+            self.max_level = level
+            self.entry_point = node
+
+    def remove(self, label: str) -> bool:
+        """Tombstone ``label``; returns False if it was not present."""
+        node = self.label_to_node.pop(label, None)
+        if node is None:
+            return False
+        self.deleted.add(node)
+        return True
+
+    def search(
+        self, query: np.ndarray, top_k: int = 5, ef: Optional[int] = None, allowed: Optional[Set[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Approximate top-k search.
+
+        Args:
+            query: L2-normalised query embedding
+            top_k: Number of results
+            ef: Candidate list size (defaults to ``ef_search``)
+            allowed: Only return these labels; the beam widens by the inverse of their share
+
+        Returns:
+            List of (label, similarity) pairs, best first
+        """
+        if self.entry_point is None or not self.label_to_node:
+            return []
+
+        ef = max(ef or self.ef_search, top_k)
+        current = [self.entry_point]
+        for lvl in range(self.max_level, 0, -1):
+            current = [self._search_layer(query, current, 1, lvl)[0][1]]
+
+        # Widen the beam in proportion to tombstones so enough live nodes survive filtering
+        ef = int(math.ceil(ef / max(1.0 - self.tombstone_ratio, 0.1)))
+        if allowed is not None:
+            ef = int(math.ceil(ef / max(len(allowed) / len(self.label_to_node), 0.01)))
+        ef = min(ef, len(self.labels))
+        found = self._search_layer(query, current, ef, 0)
+        results = [
+            (self.labels[n], sim)
+            for sim, n in found
+            if n not in self.deleted and (allowed is None or self.labels[n] in allowed)
+        ]
+        return results[:top_k]
+
+    def live_items(self) -> List[Tuple[str, np.ndarray]]:
+        """Copies of the (label, vector) pairs of every live node."""
+        return [(label, np.array(self.vectors[node])) for label, node in self.label_to_node.items()]
+
+    def rebuild(self):
+        """Rebuild the graph from live nodes, dropping tombstones."""
+        live = self.live_items()
+        logger.info(f"Rebuilding HNSW index: {len(live)} live / {len(self.labels)} total nodes")
+        self.__init__(self.dimension, self.m, self.ef_construction, self.ef_search, self.seed, self.storage_path)
+        for label, vector in live:
+            self.add(label, vector)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Flatten the index for ``np.savez``.
+
+        Neighbour lists are concatenated per node and level, with
+        ``levels`` (levels per node) and ``counts`` (neighbours per node
+        level) to split them again.
+        """
+        levels = np.fromiter((len(node) for node in self.graph), dtype=np.int32, count=len(self.graph))
+        counts = np.fromiter(
+            (len(neighbours) for node in self.graph for neighbours in node), dtype=np.int32, count=int(levels.sum())
+        )
+        neighbours = np.fromiter(
+            (n for node in self.graph for level in node for n in level), dtype=np.int32, count=int(counts.sum())
+        )
+        entry_point = -1 if self.entry_point is None else self.entry_point
+        return {
+            "params": np.array(
+                [self.dimension, self.m, self.ef_construction, entry_point, self.max_level], dtype=np.int64
+            ),
+            "labels": np.array(self.labels, dtype=str),
+            "deleted": np.fromiter(sorted(self.deleted), dtype=np.int64, count=len(self.deleted)),
+            "levels": levels,
+            "counts": counts,
+            "neighbours": neighbours,
+            "vectors": self.vectors[: len(self.labels)],
+        }
+
+    @classmethod
+    def from_arrays(
+        cls, arrays: Any, ef_search: int = 64, seed: Optional[int] = None, storage_path: Optional[Path] = None
+    ) -> "HNSWIndex":
+        """
+        Rebuild an index from ``to_arrays`` output (a dict or an ``np.load`` result).
+
+        Args:
+            arrays: Arrays produced by ``to_arrays``
+            ef_search: Default candidate list size while querying
+            seed: Random seed for level assignment of new nodes
+            storage_path: File backing the node vectors (None keeps them in RAM)
+
+        Returns:
+            The restored index
+        """
+        dimension, m, ef_construction, entry_point, max_level = (int(x) for x in arrays["params"])
+        index = cls(
+            dimension, m=m, ef_construction=ef_construction, ef_search=ef_search, seed=seed, storage_path=storage_path
+        )
+        index.labels = arrays["labels"].tolist()
+        size = len(index.labels)
+        index.vectors = index._allocate(max(1024, size))
+        index.vectors[:size] = arrays["vectors"]
+        index.deleted = set(arrays["deleted"].tolist())
+        index.label_to_node = {label: node for node, label in enumerate(index.labels) if node not in index.deleted}
+
+        counts = arrays["counts"].tolist()
+        neighbours = arrays["neighbours"].tolist()
+        position = slot = 0
+        for levels in arrays["levels"].tolist():
+            node = []
+            for _ in range(levels):
+                node.append(neighbours[position:position + counts[slot]])
+                position += counts[slot]
+                slot += 1
+            index.graph.append(node)
+
+        index.entry_point = None if entry_point < 0 else entry_point
+        index.max_level = max_level
+        return index
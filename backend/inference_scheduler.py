@@ -0,0 +1,188 @@
+"""Inference Scheduler - Runs model work off the event loop with admission control."""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when the LLM request queue is at capacity."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("LLM request queue is full")
+        self.retry_after = retry_after
+
+
+class _Failure:
+    """Wraps an exception raised inside a streaming worker."""
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+class InferenceScheduler:
+    """
+    Schedules LLM and embedding calls on worker threads.
+
+    LLM work runs on a single dedicated thread, which serialises access to
+    the non-thread-safe ``Llama`` instance. At most ``max_queue_size``
+    requests may wait behind the running one; further requests are rejected
+    immediately with ``QueueFullError``.
+    """
+
+    def __init__(self, max_queue_size: int = 8, embedding_workers: int = 2):
+        """
+        Initialize Inference Scheduler.
+
+        Args:
+            max_queue_size: LLM requests allowed to wait behind the running one
+            embedding_workers: Threads used for embedding calls
+        """
+        self.max_queue_size = max_queue_size
+        self._llm_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm")
+        self._embedding_executor = ThreadPoolExecutor(max_workers=embedding_workers, thread_name_prefix="embed")
+        self._stats_lock = threading.Lock()
+
+        self._pending = 0  # queued + running; only touched on the event loop thread
+        self.completed = 0
+        self.rejected = 0
+        self.last_wait = 0.0
+        self.avg_wait = 0.0
+        self.avg_service = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        """LLM requests waiting for the worker thread."""
+        return max(self._pending - 1, 0)
+
+    def retry_after(self) -> int:
+        """Seconds a rejected client should wait, estimated from recent service times."""
+        return max(1, math.ceil(self._pending * self.avg_service))
+
+    def check_capacity(self):
+        """
+        Reject early when the LLM queue is full, without taking a slot.
+
+        Raises:
+            QueueFullError: If the queue is at capacity
+        """
+        if self._pending > self.max_queue_size:
+            self.rejected += 1
+            raise QueueFullError(self.retry_after())
+
+    def _admit(self):
+        self.check_capacity()
+        self._pending += 1
+
+    def _release(self, _future=None):
+        self._pending -= 1
+
+    def _record(self, wait: float, service: float):
+        """Update moving averages (alpha = 0.2)."""
+        with self._stats_lock:
+            self.completed += 1
+            self.last_wait = wait
+            if self.completed == 1:
+                self.avg_wait, self.avg_service = wait, service
+            else:
+                self.avg_wait += 0.2 * (wait - self.avg_wait)
+                self.avg_service += 0.2 * (service - self.avg_service)
+
+    async def run_llm(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking LLM call on the LLM thread.
+
+        Raises:
+            QueueFullError: If the queue is at capacity
+        """
+        self._admit()
+        enqueued = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._record(started - enqueued, time.perf_counter() - started)
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._llm_executor, job)
+        future.add_done_callback(self._release)
+        return await future
+
+    def stream_llm(self, fn: Callable[..., Iterator[Any]], *args, **kwargs) -> AsyncIterator[Any]:
+        """
+        Run a blocking LLM generator on the LLM thread and relay its items.
+
+        Admission happens when this is called, so callers can still turn
+        ``QueueFullError`` into an HTTP error before the response starts.
+
+        Raises:
+            QueueFullError: If the queue is at capacity
+        """
+        self._admit()
+        enqueued = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        finished = object()
+        cancelled = threading.Event()
+
+        def produce():
+            started = time.perf_counter()
+            try:
+                for item in fn(*args, **kwargs):
+                    if cancelled.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, item)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, _Failure(e))
+            finally:
+                self._record(started - enqueued, time.perf_counter() - started)
+                loop.call_soon_threadsafe(queue.put_nowait, finished)
+
+        future = loop.run_in_executor(self._llm_executor, produce)
+        future.add_done_callback(self._release)
+
+        async def relay() -> AsyncIterator[Any]:
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is finished:
+                        return
+                    if isinstance(item, _Failure):
+                        raise item.error
+                    yield item
+            finally:
+                # Client went away: stop generating at the next token
+                cancelled.set()
+
+        return relay()
+
+    async def run_embedding(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking embedding call on the embedding pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._embedding_executor, lambda: fn(*args, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and timing statistics."""
+        return {
+            "queue_depth": self.queue_depth,
+            "running": min(self._pending, 1),
+            "max_queue_size": self.max_queue_size,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "last_wait_ms": round(self.last_wait * 1000, 1),
+            "avg_wait_ms": round(self.avg_wait * 1000, 1),
+            "avg_service_ms": round(self.avg_service * 1000, 1),
+        }
+
+    def shutdown(self):
+        """Stop worker threads once queued work finishes."""
+        self._llm_executor.shutdown(wait=False, cancel_futures=True)
+        self._embedding_executor.shutdown(wait=False, cancel_futures=True)
@@ -2,51 +2,273 @@
 
 import json
 import logging
+import os
+import threading
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 from datetime import datetime
 
+from bm25_index import BM25Index
+from metadata_filter import matches
+
 logger = logging.getLogger(__name__)
 
 
-class KnowledgeBase:
-    """Manages knowledge base operations."""
+def _fsync_dir(path: Path):
+    """Make a rename in ``path`` durable."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return  # Not supported on this platform
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def entry_text(entry: Dict[str, Any]) -> str:
+    """Text indexed for lexical search: title, content and tags."""
+    return " ".join([entry.get("title", ""), entry.get("content", ""), *(entry.get("tags") or [])])
 
-    def __init__(self, file_path: str):
+
+class KnowledgeBase:
+    """
+    Manages knowledge base operations.
+
+    Entries are held in a hash map keyed by ID, with secondary indexes on
+    category and tag, so point operations are O(1) and category/tag lookups
+    are output-sized. A BM25 inverted index over title, content and tags
+    serves text search. IDs come from a monotonic allocator and are never
+    reused after a delete.
+
+    State is persisted as a JSON snapshot plus an append-only operation log
+    (``<file>.log``). Each mutation appends one record, so writes are O(1).
+    A background thread fsyncs the log in batches (group commit) and
+    compacts it into a fresh snapshot, swapped in by atomic rename, once it
+    grows past ``compact_threshold`` records.
+    """
+
+    def __init__(self, file_path: str, fsync_interval_ms: float = 50, compact_threshold: int = 1000):
         """
         Initialize Knowledge Base.
 
         Args:
             file_path: Path to knowledge base JSON file
+            fsync_interval_ms: Group-commit interval for the operation log
+            compact_threshold: Log records that trigger a background compaction
         """
         self.file_path = Path(file_path)
-        self.knowledge_base = self._load_knowledge_base()
-
-    def _load_knowledge_base(self) -> Dict[str, Any]:
-        """Load knowledge base from file."""
+        self.log_path = self.file_path.with_name(self.file_path.name + ".log")
+        self.fsync_interval = fsync_interval_ms / 1000.0
+        self.compact_threshold = compact_threshold
+
+        self._lock = threading.RLock()
+        self._seq = 0
+        self._log_records = 0
+        self._unsynced = False
+        self._log_file = None
+        self._closed = threading.Event()
+
+        self._entries: Dict[int, Dict[str, Any]] = {}
+        self._by_category: Dict[str, Dict[int, None]] = {}  # dicts as insertion-ordered sets
+        self._by_tag: Dict[str, Dict[int, None]] = {}
+        self._lexical = BM25Index()
+        self._next_id = 1
+
+        self._load_knowledge_base()
+        self._open_log()
+
+        self._flusher = threading.Thread(target=self._flush_loop, name="kb-log-flusher", daemon=True)
+        self._flusher.start()
+
+    def _load_knowledge_base(self):
+        """Load the snapshot and replay the operation log on top of it."""
+        data: Dict[str, Any] = {"entries": []}
         if self.file_path.exists():
             try:
                 with open(self.file_path, "r") as f:
-                    return json.load(f)
+                    data = json.load(f)
             except Exception as e:
                 logger.error(f"Error loading knowledge base: {e}")
-                return {"entries": []}
-        return {"entries": []}
+                data = {"entries": []}
+
+        self._seq = data.get("last_seq", 0)
+        self._next_id = data.get("next_id", 1)
+        for entry in data.get("entries", []):
+            self._entries[entry["id"]] = entry
+
+        if self.log_path.exists():
+            replayed = 0
+            good_bytes = 0
+            with open(self.log_path, "rb") as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise json.JSONDecodeError("missing newline", "", 0)
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Crash mid-append: drop the partial line so new records start cleanly
+                        logger.warning("Truncating torn record at the end of the knowledge base log")
+                        os.truncate(self.log_path, good_bytes)
+                        break
+                    good_bytes += len(line)
+                    self._log_records += 1
+                    if record["seq"] <= self._seq:
+                        continue  # Already folded into the snapshot
+                    self._seq = record["seq"]
+                    replayed += 1
+                    if record["op"] == "put":
+                        self._entries[record["entry"]["id"]] = record["entry"]
+                    elif record["op"] == "delete":
+                        self._entries.pop(record["id"], None)
+                        self._next_id = max(self._next_id, record["id"] + 1)
+            if replayed:
+                logger.info(f"Replayed {replayed} knowledge base log records")
+
+        if self._entries:
+            self._next_id = max(self._next_id, max(self._entries) + 1)
+        for entry in self._entries.values():
+            self._index(entry)
+
+    def _index(self, entry: Dict[str, Any]):
+        """Add an entry to the secondary indexes."""
+        self._by_category.setdefault(entry.get("category"), {})[entry["id"]] = None
+        for tag in entry.get("tags") or []:
+            self._by_tag.setdefault(tag, {})[entry["id"]] = None
+        self._lexical.add(entry["id"], entry_text(entry))
+
+    def _unindex(self, entry: Dict[str, Any]):
+        """Remove an entry from the secondary indexes."""
+        ids = self._by_category.get(entry.get("category"))
+        if ids is not None:
+            ids.pop(entry["id"], None)
+            if not ids:
+                del self._by_category[entry.get("category")]
+        for tag in entry.get("tags") or []:
+            ids = self._by_tag.get(tag)
+            if ids is not None:
+                ids.pop(entry["id"], None)
+                if not ids:
+                    del self._by_tag[tag]
+        self._lexical.remove(entry["id"])
+
+    def _open_log(self):
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self._log_file = open(self.log_path, "a")
+
+    def _append(self, record: Dict[str, Any]):
+        """Append one operation to the log; it is fsynced by the next group commit."""
+        self._append_many([record])
+
+    def _append_many(self, records: List[Dict[str, Any]]):
+        """Append several operations with a single write."""
+        with self._lock:
+            lines = []
+            for record in records:
+                self._seq += 1
+                record["seq"] = self._seq
+                lines.append(json.dumps(record) + "\n")
+            self._log_file.write("".join(lines))
+            self._log_file.flush()  # Survives a process crash; fsync covers OS crashes
+            self._log_records += len(records)
+            self._unsynced = True
+
+    def _sync(self):
+        with self._lock:
+            if self._unsynced and self._log_file is not None:
+                os.fsync(self._log_file.fileno())
+                self._unsynced = False
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.fsync_interval):
+            try:
+                self._sync()
+                if self._log_records >= self.compact_threshold:
+                    self.compact()
+            except Exception as e:
+                logger.error(f"Error flushing knowledge base log: {e}")
 
-    def _save_knowledge_base(self) -> bool:
-        """Save knowledge base to file."""
+    def _save_knowledge_base(self, data: Dict[str, Any]) -> bool:
+        """Atomically replace the snapshot with ``data``."""
+        tmp_path = self.file_path.with_name(self.file_path.name + ".tmp")
         try:
-            # Create parent directories if needed
             self.file_path.parent.mkdir(parents=True, exist_ok=True)
-
-            with open(self.file_path, "w") as f:
-                json.dump(self.knowledge_base, f, indent=2)
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.file_path)
+            _fsync_dir(self.file_path.parent)
             return True
 
         except Exception as e:
             logger.error(f"Error saving knowledge base: {e}")
             return False
 
+    def compact(self) -> bool:
+        """
+        Fold the operation log into a new snapshot.
+
+        The snapshot records the last sequence number it contains, so a
+        crash at any point leaves snapshot plus log replayable.
+
+        Returns:
+            Success status
+        """
+        with self._lock:
+            snapshot_seq = self._seq
+            next_id = self._next_id
+            entries = [dict(entry) for entry in self._entries.values()]
+
+        if not self._save_knowledge_base({"entries": entries, "next_id": next_id, "last_seq": snapshot_seq}):
+            return False
+
+        with self._lock:
+            # Keep only records appended while the snapshot was being written
+            self._log_file.close()
+            kept = []
+            with open(self.log_path, "r") as f:
+                for line in f:
+                    try:
+                        if json.loads(line)["seq"] > snapshot_seq:
+                            kept.append(line)
+                    except json.JSONDecodeError:
+                        break
+            tmp_log = self.log_path.with_name(self.log_path.name + ".tmp")
+            with open(tmp_log, "w") as f:
+                f.writelines(kept)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_log, self.log_path)
+            _fsync_dir(self.log_path.parent)
+            self._log_records = len(kept)
+            self._unsynced = False
+            self._open_log()
+
+        logger.info(f"Compacted knowledge base: {len(entries)} entries in snapshot")
+        return True
+
+    def flush(self):
+        """Fsync the operation log now instead of at the next group commit."""
+        self._sync()
+
+    def last_entry_id(self) -> int:
+        """Highest ID handed out so far, including deleted entries (0 if none)."""
+        with self._lock:
+            return self._next_id - 1
+
+    def close(self):
+        """Flush the log, compact it and stop the background thread."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._flusher.join(timeout=5)
+        with self._lock:
+            self._sync()
+            if self._log_records:
+                self.compact()
+            self._log_file.close()
+
     def add_entry(
         self,
         title: str,
@@ -68,23 +290,61 @@ class KnowledgeBase:
         Returns:
             Created entry
         """
-        entry_id = len(self.knowledge_base["entries"]) + 1
-        entry = {
-            "id": entry_id,
-            "title": title,
-            "content": content,
-            "category": category,
-            "tags": tags or [],
-            "source": source,
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat(),
-        }
-
-        self.knowledge_base["entries"].append(entry)
-        self._save_knowledge_base()
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            entry = {
+                "id": entry_id,
+                "title": title,
+                "content": content,
+                "category": category,
+                "tags": tags or [],
+                "source": source,
+                "created_at": datetime.now().isoformat(),
+                "updated_at": datetime.now().isoformat(),
+            }
+            self._entries[entry_id] = entry
+            self._index(entry)
+            self._append({"op": "put", "entry": entry})
         logger.info(f"Added knowledge entry: {title}")
         return entry
 
+    def add_entries(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Add several knowledge entries and persist them together.
+
+        The batch is written to the log in one append and fsynced once.
+
+        Args:
+            items: Dicts of ``add_entry`` arguments
+
+        Returns:
+            Created entries, in input order
+        """
+        now = datetime.now().isoformat()
+        with self._lock:
+            entries = []
+            for item in items:
+                entry = {
+                    "id": self._next_id,
+                    "title": item["title"],
+                    "content": item["content"],
+                    "category": item.get("category") or "general",
+                    "tags": item.get("tags") or [],
+                    "source": item.get("source"),
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                self._next_id += 1
+                self._entries[entry["id"]] = entry
+                self._index(entry)
+                entries.append(entry)
+            if entries:
+                self._append_many([{"op": "put", "entry": entry} for entry in entries])
+                self._sync()
+        logger.info(f"Added {len(entries)} knowledge entries")
+        return entries
+
     def update_entry(self, entry_id: int, **kwargs) -> Optional[Dict[str, Any]]:
         """
         Update a knowledge entry.
@@ -96,13 +356,20 @@ class KnowledgeBase:
         Returns:
             Updated entry
         """
-        for entry in self.knowledge_base["entries"]:
-            if entry["id"] == entry_id:
+        kwargs.pop("id", None)
+        kwargs = {k: v for k, v in kwargs.items() if v is not None}  # None means "not given"
+        with self._lock:
+            entry = self._entries.get(entry_id)
+            if entry is not None:
+                self._unindex(entry)
                 entry.update(kwargs)
                 entry["updated_at"] = datetime.now().isoformat()
-                self._save_knowledge_base()
-                logger.info(f"Updated knowledge entry: {entry_id}")
-                return entry
+                self._index(entry)
+                self._append({"op": "put", "entry": entry})
+
+        if entry is not None:
+            logger.info(f"Updated knowledge entry: {entry_id}")
+            return entry
 
         logger.warning(f"Entry not found: {entry_id}")
         return None
@@ -117,11 +384,13 @@ class KnowledgeBase:
         Returns:
             Success status
         """
-        initial_len = len(self.knowledge_base["entries"])
-        self.knowledge_base["entries"] = [e for e in self.knowledge_base["entries"] if e["id"] != entry_id]
+        with self._lock:
+            entry = self._entries.pop(entry_id, None)
+            if entry is not None:
+                self._unindex(entry)
+                self._append({"op": "delete", "id": entry_id})
 
-        if len(self.knowledge_base["entries"]) < initial_len:
-            self._save_knowledge_base()
+        if entry is not None:
             logger.info(f"Deleted knowledge entry: {entry_id}")
             return True
 
@@ -138,10 +407,20 @@ class KnowledgeBase:
         Returns:
             Entry or None
         """
-        for entry in self.knowledge_base["entries"]:
-            if entry["id"] == entry_id:
-                return entry
-        return None
+        return self._entries.get(entry_id)
+
+    def get_entries(self, entry_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Get several knowledge entries at once.
+
+        Args:
+            entry_ids: Entry IDs
+
+        Returns:
+            Mapping of ID to entry for the IDs that exist
+        """
+        with self._lock:
+            return {entry_id: self._entries[entry_id] for entry_id in entry_ids if entry_id in self._entries}
 
     def search_entries(self, query: str, category: Optional[str] = None) -> List[Dict[str, Any]]:
         """
@@ -152,28 +431,95 @@ class KnowledgeBase:
             category: Filter by category
 
         Returns:
-            List of matching entries
+            Entries containing every query term, best BM25 match first
         """
-        results = []
-        query_lower = query.lower()
+        with self._lock:
+            allowed = set(self._by_category.get(category, ())) if category else None
+            ranked = self._lexical.search(query, top_k=None, require_all=True, allowed=allowed)
+            return [self._entries[entry_id] for entry_id, _ in ranked]
 
-        for entry in self.knowledge_base["entries"]:
-            if category and entry.get("category") != category:
-                continue
+    def lexical_search(self, query: str, top_k: int = 10, filter: Optional[Dict[str, Any]] = None) -> List[tuple]:
+        """
+        Rank entries by BM25 against any of the query terms.
 
-            if (
-                query_lower in entry["title"].lower()
-                or query_lower in entry["content"].lower()
-                or any(query_lower in tag.lower() for tag in entry.get("tags", []))
-            ):
-                results.append(entry)
+        Args:
+            query: Search query
+            top_k: Maximum results
+            filter: Metadata filter on entry fields (same syntax as vector search)
 
-        return results
+        Returns:
+            List of (entry, score), best first
+        """
+        with self._lock:
+            if not filter:
+                return [(self._entries[i], score) for i, score in self._lexical.search(query, top_k=top_k)]
+            results = []
+            for entry_id, score in self._lexical.search(query, top_k=None):
+                if matches(self._entries[entry_id], filter):
+                    results.append((self._entries[entry_id], score))
+                    if len(results) == top_k:
+                        break
+            return results
 
     def get_all_entries(self) -> List[Dict[str, Any]]:
         """Get all knowledge entries."""
-        return self.knowledge_base.get("entries", [])
+        with self._lock:
+            return list(self._entries.values())
 
     def get_entries_by_category(self, category: str) -> List[Dict[str, Any]]:
         """Get entries by category."""
-        return [e for e in self.knowledge_base["entries"] if e.get("category") == category]
+        with self._lock:
+            return [self._entries[i] for i in self._by_category.get(category, ())]
+
+    def get_entries_by_tag(self, tag: str) -> List[Dict[str, Any]]:
+        """Get entries carrying a tag."""
+        with self._lock:
+            return [self._entries[i] for i in self._by_tag.get(tag, ())]
+
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+
+def open_knowledge_base(file_path: str, backend: str = "auto", import_path: Optional[str] = None, **options):
+    """
+    Open a knowledge base with the configured storage engine.
+
+    A SQLite database that has never held an entry is first filled from the JSON knowledge base at
+    ``import_path`` (default: the ``.json`` file next to it), so switching
+    backends keeps every entry and its ID.
+
+    Args:
+        file_path: Path to the knowledge base file
+        backend: "json", "sqlite" or "auto" (sqlite for .db/.sqlite paths)
+        import_path: JSON knowledge base imported into a new SQLite database
+        **options: Extra arguments for the JSON ``KnowledgeBase``
+
+    Returns:
+        KnowledgeBase or SQLiteKnowledgeBase instance
+    """
+    if backend == "auto":
+        backend = "sqlite" if Path(file_path).suffix.lower() in SQLITE_SUFFIXES else "json"
+
+    if backend == "sqlite":
+        from sqlite_knowledge_base import SQLiteKnowledgeBase
+
+        path = Path(file_path)
+        if path.exists() and path.stat().st_size:
+            with open(path, "rb") as f:
+                if f.read(16) != b"SQLite format 3\x00":
+                    raise ValueError(f"{file_path} is not a SQLite database; point KNOWLEDGE_BASE_PATH at a .db file")
+
+        logger.info(f"Using SQLite knowledge base at {file_path}")
+        knowledge_base = SQLiteKnowledgeBase(file_path)
+        source = Path(import_path) if import_path else path.with_suffix(".json")
+        if knowledge_base.is_pristine() and (source.exists() or source.with_name(source.name + ".log").exists()):
+            logger.info(f"Importing JSON knowledge base from {source}...")
+            legacy = KnowledgeBase(str(source), **options)
+            try:
+                knowledge_base.import_entries(legacy.get_all_entries(), next_id=legacy._next_id)
+            finally:
+                legacy.close()
+        return knowledge_base
+    if backend == "json":
+        return KnowledgeBase(file_path, **options)
+    raise ValueError(f"Unknown knowledge base backend: {backend}")
@@ -0,0 +1,205 @@
+"""Knowledge Indexer - Embeds knowledge entries and keeps the vector index in sync."""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from chunker import TextChunker, chunk_metadata, chunk_vector_id, content_hash, parse_chunk_vector_id
+
+logger = logging.getLogger(__name__)
+
+# Entries re-embedded per embed/upsert round during reconciliation
+RECONCILE_BATCH_SIZE = 256
+
+
+class KnowledgeIndexer:
+    """
+    Writes knowledge entries to the vector store and repairs drift.
+
+    Every chunk vector carries a ``content_hash`` of its entry (title,
+    content, category and chunk layout). ``reconcile`` lists the vector
+    namespace, compares it with the knowledge base, re-embeds only entries
+    that are missing, incomplete or changed, and deletes vectors whose
+    entry or chunk no longer exists.
+    """
+
+    def __init__(
+        self,
+        knowledge_base,
+        vector_db_manager,
+        embedding_manager,
+        chunker: Optional[TextChunker] = None,
+        upsert_batch_size: int = 100,
+        upsert_workers: int = 4,
+        namespace: str = "knowledge",
+        token_counter: Optional[Callable[[str], int]] = None,
+    ):
+        """
+        Initialize Knowledge Indexer.
+
+        Args:
+            knowledge_base: Knowledge base to index
+            vector_db_manager: Vector store manager
+            embedding_manager: Embedding manager
+            chunker: Chunker for long content (None embeds whole entries)
+            upsert_batch_size: Maximum vectors per upsert request
+            upsert_workers: Parallel upsert requests
+            namespace: Vector namespace holding knowledge
+            token_counter: LLM token counter; counts are stored with each chunk for prompt packing
+        """
+        self.knowledge_base = knowledge_base
+        self.vector_db_manager = vector_db_manager
+        self.embedding_manager = embedding_manager
+        self.chunker = chunker
+        self.upsert_batch_size = upsert_batch_size
+        self.upsert_workers = upsert_workers
+        self.namespace = namespace
+        self.token_counter = token_counter
+        self._sync_lock = threading.Lock()
+        self.last_sync: Dict[str, Any] = {}
+
+    def entry_chunks(self, entry: Dict[str, Any]) -> List[str]:
+        """Content chunks embedded for an entry."""
+        return self.chunker.split(entry["content"]) if self.chunker else [entry["content"]]
+
+    def embedding_available(self) -> bool:
+        """Whether real embeddings can be produced."""
+        return self.embedding_manager is not None and self.embedding_manager.model is not None
+
+    def index_entries(self, entries: List[Dict[str, Any]], chunked: Optional[List[List[str]]] = None) -> Set[int]:
+        """
+        Chunk, embed and upsert knowledge entries.
+
+        All chunks are embedded in one ``embed_texts`` call and upserted in
+        size-limited parallel requests.
+
+        Args:
+            entries: Knowledge entries
+            chunked: Precomputed chunks for each entry
+
+        Returns:
+            IDs of entries whose vectors could not be stored
+        """
+        if not entries:
+            return set()
+        if not self.embedding_available() or not self.vector_db_manager:
+            return {entry["id"] for entry in entries}
+
+        if chunked is None:
+            chunked = [self.entry_chunks(entry) for entry in entries]
+        texts = [text for chunks in chunked for text in chunks]
+        try:
+            # Never store placeholder vectors: they would carry a valid content hash
+            embeddings = iter(self.embedding_manager.embed_texts(texts, strict=True))
+        except Exception as e:
+            logger.error(f"Error embedding entries for indexing: {e}")
+            return {entry["id"] for entry in entries}
+
+        vectors = []
+        for entry, chunks in zip(entries, chunked):
+            entry_hash = content_hash(entry, self.chunker)
+            for i, text in enumerate(chunks):
+                tokens = self.token_counter(text) if self.token_counter else None
+                metadata = chunk_metadata(entry, text, i, len(chunks), entry_hash, tokens)
+                vectors.append((chunk_vector_id(entry["id"], i), next(embeddings), metadata))
+
+        failed = self.vector_db_manager.upsert_vectors_chunked(
+            vectors, namespace=self.namespace, chunk_size=self.upsert_batch_size, workers=self.upsert_workers
+        )
+        return {parse_chunk_vector_id(vector_id)[0] for vector_id in failed}
+
+    def reconcile(self) -> Dict[str, Any]:
+        """
+        Diff the knowledge base against the vector store and repair it.
+
+        Vectors are listed before entries are read, so entries added while
+        the sync runs are at worst re-embedded, never treated as orphans.
+
+        Returns:
+            Summary of the run
+        """
+        if not self._sync_lock.acquire(blocking=False):
+            return {"status": "running"}
+        try:
+            return self._reconcile()
+        finally:
+            self._sync_lock.release()
+
+    def _reconcile(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        if not self.embedding_available():
+            self.last_sync = {"status": "error", "detail": "Embedding model unavailable", "finished_at": datetime.now().isoformat()}
+            logger.warning("Index sync skipped: embedding model unavailable")
+            return self.last_sync
+        vectors = self.vector_db_manager.list_vectors(self.namespace, prefix="knowledge_") if self.vector_db_manager else None
+        if vectors is None:
+            self.last_sync = {"status": "error", "detail": "Vector store listing unavailable", "finished_at": datetime.now().isoformat()}
+            logger.warning("Index sync skipped: vector store listing unavailable")
+            return self.last_sync
+
+        entries = {entry["id"]: entry for entry in self.knowledge_base.get_all_entries()}
+
+        present: Dict[int, Dict[int, Dict[str, Any]]] = {}
+        orphans: List[str] = []
+        for vector_id, metadata in vectors.items():
+            parsed = parse_chunk_vector_id(vector_id)
+            if parsed is None:
+                continue
+            entry_id, chunk = parsed
+            if entry_id in entries:
+                present.setdefault(entry_id, {})[chunk] = metadata
+            else:
+                orphans.append(vector_id)
+
+        stale = []
+        for entry_id, entry in entries.items():
+            chunks = present.get(entry_id, {})
+            first = chunks.get(0)
+            expected = first.get("chunks", 1) if first else 0
+            if (
+                first is None
+                or first.get("content_hash") != content_hash(entry, self.chunker)
+                or any(i not in chunks for i in range(expected))
+            ):
+                stale.append(entry)
+            else:
+                orphans.extend(chunk_vector_id(entry_id, i) for i in chunks if i >= expected)
+
+        failed: Set[int] = set()
+        for start in range(0, len(stale), RECONCILE_BATCH_SIZE):
+            batch = stale[start:start + RECONCILE_BATCH_SIZE]
+            chunked = [self.entry_chunks(entry) for entry in batch]
+            batch_failed = self.index_entries(batch, chunked)
+            failed |= batch_failed
+            for entry, chunks in zip(batch, chunked):
+                if entry["id"] in batch_failed:
+                    continue  # its previous vectors stay until it is re-embedded
+                orphans.extend(
+                    chunk_vector_id(entry["id"], i) for i in present.get(entry["id"], {}) if i >= len(chunks)
+                )
+
+        if orphans and not entries:
+            # An empty knowledge base beside a populated index is almost always the wrong file, not a mass delete
+            logger.warning(f"Knowledge base is empty; keeping {len(orphans)} vectors that look orphaned")
+            orphans = []
+        if orphans:
+            for start in range(0, len(orphans), 1000):
+                self.vector_db_manager.delete_vectors(orphans[start:start + 1000], namespace=self.namespace)
+
+        self.last_sync = {
+            "status": "ok",
+            "entries": len(entries),
+            "vectors": len(vectors),
+            "reindexed": len(stale) - len(failed),
+            "failed": len(failed),
+            "orphans_deleted": len(orphans),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "finished_at": datetime.now().isoformat(),
+        }
+        logger.info(
+            f"Index sync: {len(entries)} entries, {self.last_sync['reindexed']} re-embedded, "
+            f"{len(orphans)} orphaned vectors deleted, {len(failed)} failed"
+        )
+        return self.last_sync
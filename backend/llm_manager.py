@@ -1,16 +1,33 @@
 """LLM Manager - Handles local LLaMA model loading and inference."""
 
 import os
-from typing import Optional
+import time
+from typing import Optional, Iterator, List, Dict, Any, Tuple
 import logging
 
+from speculative import create_draft_model
+
 logger = logging.getLogger(__name__)
 
 
 class LLMManager:
     """Manages LLaMA model loading and inference."""
 
-    def __init__(self, model_path: str, context_window: int = 2048, max_tokens: int = 512, temperature: float = 0.7):
+    def __init__(
+        self,
+        model_path: str,
+        context_window: int = 2048,
+        max_tokens: int = 512,
+        temperature: float = 0.7,
+        prompt_cache: str = "none",
+        prompt_cache_bytes: int = 1 << 30,
+        prompt_cache_dir: str = "./data/prompt_cache",
+        speculative: str = "none",
+        speculative_tokens: int = 10,
+        prompt_lookup_ngram: int = 2,
+        draft_model_path: str = "",
+        use_mmap: bool = True,
+    ):
         """
         Initialize LLM Manager.
 
@@ -19,12 +36,41 @@ class LLMManager:
             context_window: Context window size
             max_tokens: Maximum tokens to generate
             temperature: Sampling temperature
+            prompt_cache: llama.cpp KV state cache: "none", "ram" or "disk"
+            prompt_cache_bytes: Capacity of the KV state cache
+            prompt_cache_dir: Directory for the disk cache
+            speculative: Speculative decoding: "none", "prompt_lookup" or "draft_model"
+            speculative_tokens: Tokens drafted per speculative round
+            prompt_lookup_ngram: Longest prompt n-gram matched when drafting by prompt lookup
+            draft_model_path: Small GGUF model for the "draft_model" mode
+            use_mmap: Map the GGUF file instead of reading it into memory up front
         """
         self.model_path = model_path
         self.context_window = context_window
         self.max_tokens = max_tokens
         self.temperature = temperature
+        self.prompt_cache = prompt_cache
+        self.prompt_cache_bytes = prompt_cache_bytes
+        self.prompt_cache_dir = prompt_cache_dir
+        self.speculative = speculative
+        self.speculative_tokens = speculative_tokens
+        self.prompt_lookup_ngram = prompt_lookup_ngram
+        self.draft_model_path = draft_model_path
+        self.use_mmap = use_mmap
         self.model = None
+        self.draft_model = None
+
+        # Evaluated KV state of the fixed prompt prefix
+        self._prefix_tokens: List[int] = []
+        self._prefix_state = None
+        self.prefix_hits = 0  # prefix already in the live context
+        self.prefix_restores = 0  # prefix state loaded from the snapshot
+        self.prefix_misses = 0  # prompt does not start with the prefix
+        self.prefill_tokens_saved = 0
+        self.session_restores = 0  # conversation KV state loaded before a turn
+        self.generated_tokens = 0
+        self.generation_seconds = 0.0
+
         self._initialize_model()
 
     def _initialize_model(self):
@@ -49,20 +95,195 @@ class LLMManager:
                 self.model = None
                 return
 
+            self.draft_model = create_draft_model(
+                self.speculative,
+                num_pred_tokens=self.speculative_tokens,
+                max_ngram_size=self.prompt_lookup_ngram,
+                draft_model_path=self.draft_model_path,
+                context_window=self.context_window,
+            )
+            options = {"draft_model": self.draft_model} if self.draft_model is not None else {}
+
             logger.info(f"Loading LLaMA model from {self.model_path}...")
+            started = time.perf_counter()
             self.model = Llama(
                 model_path=self.model_path,
                 n_ctx=self.context_window,
                 n_threads=os.cpu_count() or 4,
                 f16_kv=True,
+                use_mmap=self.use_mmap,
                 verbose=False,
+                **options,
             )
-            logger.info("Model loaded successfully!")
+            logger.info(f"Model loaded successfully in {time.perf_counter() - started:.2f}s!")
+            self._initialize_prompt_cache()
 
         except Exception as e:
             logger.error(f"Failed to initialize model: {e}")
             self.model = None
 
+    def _initialize_prompt_cache(self):
+        """Attach llama.cpp's RAM or disk KV state cache."""
+        if self.prompt_cache == "none":
+            return
+        try:
+            from llama_cpp import LlamaRAMCache, LlamaDiskCache  # type: ignore[import]
+
+            if self.prompt_cache == "disk":
+                cache = LlamaDiskCache(cache_dir=self.prompt_cache_dir, capacity_bytes=self.prompt_cache_bytes)
+            else:
+                cache = LlamaRAMCache(capacity_bytes=self.prompt_cache_bytes)
+            self.model.set_cache(cache)
+            logger.info(f"Enabled {self.prompt_cache} prompt cache ({self.prompt_cache_bytes} bytes)")
+        except Exception as e:
+            logger.error(f"Failed to enable prompt cache: {e}")
+
+    def _tokenize(self, text: str) -> List[int]:
+        return self.model.tokenize(text.encode("utf-8"))
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Count tokens with the model's tokenizer.
+
+        Args:
+            text: Text to measure
+
+        Returns:
+            Token count, excluding BOS (estimated at 4 characters per token without a model)
+        """
+        if self.model is None:
+            return (len(text) + 3) // 4
+        return len(self.model.tokenize(text.encode("utf-8"), add_bos=False))
+
+    def set_prompt_prefix(self, prefix: str) -> bool:
+        """
+        Evaluate a fixed prompt prefix once and snapshot its KV state.
+
+        Later prompts that start with the prefix only prefill the suffix.
+
+        Args:
+            prefix: Text every prompt starts with (e.g. the system prompt)
+
+        Returns:
+            Success status
+        """
+        if self.model is None:
+            return False
+
+        try:
+            tokens = self._tokenize(prefix)
+            self.model.reset()
+            self.model.eval(tokens)
+            self._prefix_state = self.model.save_state()
+            self._prefix_tokens = tokens
+            logger.info(f"Cached KV state for {len(tokens)}-token prompt prefix")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to cache prompt prefix: {e}")
+            self._prefix_state = None
+            self._prefix_tokens = []
+            return False
+
+    def warm_up(self) -> float:
+        """
+        Generate one token so the first request does not pay for cold weights.
+
+        With mmap the weights are paged in on first use; this touches them
+        all. The prompt prefix is used when set, so its KV state stays live.
+
+        Returns:
+            Seconds taken (0.0 without a model)
+        """
+        if self.model is None:
+            return 0.0
+
+        try:
+            started = time.perf_counter()
+            prompt = self._prefix_tokens or self._tokenize("Hello")
+            self.model.create_completion(prompt, max_tokens=1, temperature=0.0)
+            seconds = time.perf_counter() - started
+            logger.info(f"LLM warm-up took {seconds:.2f}s")
+            return seconds
+
+        except Exception as e:
+            logger.error(f"Error warming up model: {e}")
+            return 0.0
+
+    def _prepare_prefix(self, full_prompt: str):
+        """Make sure the model's context already holds the prefix before a call."""
+        if self._prefix_state is None:
+            return
+
+        try:
+            n = len(self._prefix_tokens)
+            if self._tokenize(full_prompt)[:n] != self._prefix_tokens:
+                self.prefix_misses += 1
+                return
+
+            # llama_cpp reuses the longest matching prefix of its live context
+            if self.model.n_tokens >= n and list(self.model.input_ids[:n]) == self._prefix_tokens:
+                self.prefix_hits += 1
+            else:
+                self.model.load_state(self._prefix_state)
+                self.prefix_restores += 1
+            self.prefill_tokens_saved += n
+
+        except Exception as e:
+            logger.error(f"Error restoring prompt prefix: {e}")
+
+    def prompt_cache_stats(self) -> Dict[str, Any]:
+        """Prefix reuse counters."""
+        lookups = self.prefix_hits + self.prefix_restores + self.prefix_misses
+        cache = getattr(self.model, "cache", None)
+        return {
+            "prefix_tokens": len(self._prefix_tokens),
+            "prefix_hits": self.prefix_hits,
+            "prefix_restores": self.prefix_restores,
+            "prefix_misses": self.prefix_misses,
+            "hit_rate": round((self.prefix_hits + self.prefix_restores) / lookups, 4) if lookups else 0.0,
+            "prefill_tokens_saved": self.prefill_tokens_saved,
+            "session_restores": self.session_restores,
+            "kv_cache": self.prompt_cache,
+            "kv_cache_bytes": getattr(cache, "cache_size", None) if cache is not None else None,
+        }
+
+    def decoding_stats(self) -> Dict[str, Any]:
+        """Generation throughput and speculative decoding acceptance."""
+        stats = {
+            "speculative": self.speculative if self.draft_model is not None else "none",
+            "generated_tokens": self.generated_tokens,
+            "tokens_per_second": round(self.generated_tokens / self.generation_seconds, 2) if self.generation_seconds else 0.0,
+        }
+        if self.draft_model is not None:
+            stats.update(self.draft_model.stats())
+        return stats
+
+    def _start_generation(self) -> float:
+        if self.draft_model is not None:
+            self.draft_model.reset()
+        return time.perf_counter()
+
+    def _record_generation(self, started: float, tokens: int):
+        """Count generated tokens and time (prefill included) for throughput stats."""
+        self.generated_tokens += tokens
+        self.generation_seconds += time.perf_counter() - started
+
+    def _format_prompt(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        """Prepend the system message, if any."""
+        if system_prompt:
+            return f"System: {system_prompt}\n\nUser: {prompt}"
+        return prompt
+
+    def _completion_kwargs(self) -> dict:
+        """Sampling parameters shared by blocking and streaming generation."""
+        return {
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            "top_p": 0.9,
+            "stop": ["User:", "System:"],
+        }
+
     def generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
         """
         Generate response from the model.
@@ -81,23 +302,16 @@ class LLMManager:
             )
 
         try:
-            # Format the prompt with system message if provided
-            if system_prompt:
-                full_prompt = f"System: {system_prompt}\n\nUser: {prompt}"
-            else:
-                full_prompt = prompt
+            full_prompt = self._format_prompt(prompt, system_prompt)
+            self._prepare_prefix(full_prompt)
 
             # Generate response
-            response = self.model(
-                full_prompt,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                top_p=0.9,
-                stop=["User:", "System:"],
-            )
+            started = self._start_generation()
+            response = self.model(full_prompt, **self._completion_kwargs())
 
             # Handle both dict and streaming responses
             if isinstance(response, dict):
+                self._record_generation(started, response.get("usage", {}).get("completion_tokens", 0))
                 return response["choices"][0]["text"].strip()
             else:
                 # For streaming responses, collect all chunks
@@ -113,6 +327,119 @@ class LLMManager:
             logger.error(f"Error generating response: {e}")
             return "Sorry, I encountered an error while processing your request."
 
+    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> Iterator[str]:
+        """
+        Generate a response token by token.
+
+        Args:
+            prompt: User query
+            system_prompt: System prompt for context
+
+        Yields:
+            Text fragments as the model produces them
+        """
+        if self.model is None:
+            yield self.generate(prompt, system_prompt)
+            return
+
+        try:
+            full_prompt = self._format_prompt(prompt, system_prompt)
+            self._prepare_prefix(full_prompt)
+            started = False
+            timer, tokens = self._start_generation(), 0
+            for chunk in self.model(full_prompt, stream=True, **self._completion_kwargs()):
+                if "choices" in chunk and chunk["choices"]:
+                    tokens += 1
+                    delta = chunk["choices"][0].get("text", "")
+                    if not started:
+                        # Match generate(), which strips leading whitespace
+                        delta = delta.lstrip()
+                        started = bool(delta)
+                    if delta:
+                        yield delta
+            self._record_generation(timer, tokens)
+
+        except Exception as e:
+            logger.error(f"Error streaming response: {e}")
+            yield "Sorry, I encountered an error while processing your request."
+
+    def _restore_session(self, prompt: str, state: Any):
+        """Load a conversation's KV state, or fall back to the prompt prefix."""
+        if state is None:
+            self._prepare_prefix(prompt)
+            return
+        try:
+            # Generation then reuses every token of the state that the prompt repeats
+            self.model.load_state(state)
+            self.session_restores += 1
+        except Exception as e:
+            logger.error(f"Error restoring session state: {e}")
+            self._prepare_prefix(prompt)
+
+    def generate_turn(self, prompt: str, state: Any = None) -> Tuple[str, Any]:
+        """
+        Generate one conversation turn from the KV state of the previous one.
+
+        Args:
+            prompt: Full prompt, starting with the transcript ``state`` was saved after
+            state: ``LlamaState`` from the previous turn (None prefills the prompt)
+
+        Returns:
+            (unstripped completion, KV state after the turn or None)
+        """
+        if self.model is None:
+            return self.generate(prompt), None
+
+        try:
+            self._restore_session(prompt, state)
+            started = self._start_generation()
+            response = self.model(prompt, **self._completion_kwargs())
+            self._record_generation(started, response.get("usage", {}).get("completion_tokens", 0))
+            return response["choices"][0]["text"], self.model.save_state()
+
+        except Exception as e:
+            logger.error(f"Error generating response: {e}")
+            return "Sorry, I encountered an error while processing your request.", None
+
+    def generate_turn_stream(self, prompt: str, state: Any = None, result: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """
+        Stream one conversation turn from the KV state of the previous one.
+
+        Args:
+            prompt: Full prompt, starting with the transcript ``state`` was saved after
+            state: ``LlamaState`` from the previous turn (None prefills the prompt)
+            result: Receives ``text`` (unstripped completion) and ``state`` once generation finishes
+
+        Yields:
+            Text fragments as the model produces them
+        """
+        result = result if result is not None else {}
+        if self.model is None:
+            result["text"], result["state"] = self.generate(prompt), None
+            yield result["text"]
+            return
+
+        try:
+            self._restore_session(prompt, state)
+            parts = []
+            started = False
+            timer = self._start_generation()
+            for chunk in self.model(prompt, stream=True, **self._completion_kwargs()):
+                if "choices" in chunk and chunk["choices"]:
+                    delta = chunk["choices"][0].get("text", "")
+                    parts.append(delta)
+                    if not started:
+                        delta = delta.lstrip()
+                        started = bool(delta)
+                    if delta:
+                        yield delta
+            self._record_generation(timer, len(parts))
+            result["text"], result["state"] = "".join(parts), self.model.save_state()
+
+        except Exception as e:
+            logger.error(f"Error streaming response: {e}")
+            yield "Sorry, I encountered an error while processing your request."
+
     def is_available(self) -> bool:
         """Check if the model is available."""
         return self.model is not None
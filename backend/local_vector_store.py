@@ -0,0 +1,769 @@
+"""Local Vector Store - In-process NumPy vector index."""
+
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import Callable, List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from hnsw_index import HNSWIndex
+from metadata_filter import MetadataIndex
+from quantization import create_quantizer
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on vectors used to fit a quantizer
+TRAIN_SAMPLE_LIMIT = 8192
+
+# Filters matching less than this share of a namespace skip the HNSW graph
+# and scan the matching rows directly
+FILTERED_ANN_MIN_SELECTIVITY = 0.05
+
+
+def _fsync_dir(path: Path):
+    """Make a rename in ``path`` durable."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return  # Not supported on this platform
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _copy_prefix(source: Path, target, nbytes: int):
+    """Copy the first ``nbytes`` of ``source`` into the open file ``target``."""
+    with open(source, "rb") as f:
+        while nbytes > 0:
+            chunk = f.read(min(nbytes, 1 << 24))
+            if not chunk:
+                break
+            target.write(chunk)
+            nbytes -= len(chunk)
+
+
+def _write_atomic(path: Path, write: Callable):
+    """Write a file through ``write(f)`` into a temporary file, then rename it over ``path``."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class _Namespace:
+    """Vectors, ids and metadata for a single namespace."""
+
+    def __init__(
+        self,
+        dimension: int,
+        capacity: int = 1024,
+        ann: Optional[HNSWIndex] = None,
+        quantizer=None,
+        train_size: int = 1024,
+        storage_path: Optional[Path] = None,
+        filter_fields: Tuple[str, ...] = ("category", "tags"),
+    ):
+        self.dimension = dimension
+        self.storage_path = storage_path
+        self.matrix = self._allocate(capacity)
+        self.ids: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self.id_to_row: Dict[str, int] = {}
+        self.ann = ann
+        self.quantizer = quantizer
+        self.train_size = train_size
+        self.codes: Optional[np.ndarray] = None
+        self.filter_index = MetadataIndex(filter_fields)
+        # Graph writes made while a replacement graph is built off the lock, replayed into it on swap
+        self.ann_log: Optional[List[tuple]] = None
+        # Original contents of rows below ``save_rows`` overwritten while a save copies the working file
+        self.save_journal: Optional[Dict[int, np.ndarray]] = None
+        self.save_rows = 0
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    def _allocate(self, capacity: int) -> np.ndarray:
+        """Float32 row storage: in RAM, or a disk-backed memmap when ``storage_path`` is set."""
+        if self.storage_path is None:
+            return np.zeros((capacity, self.dimension), dtype=np.float32)
+        nbytes = capacity * self.dimension * 4
+        self.storage_path.touch(exist_ok=True)
+        if self.storage_path.stat().st_size < nbytes:
+            with open(self.storage_path, "r+b") as f:
+                f.truncate(nbytes)
+        return np.memmap(self.storage_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+
+    def _ensure_capacity(self, needed: int):
+        """Grow the matrix geometrically so appends stay amortised O(1)."""
+        capacity = self.matrix.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        if self.storage_path is not None:
+            self.matrix.flush()
+            self.matrix = self._allocate(new_capacity)
+        else:
+            grown = np.zeros((new_capacity, self.dimension), dtype=np.float32)
+            grown[: self.size] = self.matrix[: self.size]
+            self.matrix = grown
+        if self.codes is not None:
+            codes = np.zeros((new_capacity, self.codes.shape[1]), dtype=np.uint8)
+            codes[: self.size] = self.codes[: self.size]
+            self.codes = codes
+
+    def upsert(self, ids: List[str], vectors: np.ndarray, metadata: List[Dict[str, Any]]):
+        """Insert new rows or overwrite existing ones in place."""
+        self._ensure_capacity(self.size + len(ids))
+        rows = []
+        for vector_id, vector, meta in zip(ids, vectors, metadata):
+            row = self.id_to_row.get(vector_id)
+            if row is None:
+                row = self.size
+                self.ids.append(vector_id)
+                self.metadata.append(meta)
+                self.id_to_row[vector_id] = row
+            else:
+                self.filter_index.remove(row, self.metadata[row])
+                self.metadata[row] = meta
+            self.filter_index.add(row, meta)
+            self._before_write(row)
+            self.matrix[row] = vector
+            rows.append(row)
+            if self.ann is not None:
+                self.ann.add(vector_id, vector)
+                if self.ann_log is not None:
+                    self.ann_log.append((vector_id, np.array(vector)))
+        self._update_codes(rows)
+
+    def _before_write(self, row: int):
+        """Keep the saved contents of ``row`` while a save is copying the working file."""
+        if self.save_journal is not None and row < self.save_rows and row not in self.save_journal:
+            self.save_journal[row] = np.array(self.matrix[row])
+
+    def _update_codes(self, rows: List[int]):
+        """Encode new rows, training the quantizer once enough vectors exist."""
+        if self.quantizer is None:
+            return
+        if not self.quantizer.is_trained:
+            if self.size < self.train_size:
+                return
+            sample = np.asarray(self.vectors()[:TRAIN_SAMPLE_LIMIT])
+            self.quantizer.fit(sample)
+            self.codes = np.zeros((self.matrix.shape[0], self.quantizer.code_size), dtype=np.uint8)
+            rows = list(range(self.size))
+            logger.info(f"Trained {type(self.quantizer).__name__} on {len(sample)} vectors")
+        if rows:
+            self.codes[rows] = self.quantizer.encode(np.asarray(self.matrix[rows]))
+
+    def restore(self, ids: List[str], metadata: List[Dict[str, Any]], ann: Optional[HNSWIndex] = None):
+        """Adopt rows already present in ``matrix`` (loaded from disk), and their saved HNSW graph if given."""
+        self.ids = list(ids)
+        self.metadata = list(metadata)
+        self.id_to_row = {vector_id: row for row, vector_id in enumerate(self.ids)}
+        for row, meta in enumerate(self.metadata):
+            self.filter_index.add(row, meta)
+        if ann is not None:
+            self.ann = ann
+        elif self.ann is not None:
+            for row, vector_id in enumerate(self.ids):
+                self.ann.add(vector_id, np.asarray(self.matrix[row]))
+        self._update_codes(list(range(self.size)))
+
+    def delete(self, ids: List[str]) -> int:
+        """Remove rows by swapping the last row into the hole."""
+        deleted = 0
+        for vector_id in ids:
+            row = self.id_to_row.pop(vector_id, None)
+            if row is None:
+                continue
+            if self.ann is not None:
+                self.ann.remove(vector_id)
+                if self.ann_log is not None:
+                    self.ann_log.append((vector_id, None))
+            self.filter_index.remove(row, self.metadata[row])
+            last = self.size - 1
+            if row != last:
+                moved_id = self.ids[last]
+                self.filter_index.remove(last, self.metadata[last])
+                self.filter_index.add(row, self.metadata[last])
+                self._before_write(row)
+                self.matrix[row] = self.matrix[last]
+                if self.codes is not None:
+                    self.codes[row] = self.codes[last]
+                self.ids[row] = moved_id
+                self.metadata[row] = self.metadata[last]
+                self.id_to_row[moved_id] = row
+            self.ids.pop()
+            self.metadata.pop()
+            deleted += 1
+        return deleted
+
+    def vectors(self) -> np.ndarray:
+        """View of the populated rows."""
+        return self.matrix[: self.size]
+
+    def select(self, filter: Dict[str, Any]) -> Optional[np.ndarray]:
+        """Sorted rows matching a metadata filter, or None when every row matches."""
+        rows = self.filter_index.select(filter, self.metadata)
+        if len(rows) == self.size:
+            return None
+        return np.fromiter(sorted(rows), dtype=np.int64, count=len(rows))
+
+    def search(
+        self,
+        queries: np.ndarray,
+        top_k: int,
+        rerank_factor: int,
+        exact: bool = False,
+        rows: Optional[np.ndarray] = None,
+    ) -> List[List[tuple]]:
+        """
+        Exact or quantized flat search.
+
+        With trained codes, the first pass scores every code and the best
+        ``top_k * rerank_factor`` candidates are re-scored at full precision.
+
+        Args:
+            queries: Normalised query matrix
+            top_k: Results per query
+            rerank_factor: Shortlist size for quantized search, as a multiple of top_k
+            exact: Ignore quantized codes
+            rows: Restrict the scan to these rows (pre-filtering)
+
+        Returns:
+            One list of (row, score) pairs per query, best first
+        """
+        size = self.size if rows is None else len(rows)
+        if size == 0:
+            return [[] for _ in range(len(queries))]
+
+        quantized = self.codes is not None and not exact
+        if quantized:
+            codes = self.codes[: self.size] if rows is None else self.codes[rows]
+            scores = self.quantizer.score(codes, queries)
+            shortlist = min(max(top_k * rerank_factor, top_k), size)
+        else:
+            matrix = self.vectors() if rows is None else self.matrix[rows]
+            scores = queries @ matrix.T
+            shortlist = min(top_k, size)
+
+        if shortlist < size:
+            top = np.argpartition(-scores, shortlist - 1, axis=1)[:, :shortlist]
+        else:
+            top = np.tile(np.arange(size), (len(queries), 1))
+
+        results = []
+        for q, candidates in enumerate(top):
+            if quantized:
+                candidates = np.sort(candidates)
+                candidate_rows = candidates if rows is None else rows[candidates]
+                candidate_scores = np.asarray(self.matrix[candidate_rows]) @ queries[q]
+            else:
+                candidate_rows = candidates if rows is None else rows[candidates]
+                candidate_scores = scores[q, candidates]
+            order = np.argsort(-candidate_scores)[:top_k]
+            results.append([(int(candidate_rows[i]), float(candidate_scores[i])) for i in order])
+        return results
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalise rows so that a dot product equals cosine similarity."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class LocalVectorStore:
+    """
+    Cosine-similarity vector store kept in process memory.
+
+    Mirrors the subset of the Pinecone ``Index`` API used by
+    ``VectorDBManager`` (``upsert``, ``query``, ``delete``) so the two
+    backends are interchangeable. With ``index_type="hnsw"`` queries go
+    through an approximate HNSW graph; the flat matrix is kept as the exact
+    path used for recall measurement.
+
+    With ``quantization`` set to "int8" or "pq", flat scans run over compact
+    codes and only a shortlist is re-scored at full precision. When
+    persistence is enabled the full-precision rows, and the HNSW graph's
+    node vectors, then live in disk-backed working memmaps
+    (``<name>.mmap``, ``<name>.hnsw.mmap``), so resident memory is
+    dominated by the codes and the graph. Without persistence the
+    full-precision rows stay in RAM next to the codes.
+
+    Each save writes a new generation of a namespace's vector file and then
+    atomically replaces its ``<name>.json``, which names that file; a crash
+    mid-save leaves the previous generation intact. Modified namespaces are
+    saved every ``save_interval`` seconds by a background thread and on
+    ``close``. HNSW graphs are saved alongside, so loading does not
+    re-insert every vector.
+
+    Deletes and overwrites leave tombstones in the HNSW graph. Once they
+    exceed ``hnsw_rebuild_threshold`` a replacement graph is built from the
+    live vectors on a background thread while searches keep using the old
+    one; writes made in the meantime are replayed into it before the swap.
+    """
+
+    def __init__(
+        self,
+        dimension: int = 384,
+        persist_path: Optional[str] = None,
+        index_type: str = "flat",
+        hnsw_m: int = 16,
+        hnsw_ef_construction: int = 200,
+        hnsw_ef_search: int = 64,
+        hnsw_rebuild_threshold: float = 0.3,
+        quantization: str = "none",
+        pq_subspaces: int = 96,
+        rerank_factor: int = 4,
+        quantization_train_size: int = 1024,
+        filter_fields: Tuple[str, ...] = ("category", "tags"),
+        save_interval: float = 60,
+    ):
+        """
+        Initialize Local Vector Store.
+
+        Args:
+            dimension: Embedding dimension
+            persist_path: Directory to load from and save to (None disables persistence)
+            index_type: "flat" for exact search or "hnsw" for approximate search
+            hnsw_m: HNSW max neighbours per node
+            hnsw_ef_construction: HNSW candidate list size while inserting
+            hnsw_ef_search: HNSW candidate list size while querying
+            hnsw_rebuild_threshold: Tombstone ratio that triggers an HNSW rebuild
+            quantization: "none", "int8" (4x smaller) or "pq" (dimension / pq_subspaces * 4x smaller)
+            pq_subspaces: One-byte sub-codes per vector for product quantization
+            rerank_factor: Candidates re-scored at full precision, as a multiple of top_k
+            quantization_train_size: Vectors collected before the quantizer is trained
+            filter_fields: Metadata fields indexed for filtered queries
+            save_interval: Seconds between background saves of modified namespaces (0 saves only on close)
+        """
+        self.dimension = dimension
+        self.persist_path = Path(persist_path) if persist_path else None
+        self.index_type = index_type
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.hnsw_ef_search = hnsw_ef_search
+        self.hnsw_rebuild_threshold = hnsw_rebuild_threshold
+        self.quantization = quantization
+        self.pq_subspaces = pq_subspaces
+        self.rerank_factor = rerank_factor
+        self.quantization_train_size = quantization_train_size
+        self.filter_fields = tuple(filter_fields)
+        self.save_interval = save_interval
+        self._dirty: set = set()
+        self._generations: Dict[str, int] = {}
+        self._files: Dict[str, set] = {}  # files the saved <name>.json refers to
+        self.namespaces: Dict[str, _Namespace] = {}
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._rebuilds: Dict[str, threading.Thread] = {}
+        if quantization != "none" and self.persist_path is None:
+            logger.warning(
+                "Vector quantization without a persist path keeps every full-precision vector in memory "
+                "next to the codes; set VECTOR_STORE_PATH to move them to a disk-backed memmap"
+            )
+        self._load()
+
+        self._saver = None
+        if self.persist_path is not None and save_interval > 0:
+            self._saver = threading.Thread(target=self._save_loop, name="vector-store-saver", daemon=True)
+            self._saver.start()
+
+    def _get_namespace(self, namespace: str, create: bool = False) -> Optional[_Namespace]:
+        ns = self.namespaces.get(namespace)
+        if ns is None and create:
+            ns = self._new_namespace(namespace)
+            self.namespaces[namespace] = ns
+        return ns
+
+    def _storage_path(self, name: str, suffix: str = "mmap") -> Optional[Path]:
+        """Working memmap file of a namespace, or None when its vectors stay in RAM."""
+        if self.persist_path is None or self.quantization == "none":
+            return None
+        self.persist_path.mkdir(parents=True, exist_ok=True)
+        return self.persist_path / f"{name}.{suffix}"
+
+    def _new_namespace(self, name: str, capacity: int = 1024) -> _Namespace:
+        return _Namespace(
+            self.dimension,
+            capacity=capacity,
+            ann=self._new_ann(name),
+            quantizer=create_quantizer(self.quantization, self.dimension, self.pq_subspaces),
+            train_size=self.quantization_train_size,
+            storage_path=self._storage_path(name),
+            filter_fields=self.filter_fields,
+        )
+
+    def _new_ann(self, name: str) -> Optional[HNSWIndex]:
+        if self.index_type != "hnsw":
+            return None
+        return HNSWIndex(
+            self.dimension,
+            m=self.hnsw_m,
+            ef_construction=self.hnsw_ef_construction,
+            ef_search=self.hnsw_ef_search,
+            storage_path=self._storage_path(name, "hnsw.mmap"),
+        )
+
+    def upsert(self, vectors: List[tuple], namespace: str = "knowledge"):
+        """
+        Insert or overwrite vectors.
+
+        Args:
+            vectors: List of (id, embedding, metadata) tuples
+            namespace: Namespace for vectors
+        """
+        if not vectors:
+            return
+        ids = [str(v[0]) for v in vectors]
+        matrix = normalize(np.asarray([v[1] for v in vectors], dtype=np.float32))
+        if matrix.shape[1] != self.dimension:
+            raise ValueError(f"Expected dimension {self.dimension}, got {matrix.shape[1]}")
+        metadata = [dict(v[2]) if len(v) > 2 and v[2] else {} for v in vectors]
+
+        with self._lock:
+            ns = self._get_namespace(namespace, create=True)
+            self._dirty.add(namespace)
+            ns.upsert(ids, matrix, metadata)
+            self._maybe_rebuild(namespace, ns)
+
+    def query_batch(
+        self,
+        query_embeddings: List[List[float]],
+        top_k: int = 5,
+        namespace: str = "knowledge",
+        exact: bool = False,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search a batch of queries.
+
+        Flat search scores the whole batch with a single matrix multiply.
+        A metadata filter is applied before scoring: matching rows come from
+        the metadata postings and only those rows are scanned, or, when the
+        filter is broad, the HNSW search is restricted to matching ids.
+
+        Args:
+            query_embeddings: Query embedding vectors
+            top_k: Number of top results per query
+            namespace: Namespace to search in
+            exact: Bypass the HNSW graph and quantized codes and scan every full-precision vector
+            filter: Pinecone-style metadata filter
+
+        Returns:
+            One list of matches per query, best first
+        """
+        queries = normalize(np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32)))
+
+        with self._lock:
+            ns = self._get_namespace(namespace)
+            if ns is None or ns.size == 0 or top_k <= 0:
+                return [[] for _ in range(len(queries))]
+
+            rows = ns.select(filter) if filter else None
+            if rows is not None and len(rows) == 0:
+                return [[] for _ in range(len(queries))]
+
+            use_ann = ns.ann is not None and not exact
+            if use_ann and (rows is None or len(rows) >= FILTERED_ANN_MIN_SELECTIVITY * ns.size):
+                allowed = None if rows is None else {ns.ids[row] for row in rows}
+                results = []
+                for query in queries:
+                    hits = ns.ann.search(query, top_k=top_k, allowed=allowed)
+                    if allowed is not None and len(hits) < min(top_k, len(allowed)):
+                        # The graph walk found too few matches; scan the filtered rows instead
+                        hits = [(ns.ids[row], score) for row, score in ns.search(query[None], top_k, self.rerank_factor, rows=rows)[0]]
+                    results.append(
+                        [{"id": label, "score": score, "metadata": ns.metadata[ns.id_to_row[label]]} for label, score in hits]
+                    )
+                return results
+
+            hits = ns.search(queries, top_k, self.rerank_factor, exact=exact, rows=rows)
+            return [
+                [{"id": ns.ids[row], "score": score, "metadata": ns.metadata[row]} for row, score in query_hits]
+                for query_hits in hits
+            ]
+
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = 5,
+        namespace: str = "knowledge",
+        include_metadata: bool = True,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Pinecone-compatible single-vector query."""
+        matches = self.query_batch([vector], top_k=top_k, namespace=namespace, filter=filter)[0]
+        if not include_metadata:
+            matches = [{"id": m["id"], "score": m["score"]} for m in matches]
+        return {"matches": matches, "namespace": namespace}
+
+    def delete(self, ids: List[str], namespace: str = "knowledge"):
+        """Delete vectors by id."""
+        with self._lock:
+            ns = self._get_namespace(namespace)
+            if ns is not None:
+                self._dirty.add(namespace)
+                ns.delete([str(i) for i in ids])
+                self._maybe_rebuild(namespace, ns)
+
+    def _maybe_rebuild(self, name: str, ns: _Namespace):
+        """Start a background HNSW rebuild once tombstones pass the threshold (caller holds the lock)."""
+        if ns.ann is None or ns.ann_log is not None or ns.ann.tombstone_ratio <= self.hnsw_rebuild_threshold:
+            return
+        ns.ann_log = []
+        thread = threading.Thread(
+            target=self._rebuild_graph, args=(name, ns, ns.ann.live_items()), name=f"hnsw-rebuild-{name}", daemon=True
+        )
+        self._rebuilds[name] = thread
+        thread.start()
+
+    def _rebuild_graph(self, name: str, ns: _Namespace, live: List[Tuple[str, np.ndarray]]):
+        """Build a tombstone-free graph from ``live`` without the lock, then swap it in."""
+        old = ns.ann
+        storage_path = None
+        if old.storage_path is not None:
+            storage_path = old.storage_path.with_name(old.storage_path.name + ".rebuild")
+            storage_path.unlink(missing_ok=True)
+        logger.info(f"Rebuilding HNSW graph of namespace {name}: {len(live)} live / {len(old.labels)} total nodes")
+        try:
+            ann = HNSWIndex(
+                self.dimension,
+                m=old.m,
+                ef_construction=old.ef_construction,
+                ef_search=old.ef_search,
+                seed=old.seed,
+                storage_path=storage_path,
+            )
+            for label, vector in live:
+                ann.add(label, vector)
+        except Exception as e:
+            logger.error(f"Error rebuilding HNSW graph of namespace {name}: {e}")
+            with self._lock:
+                ns.ann_log = None
+            return
+
+        with self._lock:
+            for label, vector in ns.ann_log:
+                if vector is None:
+                    ann.remove(label)
+                else:
+                    ann.add(label, vector)
+            ns.ann_log = None
+            if self.namespaces.get(name) is not ns or ns.ann is not old:
+                if storage_path is not None:
+                    storage_path.unlink(missing_ok=True)
+                return  # the namespace was reloaded or replaced meanwhile
+            if storage_path is not None:
+                # Take over the working file name; both mappings stay valid across the rename
+                ann.vectors.flush()
+                os.replace(storage_path, old.storage_path)
+                ann.storage_path = old.storage_path
+            ns.ann = ann
+            self._dirty.add(name)
+        logger.info(f"Rebuilt HNSW graph of namespace {name}")
+
+    def wait_for_rebuilds(self, timeout: Optional[float] = None):
+        """Block until background HNSW rebuilds started so far have finished."""
+        for thread in list(self._rebuilds.values()):
+            thread.join(timeout)
+
+    def measure_recall(
+        self, query_embeddings: List[List[float]], top_k: int = 10, namespace: str = "knowledge"
+    ) -> float:
+        """
+        Recall@k of the approximate index against exact search.
+
+        Args:
+            query_embeddings: Sample query vectors
+            top_k: Cut-off k
+            namespace: Namespace to evaluate
+
+        Returns:
+            Fraction of exact top-k ids also returned by the approximate search
+        """
+        approx = self.query_batch(query_embeddings, top_k=top_k, namespace=namespace)
+        exact = self.query_batch(query_embeddings, top_k=top_k, namespace=namespace, exact=True)
+        hits = total = 0
+        for a, e in zip(approx, exact):
+            expected = {m["id"] for m in e}
+            hits += len(expected & {m["id"] for m in a})
+            total += len(expected)
+        return hits / total if total else 1.0
+
+    def list_metadata(self, namespace: str = "knowledge") -> Dict[str, Dict[str, Any]]:
+        """Metadata of every vector in a namespace, keyed by id."""
+        with self._lock:
+            ns = self.namespaces.get(namespace)
+            return dict(zip(ns.ids, ns.metadata)) if ns else {}
+
+    def count(self, namespace: str = "knowledge") -> int:
+        """Number of vectors stored in a namespace."""
+        ns = self.namespaces.get(namespace)
+        return ns.size if ns else 0
+
+    def _save_loop(self):
+        """Save modified namespaces every ``save_interval`` seconds until closed."""
+        while not self._closed.wait(self.save_interval):
+            if self._dirty:
+                self.save()
+
+    def save(self) -> bool:
+        """
+        Persist modified namespaces to ``persist_path``.
+
+        In-memory namespaces are copied under the lock and written outside
+        it, so queries only wait for the copy. Memmap-backed namespaces are
+        copied from their working files outside the lock: only the row count
+        is taken under it, and rows overwritten during the copy are journaled
+        and patched back. HNSW node vectors are append-only, so the graph is
+        written outside the lock too. Quantized codes are not saved; they are
+        re-encoded on load.
+        """
+        if self.persist_path is None:
+            return False
+
+        with self._save_lock:
+            with self._lock:
+                names = [name for name in self._dirty if name in self.namespaces]
+                self._dirty.clear()
+            try:
+                self.persist_path.mkdir(parents=True, exist_ok=True)
+                for name in names:
+                    self._save_namespace(name)
+                _fsync_dir(self.persist_path)
+                logger.info(f"Saved local vector store to {self.persist_path}")
+                return True
+
+            except Exception as e:
+                logger.error(f"Error saving local vector store: {e}")
+                with self._lock:
+                    self._dirty.update(names)  # retried by the next save
+                return False
+
+    def _save_namespace(self, name: str):
+        """Write one namespace: its vectors and graph first, then the ``<name>.json`` that points at them."""
+        generation = self._generations.get(name, 0) + 1
+        vector_file = f"{name}.{generation}.f32"
+        graph_file = f"{name}.{generation}.hnsw.npz"
+        with self._lock:
+            ns = self.namespaces[name]
+            ids, metadata = list(ns.ids), list(ns.metadata)
+            graph = ns.ann.to_arrays() if ns.ann is not None else None
+            vectors = None
+            if ns.storage_path is None:
+                vectors = ns.vectors().copy()
+            else:
+                ns.save_rows = ns.size
+                ns.save_journal = {}
+
+        state: Dict[str, Any] = {"generation": generation, "ids": ids, "metadata": metadata, "vectors": vector_file}
+        if vectors is not None:
+            _write_atomic(self.persist_path / vector_file, vectors.tofile)
+        else:
+            try:
+                _write_atomic(self.persist_path / vector_file, lambda f: self._copy_working_file(ns, f))
+            finally:
+                with self._lock:
+                    ns.save_journal = None
+        if graph is not None:
+            state["graph"] = graph_file
+            _write_atomic(self.persist_path / graph_file, lambda f: np.savez(f, **graph))
+        _write_atomic(self.persist_path / f"{name}.json", lambda f: f.write(json.dumps(state).encode("utf-8")))
+
+        self._generations[name] = generation
+        self._files[name] = {vector_file, state.get("graph")}
+        self._remove_stale_files(name)
+
+    def _copy_working_file(self, ns: _Namespace, target):
+        """Copy the first ``save_rows`` rows of a memmap namespace as they were when the save started."""
+        row_bytes = self.dimension * 4
+        _copy_prefix(ns.storage_path, target, ns.save_rows * row_bytes)
+        with self._lock:
+            journal, ns.save_journal = ns.save_journal, None
+        for row, vector in sorted(journal.items()):
+            target.seek(row * row_bytes)
+            target.write(vector.tobytes())
+
+    def _remove_stale_files(self, name: str):
+        """Delete vector and graph files of older or unfinished generations."""
+        pattern = re.compile(rf"{re.escape(name)}(\.\d+)?\.(f32|hnsw\.npz)(\.tmp)?")
+        keep = set(self._files.get(name, ()))
+        for path in self.persist_path.iterdir():
+            if pattern.fullmatch(path.name) and path.name not in keep:
+                path.unlink(missing_ok=True)
+
+    def close(self):
+        """Stop the background saver and save any unsaved changes."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        if self._saver is not None:
+            self._saver.join(timeout=5)
+        self.wait_for_rebuilds()
+        self.save()
+
+    def _load_graph(self, meta: Dict[str, Any], ns: _Namespace) -> Optional[HNSWIndex]:
+        """The saved HNSW graph of a namespace, or None if it has to be rebuilt."""
+        if ns.ann is None or not meta.get("graph"):
+            return None
+        try:
+            with np.load(self.persist_path / meta["graph"]) as arrays:
+                ann = HNSWIndex.from_arrays(
+                    arrays, ef_search=self.hnsw_ef_search, seed=ns.ann.seed, storage_path=ns.ann.storage_path
+                )
+        except Exception as e:
+            logger.warning(f"Could not load HNSW graph {meta['graph']}, rebuilding it: {e}")
+            return None
+        if (ann.dimension, ann.m, ann.ef_construction) != (self.dimension, self.hnsw_m, self.hnsw_ef_construction):
+            logger.info(f"HNSW parameters changed, rebuilding graph {meta['graph']}")
+            return None
+        if len(ann) != len(meta["ids"]) or any(vector_id not in ann.label_to_node for vector_id in meta["ids"]):
+            logger.warning(f"HNSW graph {meta['graph']} does not match the saved ids, rebuilding it")
+            return None
+        return ann
+
+    def _load(self):
+        """Load persisted namespaces, if any."""
+        if self.persist_path is None or not self.persist_path.exists():
+            return
+
+        for meta_file in self.persist_path.glob("*.json"):
+            name = meta_file.stem
+            try:
+                with open(meta_file, "r") as f:
+                    meta = json.load(f)
+                if "vectors" not in meta and (self.persist_path / f"{name}.dirty").exists():
+                    # Older versions modified this file in place and never saved; rows may not match ids
+                    logger.warning(f"Namespace {name} was not saved cleanly by an older version, discarding it")
+                    continue
+                count = len(meta["ids"])
+                vector_file = self.persist_path / meta.get("vectors", f"{name}.f32")
+                storage_path = self._storage_path(name)
+                if storage_path is not None:
+                    shutil.copyfile(vector_file, storage_path)  # work on a copy, keeping the snapshot intact
+                ns = self._new_namespace(name, capacity=max(1024, count))
+                if storage_path is None:
+                    vectors = np.fromfile(vector_file, dtype=np.float32, count=count * self.dimension)
+                    ns.matrix[:count] = vectors.reshape(count, self.dimension)
+                ns.restore(meta["ids"], meta["metadata"], ann=self._load_graph(meta, ns))
+                self.namespaces[name] = ns
+                self._generations[name] = meta.get("generation", 0)
+                self._files[name] = {vector_file.name, meta.get("graph")}
+                self._remove_stale_files(name)
+                (self.persist_path / f"{name}.dirty").unlink(missing_ok=True)
+                logger.info(f"Loaded {ns.size} vectors into namespace {name}")
+            except Exception as e:
+                logger.error(f"Error loading namespace {name}: {e}")
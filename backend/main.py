@@ -1,12 +1,18 @@
 """Main FastAPI application for personal AI assistant."""
 
+import asyncio
+import base64
+import hashlib
+import json
 import logging
 import sys
 import os
+import time
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, AsyncIterator, Callable, Optional, Set, Tuple
 
 # Add backend directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -14,16 +20,30 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from config import settings
 from llm_manager import LLMManager
 from embedding_manager import EmbeddingManager
+from embedding_cache import EmbeddingCache
 from vector_db import VectorDBManager
-from knowledge_base import KnowledgeBase
+from knowledge_base import open_knowledge_base
+from bm25_index import reciprocal_rank_fusion
+from chunker import TextChunker, chunk_vector_id, highlight_snippets, select_chunk
+from knowledge_indexer import KnowledgeIndexer
+from inference_scheduler import InferenceScheduler, QueueFullError
+from response_cache import SemanticResponseCache
+from reranker import CrossEncoderReranker
+from context_builder import ContextBuilder
+from session_store import ChatSession, SessionStore
 from models import (
     ChatRequest,
     ChatResponse,
     KnowledgeEntry,
     KnowledgeRequest,
     KnowledgeUpdateRequest,
+    BulkKnowledgeItemResult,
+    BulkKnowledgeResponse,
     SearchRequest,
+    SearchResult,
+    SearchResponse,
     HealthResponse,
+    ReadyResponse,
     Message,
 )
 
@@ -31,44 +51,248 @@ from models import (
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = (
+    "You are a helpful personal AI assistant. Provide concise and accurate answers "
+    "based on the provided context. If you don't know the answer, say so honestly."
+)
+
+# Every chat prompt starts with this, so its KV state is computed once at startup
+PROMPT_PREFIX = f"{SYSTEM_PROMPT}\n\nContext:\n"
+
+# Chunk hits fetched per wanted entry on the first vector search, and the
+# most fetched at once (Pinecone's query limit)
+CHUNK_OVERFETCH = 4
+MAX_VECTOR_FETCH = 10000
+
 # Global managers
 llm_manager = None
 embedding_manager = None
 vector_db_manager = None
 knowledge_base = None
+scheduler = None
+response_cache = None
+chunker = None
+indexer = None
+reranker = None
+context_builder = None
+sessions = None
 
+# Models load in the background after the server starts accepting connections
+startup_state: Dict[str, Any] = {"ready": False, "seconds": None, "components": {}}
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Startup and shutdown events."""
-    global llm_manager, embedding_manager, vector_db_manager, knowledge_base
 
-    # Startup
-    logger.info("Initializing AI Assistant components...")
+async def index_sync_loop():
+    """Reconcile the vector index on startup and then every configured interval."""
+    if settings.index_sync_on_startup:
+        await run_index_sync()
+    while settings.index_sync_interval_seconds > 0:
+        await asyncio.sleep(settings.index_sync_interval_seconds)
+        await run_index_sync()
+
+
+async def run_index_sync() -> Dict[str, Any]:
+    """Run one reconciliation pass off the event loop."""
+    try:
+        return await asyncio.to_thread(indexer.reconcile)
+    except Exception as e:
+        logger.error(f"Error syncing vector index: {e}")
+        return {"status": "error", "detail": str(e)}
+
 
-    llm_manager = LLMManager(
+def load_llm() -> LLMManager:
+    """Load the LLM, cache the prompt prefix and warm it up."""
+    manager = LLMManager(
         model_path=settings.llm_model_path,
         context_window=settings.llm_context_window,
         max_tokens=settings.llm_max_tokens,
         temperature=settings.llm_temperature,
+        prompt_cache=settings.llm_prompt_cache,
+        prompt_cache_bytes=settings.llm_prompt_cache_mb * 1024 * 1024,
+        prompt_cache_dir=settings.llm_prompt_cache_dir,
+        speculative=settings.llm_speculative,
+        speculative_tokens=settings.llm_speculative_tokens,
+        prompt_lookup_ngram=settings.llm_prompt_lookup_ngram,
+        draft_model_path=settings.llm_draft_model_path,
+        use_mmap=settings.llm_use_mmap,
     )
+    manager.set_prompt_prefix(PROMPT_PREFIX)
+    if settings.startup_warmup:
+        manager.warm_up()
+    return manager
+
+
+def load_embedding_model() -> EmbeddingManager:
+    """Load the embedding model and warm it up."""
+    manager = EmbeddingManager(
+        model_name=settings.embedding_model,
+        cache=EmbeddingCache(
+            max_bytes=settings.embedding_cache_size_mb * 1024 * 1024,
+            disk_path=settings.embedding_cache_path or None,
+            max_disk_entries=settings.embedding_cache_disk_entries,
+        ),
+        batch_window_ms=settings.embedding_batch_window_ms,
+        max_batch_size=settings.embedding_max_batch_size,
+        backend=settings.embedding_backend,
+        onnx_path=settings.embedding_onnx_path,
+        onnx_dir=settings.embedding_onnx_dir,
+        onnx_threads=settings.embedding_onnx_threads,
+        parity_threshold=settings.embedding_parity_threshold,
+    )
+    if settings.startup_warmup:
+        manager.warm_up()
+    return manager
+
+
+def load_reranker() -> CrossEncoderReranker:
+    """Load the cross-encoder and warm it up."""
+    model = CrossEncoderReranker(model_name=settings.rerank_model, cache_size=settings.rerank_cache_size)
+    if settings.startup_warmup:
+        model.warm_up()
+    return model
+
+
+async def load_component(name: str, load: Callable[[], Any]) -> Any:
+    """Run a loader on a worker thread, recording its state and time for ``/ready``."""
+    status_entry: Dict[str, Any] = {"status": "loading", "seconds": None}
+    startup_state["components"][name] = status_entry
+    started = time.perf_counter()
+    try:
+        component = await asyncio.to_thread(load)
+    except Exception as e:
+        logger.error(f"Failed to load {name}: {e}")
+        component = None
+    status_entry["seconds"] = round(time.perf_counter() - started, 2)
+    status_entry["status"] = "ready" if component is not None else "failed"
+    logger.info(f"Startup: {name} {status_entry['status']} after {status_entry['seconds']:.2f}s")
+    return component
+
+
+async def load_models(started: float):
+    """
+    Load the models concurrently, then publish them and what depends on them.
 
-    embedding_manager = EmbeddingManager(model_name=settings.embedding_model)
+    Components are assigned together once everything has loaded, so an
+    endpoint sees either all of them or none (and answers 503). The index
+    sync then runs, picking up knowledge written while loading.
+    """
+    global llm_manager, embedding_manager, reranker, chunker, indexer, context_builder, sessions
+
+    loads = [load_component("llm", load_llm), load_component("embedding", load_embedding_model)]
+    if settings.rerank_model:
+        loads.append(load_component("reranker", load_reranker))
+    llm, embedder, *optional = await asyncio.gather(*loads)
+
+    try:
+        if embedder is not None and settings.chunk_size_tokens > 0:
+            chunker = TextChunker(
+                chunk_tokens=settings.chunk_size_tokens,
+                overlap_tokens=settings.chunk_overlap_tokens,
+                tokenizer=getattr(embedder.model, "tokenizer", None),
+            )
+        if llm is not None:
+            context_builder = ContextBuilder(
+                llm.count_tokens,
+                context_window=settings.llm_context_window,
+                reserved_tokens=settings.llm_max_tokens,
+                prompt_prefix=PROMPT_PREFIX,
+                min_source_tokens=settings.context_min_source_tokens,
+            )
+            sessions = SessionStore(
+                llm.count_tokens,
+                max_history_tokens=settings.session_history_tokens,
+                max_memory_bytes=settings.session_memory_mb * 1024 * 1024,
+                disk_dir=settings.session_disk_dir or None,
+                max_disk_bytes=settings.session_disk_mb * 1024 * 1024,
+                ttl_seconds=settings.session_ttl_seconds,
+                max_sessions=settings.session_max,
+            )
+        if embedder is not None:
+            indexer = KnowledgeIndexer(
+                knowledge_base,
+                vector_db_manager,
+                embedder,
+                chunker=chunker,
+                upsert_batch_size=settings.vector_upsert_batch_size,
+                upsert_workers=settings.vector_upsert_workers,
+                token_counter=context_builder.count if llm is not None and llm.is_available() else None,
+            )
+        reranker = optional[0] if optional else None
+        llm_manager, embedding_manager = llm, embedder
+    except Exception as e:
+        logger.error(f"Failed to initialize AI Assistant components: {e}")
+        return
+
+    startup_state["seconds"] = round(time.perf_counter() - started, 2)
+    startup_state["ready"] = True
+    logger.info(f"AI Assistant ready in {startup_state['seconds']:.2f}s")
+
+    if indexer:
+        await index_sync_loop()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup and shutdown events."""
+    global vector_db_manager, knowledge_base, scheduler, response_cache
+
+    # Startup: open the stores now and load the models in the background
+    started = time.perf_counter()
+    logger.info("Initializing AI Assistant components...")
 
     vector_db_manager = VectorDBManager(
         api_key=settings.pinecone_api_key,
         environment=settings.pinecone_environment,
         index_name=settings.pinecone_index_name,
+        backend=settings.vector_db_backend,
+        local_store_path=settings.vector_store_path or None,
+        local_store_options={
+            "index_type": settings.vector_index_type,
+            "hnsw_m": settings.hnsw_m,
+            "hnsw_ef_construction": settings.hnsw_ef_construction,
+            "hnsw_ef_search": settings.hnsw_ef_search,
+            "quantization": settings.vector_quantization,
+            "pq_subspaces": settings.pq_subspaces,
+            "rerank_factor": settings.quantization_rerank_factor,
+            "filter_fields": [f.strip() for f in settings.vector_filter_fields.split(",") if f.strip()],
+            "save_interval": settings.vector_store_save_interval,
+        },
+    )
+
+    knowledge_base = open_knowledge_base(
+        settings.knowledge_base_path,
+        backend=settings.knowledge_base_backend,
+        import_path=settings.knowledge_base_import_path or None,
+        fsync_interval_ms=settings.knowledge_base_fsync_interval_ms,
+        compact_threshold=settings.knowledge_base_compact_threshold,
+    )
+
+    scheduler = InferenceScheduler(
+        max_queue_size=settings.llm_max_queue_size,
+        embedding_workers=settings.embedding_workers,
     )
 
-    knowledge_base = KnowledgeBase(file_path=settings.knowledge_base_path)
+    if settings.response_cache_enabled:
+        response_cache = SemanticResponseCache(
+            threshold=settings.response_cache_threshold,
+            ttl_seconds=settings.response_cache_ttl_seconds,
+            max_entries=settings.response_cache_max_entries,
+        )
 
-    logger.info("AI Assistant initialized successfully!")
+    load_task = asyncio.create_task(load_models(started))
+    logger.info(f"Accepting connections after {time.perf_counter() - started:.2f}s; loading models in the background")
 
     yield
 
     # Shutdown
     logger.info("Shutting down AI Assistant...")
+    load_task.cancel()
+    scheduler.shutdown()
+    vector_db_manager.close()
+    if embedding_manager:
+        embedding_manager.close()
+    if reranker:
+        reranker.close()
+    knowledge_base.close()
 
 
 # Create FastAPI app
@@ -101,6 +325,249 @@ async def health_check():
     )
 
 
+@app.get("/ready", response_model=ReadyResponse)
+async def readiness_check(response: Response):
+    """
+    Report whether startup has finished loading the models.
+
+    Returns 503 while they are loading, so load balancers and rolling
+    restarts hold traffic until the instance can answer. ``/health`` stays
+    up throughout and reports which components are available.
+    """
+    if not startup_state["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return ReadyResponse(
+        ready=startup_state["ready"],
+        startup_seconds=startup_state["seconds"],
+        components=startup_state["components"],
+    )
+
+
+async def embed(text: str) -> List[float]:
+    """Embed text via the micro-batcher, or on the scheduler's embedding pool."""
+    if not embedding_manager:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Embedding service unavailable")
+    if embedding_manager.batcher is not None:
+        return await asyncio.wrap_future(embedding_manager.submit(text))
+    return await scheduler.run_embedding(embedding_manager.embed_text, text)
+
+
+def knowledge_metadata(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Vector metadata stored for a knowledge entry."""
+    return {
+        "id": entry["id"],
+        "title": entry["title"],
+        "content": entry["content"],
+        "category": entry["category"],
+    }
+
+
+def entry_chunks(entry: Dict[str, Any]) -> List[str]:
+    """Content chunks embedded for an entry."""
+    return chunker.split(entry["content"]) if chunker else [entry["content"]]
+
+
+async def index_entries(entries: List[Dict[str, Any]]) -> Set[int]:
+    """
+    Chunk, embed and upsert knowledge entries on the embedding pool.
+
+    Returns:
+        IDs of entries whose vectors could not be stored
+    """
+    if not indexer:
+        return {entry["id"] for entry in entries}
+    return await scheduler.run_embedding(indexer.index_entries, entries)
+
+
+def knowledge_source(entry: Dict[str, Any], score: float, query: str) -> Dict[str, Any]:
+    """Source dict for the entry chunk that best matches ``query``, shaped like a vector search result."""
+    metadata = {**knowledge_metadata(entry), "content": select_chunk(entry_chunks(entry), query)}
+    return {"id": f"knowledge_{entry['id']}", "score": score, "metadata": metadata}
+
+
+async def vector_sources(
+    query_embedding: List[float], top_k: int, filter: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Best-scoring chunk of each of the ``top_k`` nearest entries.
+
+    Entries can have several chunks among the nearest vectors, so chunk hits
+    are over-fetched and the depth doubled until ``top_k`` distinct entries
+    are found or the matching vectors run out.
+    """
+    fetch = top_k * CHUNK_OVERFETCH if settings.chunk_size_tokens > 0 else top_k
+    while True:
+        fetch = min(fetch, MAX_VECTOR_FETCH)
+        results = await asyncio.to_thread(
+            vector_db_manager.search_vectors, query_embedding=query_embedding, top_k=fetch, filter=filter
+        )
+        sources: Dict[Any, Dict[str, Any]] = {}
+        for result in results:
+            entry_id = result.get("metadata", {}).get("id")
+            if entry_id is not None and entry_id not in sources:
+                sources[entry_id] = result
+        if len(sources) >= top_k or len(results) < fetch or fetch == MAX_VECTOR_FETCH:
+            return list(sources.values())[:top_k]
+        fetch *= 2
+
+
+async def retrieve_sources(
+    query: str, query_embedding: List[float], top_k: int = 5, filter: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Fetch the knowledge most relevant to the query, one source per entry.
+
+    In hybrid mode the vector and BM25 rankings are fetched concurrently and
+    fused with reciprocal rank fusion, which only orders the sources
+    (``rrf_score``). ``score`` stays the cosine similarity, or for entries
+    only BM25 found, their BM25 score relative to the best keyword match, so
+    confidence and ``min_score`` mean the same in both modes.
+    Each source carries the best-matching chunk of its entry, so prompt size
+    is bounded by the chunk size rather than the entry length. ``filter`` is
+    a metadata filter applied inside both searches, so ``top_k`` matching
+    results come back however selective it is.
+    """
+    if not vector_db_manager:
+        return []
+    if settings.retrieval_mode != "hybrid" or not knowledge_base:
+        return await vector_sources(query_embedding, top_k, filter)
+
+    candidates = max(top_k, settings.hybrid_candidates)
+    vector_results, lexical_results = await asyncio.gather(
+        vector_sources(query_embedding, candidates, filter),
+        asyncio.to_thread(knowledge_base.lexical_search, query, candidates, filter),
+    )
+
+    by_id: Dict[Any, Dict[str, Any]] = {result["metadata"]["id"]: result for result in vector_results}
+    vector_ranking = list(by_id)
+    lexical_ranking = [entry["id"] for entry, _ in lexical_results]
+    lexical_only = [(entry, score) for entry, score in lexical_results if entry["id"] not in by_id]
+    if lexical_only:
+        best = lexical_results[0][1] or 1.0
+        # Chunk lexical-only hits in one worker call rather than one per entry
+        sources = await asyncio.to_thread(
+            lambda: [knowledge_source(entry, score / best, query) for entry, score in lexical_only]
+        )
+        by_id.update((entry["id"], source) for (entry, _), source in zip(lexical_only, sources))
+
+    fused = reciprocal_rank_fusion([vector_ranking, lexical_ranking], k=settings.hybrid_rrf_k)
+    return [{**by_id[entry_id], "rrf_score": score} for entry_id, score in fused[:top_k]]
+
+
+async def retrieve_context(query: str, query_embedding: List[float]) -> List[Dict[str, Any]]:
+    """
+    Sources for a chat prompt.
+
+    With a reranker configured, ``RERANK_CANDIDATES`` sources are retrieved
+    and the cross-encoder keeps the best ``RERANK_TOP_K`` within
+    ``RERANK_BUDGET_MS``, falling back to retrieval order when over budget.
+    """
+    if not reranker:
+        return await retrieve_sources(query, query_embedding)
+    candidates = await retrieve_sources(query, query_embedding, top_k=settings.rerank_candidates)
+    return await asyncio.to_thread(
+        reranker.rerank, query, candidates, settings.rerank_top_k, settings.rerank_budget_ms or None
+    )
+
+
+def search_fingerprint(request: SearchRequest) -> str:
+    """Identifies the result list a search cursor points into."""
+    key = json.dumps([request.query, request.category, request.tags, request.min_score], sort_keys=True)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+def rank_key(result: Dict[str, Any]) -> Tuple[float, str]:
+    """Sort key of a search result: fused rank score (or score) descending, then entry id."""
+    return -result.get("rrf_score", result["score"]), str(result["metadata"]["id"])
+
+
+def encode_cursor(offset: int, last: Tuple[float, str], fingerprint: str) -> str:
+    """Opaque cursor for the page after the result with rank key ``last``, ``offset`` results deep."""
+    data = {"o": offset, "k": list(last), "f": fingerprint}
+    return base64.urlsafe_b64encode(json.dumps(data).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, fingerprint: str) -> Tuple[int, Tuple[float, str]]:
+    """Offset and last rank key stored in a cursor; raises ValueError if it is malformed or from another search."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        offset = int(data["o"])
+        last = (float(data["k"][0]), str(data["k"][1]))
+    except (ValueError, TypeError, KeyError, IndexError) as e:
+        raise ValueError("Malformed cursor") from e
+    if data.get("f") != fingerprint or offset < 0:
+        raise ValueError("Cursor does not belong to this search")
+    return offset, last
+
+
+def queue_full_error(e: QueueFullError) -> HTTPException:
+    """503 telling the client when to retry."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server busy, please retry later",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+def render_history(messages: List[Message]) -> Tuple[str, int]:
+    """
+    Client-supplied conversation history as prompt text.
+
+    The oldest messages are dropped until the rest fit in
+    ``SESSION_HISTORY_TOKENS``.
+
+    Returns:
+        (history text, its token count)
+    """
+    pieces = [f"User Query: {m.content}\n" if m.role == "user" else f"{m.content.strip()}\n\n" for m in messages]
+    counts = [context_builder.count(piece) for piece in pieces]
+    while pieces and sum(counts) > settings.session_history_tokens:
+        pieces.pop(0)
+        counts.pop(0)
+    return "".join(pieces), sum(counts)
+
+
+async def stateless_prompt(request: ChatRequest, sources: List[Dict[str, Any]]) -> Tuple[str, List[Dict[str, Any]]]:
+    """Prompt for a request without a session, including the last ``context_limit`` history messages."""
+    messages = request.conversation_history[-request.context_limit:] if request.context_limit else []
+    history, history_tokens = await asyncio.to_thread(render_history, messages)
+    return await asyncio.to_thread(context_builder.build, request.query, sources, history, history_tokens)
+
+
+async def finish_turn(session: ChatSession, query: str, text: str, state: Any):
+    """Record a generated turn (without its retrieved context) and the KV state that follows it."""
+    turn = f"User Query: {query}\n{text.strip()}\n\n"
+    await asyncio.to_thread(sessions.record_turn, session, turn, state)
+
+
+def source_confidence(sources: List[Dict[str, Any]]) -> float:
+    """Confidence based on source similarity scores."""
+    return sum(s.get("score", 0) for s in sources) / len(sources) if sources else 0.5
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.get("/stats")
+async def get_stats():
+    """Runtime statistics for capacity planning."""
+    return {
+        "scheduler": scheduler.stats() if scheduler else {},
+        "embedding": embedding_manager.stats() if embedding_manager else {},
+        "embedding_cache": embedding_manager.cache.stats() if embedding_manager and embedding_manager.cache else {},
+        "embedding_batcher": embedding_manager.batcher.stats() if embedding_manager and embedding_manager.batcher else {},
+        "response_cache": response_cache.stats() if response_cache else {},
+        "prompt_cache": llm_manager.prompt_cache_stats() if llm_manager else {},
+        "decoding": llm_manager.decoding_stats() if llm_manager else {},
+        "index_sync": indexer.last_sync if indexer else {},
+        "reranker": reranker.stats() if reranker else {},
+        "context": context_builder.stats() if context_builder else {},
+        "sessions": sessions.stats() if sessions else {},
+    }
+
+
 # Chat endpoint
 @app.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
@@ -113,53 +580,154 @@ async def chat(request: ChatRequest):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Query cannot be empty")
 
     try:
-        # Generate embedding for user query
-        if not embedding_manager:
-            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Embedding service unavailable")
-        query_embedding = embedding_manager.embed_text(request.query)
-
-        # Search vector database for relevant knowledge
-        if not vector_db_manager:
-            sources = []
-        else:
-            sources = vector_db_manager.search_vectors(query_embedding=query_embedding, top_k=5)
-
-        # Build context from retrieved sources
-        context = ""
-        if sources:
-            context = "Relevant information:\n"
-            for i, source in enumerate(sources, 1):
-                metadata = source.get("metadata", {})
-                context += f"{i}. {metadata.get('content', 'N/A')}\n"
-
-        # Build system prompt
-        system_prompt = (
-            "You are a helpful personal AI assistant. Provide concise and accurate answers "
-            "based on the provided context. If you don't know the answer, say so honestly."
-        )
+        query_embedding = await embed(request.query)
+        session = sessions.get(request.session_id) if request.session_id and sessions else None
+        # Answers depend on the conversation, so only standalone questions use the response cache
+        use_cache = response_cache is not None and session is None and not request.conversation_history
 
-        # Prepare full prompt with context
-        full_prompt = f"{system_prompt}\n\nContext:\n{context}\n\nUser Query: {request.query}"
+        if use_cache:
+            cached = response_cache.lookup(query_embedding)
+            if cached:
+                return ChatResponse(
+                    response=cached["response"],
+                    sources=cached["sources"],
+                    confidence=cached["confidence"],
+                    cached=True,
+                )
+
+        sources = await retrieve_context(request.query, query_embedding)
 
         # Generate response from LLM
         if not llm_manager:
             raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="LLM service unavailable")
-        response_text = llm_manager.generate(prompt=full_prompt, system_prompt=None)
+        if session:
+            async with session.lock:
+                history = session.history()
+                full_prompt, sources = await asyncio.to_thread(
+                    context_builder.build, request.query, sources, history, session.tokens
+                )
+                state = await asyncio.to_thread(sessions.load_state, session)
+                text, state = await scheduler.run_llm(llm_manager.generate_turn, full_prompt, state)
+                await finish_turn(session, request.query, text, state)
+            response_text = text.strip()
+        else:
+            full_prompt, sources = await stateless_prompt(request, sources)
+            response_text = await scheduler.run_llm(llm_manager.generate, prompt=full_prompt, system_prompt=None)
+
+        confidence = source_confidence(sources)
 
-        # Calculate confidence based on source similarity scores
-        confidence = sum(s.get("score", 0) for s in sources) / len(sources) if sources else 0.5
+        if use_cache and llm_manager.is_available():
+            response_cache.store(query_embedding, response_text, sources, confidence)
 
         return ChatResponse(
             response=response_text,
             sources=sources,
             confidence=confidence,
+            session_id=session.id if session else None,
         )
 
+    except QueueFullError as e:
+        raise queue_full_error(e)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in chat endpoint: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Stream the assistant response as Server-Sent Events.
+
+    Emits one ``sources`` event with the retrieved knowledge, then ``token``
+    events as the model generates, then a final ``done`` event.
+    """
+    if not request.query:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Query cannot be empty")
+    if not llm_manager:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="LLM service unavailable")
+
+    try:
+        query_embedding = await embed(request.query)
+        session = sessions.get(request.session_id) if request.session_id and sessions else None
+        use_cache = response_cache is not None and session is None and not request.conversation_history
+
+        cached = response_cache.lookup(query_embedding) if use_cache else None
+        if cached:
+            async def replay() -> AsyncIterator[str]:
+                yield sse_event("sources", {"sources": cached["sources"], "confidence": cached["confidence"], "cached": True})
+                yield sse_event("token", {"text": cached["response"]})
+                yield sse_event("done", {})
+
+            return StreamingResponse(replay(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+        sources = await retrieve_context(request.query, query_embedding)
+        result: Dict[str, Any] = {}
+        full_prompt = tokens = None
+        if session:
+            # The turn is built and admitted once the session lock is held; fail fast while the queue is full
+            scheduler.check_capacity()
+        else:
+            full_prompt, sources = await stateless_prompt(request, sources)
+            tokens = scheduler.stream_llm(llm_manager.generate_stream, prompt=full_prompt, system_prompt=None)
+    except QueueFullError as e:
+        raise queue_full_error(e)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in chat stream endpoint: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+    async def events() -> AsyncIterator[str]:
+        nonlocal full_prompt, sources, tokens
+        if session:
+            # Held until the stream ends, so turns of one conversation never interleave. Taken here
+            # rather than before returning, so a client that disconnects first never leaves it locked.
+            await session.lock.acquire()
+        try:
+            if session:
+                try:
+                    history = session.history()
+                    full_prompt, sources = await asyncio.to_thread(
+                        context_builder.build, request.query, sources, history, session.tokens
+                    )
+                    state = await asyncio.to_thread(sessions.load_state, session)
+                    tokens = scheduler.stream_llm(llm_manager.generate_turn_stream, full_prompt, state, result)
+                except Exception as e:
+                    logger.error(f"Error starting chat turn: {e}")
+                    detail = "Server busy, please retry later" if isinstance(e, QueueFullError) else str(e)
+                    yield sse_event("error", {"detail": detail})
+                    yield sse_event("done", {"session_id": session.id})
+                    return
+
+            confidence = source_confidence(sources)
+            yield sse_event("sources", {"sources": sources, "confidence": confidence})
+            parts = []
+            try:
+                async for token in tokens:
+                    parts.append(token)
+                    yield sse_event("token", {"text": token})
+            except Exception as e:
+                logger.error(f"Error streaming chat response: {e}")
+                yield sse_event("error", {"detail": str(e)})
+            else:
+                if session and "text" in result:
+                    await finish_turn(session, request.query, result["text"], result["state"])
+                if use_cache and llm_manager.is_available():
+                    response_cache.store(query_embedding, "".join(parts).strip(), sources, confidence)
+            yield sse_event("done", {"session_id": session.id} if session else {})
+        finally:
+            if session:
+                session.lock.release()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # Knowledge base endpoints
 @app.post("/knowledge", response_model=KnowledgeEntry)
 async def add_knowledge(request: KnowledgeRequest):
@@ -176,23 +744,8 @@ async def add_knowledge(request: KnowledgeRequest):
             source=request.source,
         )
 
-        # Generate embedding and add to vector database
-        if embedding_manager and vector_db_manager:
-            embedding = embedding_manager.embed_text(request.content)
-            vector_id = f"knowledge_{entry['id']}"
-            vector_db_manager.upsert_vectors(
-            [(
-                vector_id,
-                embedding,
-                {
-                    "id": entry["id"],
-                    "title": request.title,
-                    "content": request.content,
-                    "category": request.category,
-                },
-            )],
-            namespace="knowledge",
-        )
+        # Chunk, embed and add to vector database
+        await index_entries([entry])
 
         return KnowledgeEntry(**entry)
 
@@ -201,6 +754,104 @@ async def add_knowledge(request: KnowledgeRequest):
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+async def ingest_batch(items: List[Any], offset: int) -> List[BulkKnowledgeItemResult]:
+    """
+    Validate, store, embed and index one batch of bulk items.
+
+    Items may be parsed objects or raw NDJSON lines (bytes, decoded here so
+    a line that is not UTF-8 fails on its own). Valid items are written
+    to the knowledge base in one call, then chunked, embedded and upserted
+    together by ``index_entries``.
+    """
+    results: List[Optional[BulkKnowledgeItemResult]] = [None] * len(items)
+    valid = []
+    for i, raw in enumerate(items):
+        try:
+            data = json.loads(raw) if isinstance(raw, (str, bytes)) else raw
+            valid.append((i, KnowledgeRequest.model_validate(data)))
+        except Exception as e:
+            results[i] = BulkKnowledgeItemResult(index=offset + i, status="error", detail=str(e))
+
+    if valid:
+        entries = await asyncio.to_thread(knowledge_base.add_entries, [item.model_dump() for _, item in valid])
+
+        failed = await index_entries(entries)
+
+        for (i, _), entry in zip(valid, entries):
+            results[i] = BulkKnowledgeItemResult(
+                index=offset + i,
+                status="created",
+                id=entry["id"],
+                indexed=entry["id"] not in failed,
+            )
+
+    return results
+
+
+async def ndjson_items(request: Request) -> AsyncIterator[bytes]:
+    """Yield non-blank, undecoded NDJSON lines as the request body streams in."""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+
+@app.post("/knowledge/bulk", response_model=BulkKnowledgeResponse)
+async def bulk_add_knowledge(request: Request):
+    """
+    Add many knowledge entries in one request.
+
+    Accepts a JSON array (or ``{"entries": [...]}``) of knowledge entries,
+    or NDJSON (``application/x-ndjson``) with one entry per line, which is
+    processed in batches while the body is still streaming in. Returns a
+    result for every item; invalid items do not fail the request.
+    """
+    if not knowledge_base:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Knowledge base service unavailable")
+
+    results: List[BulkKnowledgeItemResult] = []
+    batch_size = max(1, settings.bulk_batch_size)
+    try:
+        content_type = request.headers.get("content-type", "")
+        if "ndjson" in content_type or "jsonl" in content_type:
+            batch: List[bytes] = []
+            async for line in ndjson_items(request):
+                batch.append(line)
+                if len(batch) >= batch_size:
+                    results.extend(await ingest_batch(batch, len(results)))
+                    batch = []
+            if batch:
+                results.extend(await ingest_batch(batch, len(results)))
+        else:
+            try:
+                body = await request.json()
+            except ValueError:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Request body is not valid JSON")
+            items = body.get("entries") if isinstance(body, dict) else body
+            if not isinstance(items, list):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Expected a JSON array of entries or an object with an 'entries' array",
+                )
+            for start in range(0, len(items), batch_size):
+                results.extend(await ingest_batch(items[start:start + batch_size], start))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in bulk knowledge ingestion: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+    created = sum(1 for result in results if result.status == "created")
+    logger.info(f"Bulk ingestion: {created} created, {len(results) - created} failed")
+    return BulkKnowledgeResponse(created=created, failed=len(results) - created, results=results)
+
+
 @app.get("/knowledge", response_model=List[KnowledgeEntry])
 async def get_all_knowledge():
     """Get all knowledge entries."""
@@ -238,28 +889,22 @@ async def update_knowledge(entry_id: int, request: KnowledgeUpdateRequest):
         if not knowledge_base:
             raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Knowledge base service unavailable")
         update_data = request.model_dump(exclude_unset=True)
+        previous = knowledge_base.get_entry(entry_id)
+        previous_chunks = len(entry_chunks(previous)) if previous else 0
         entry = knowledge_base.update_entry(entry_id, **update_data)
 
         if not entry:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Entry not found")
 
-        # Update vector database if content changed
-        if "content" in update_data and embedding_manager and vector_db_manager:
-            embedding = embedding_manager.embed_text(update_data["content"])
-            vector_id = f"knowledge_{entry_id}"
-            vector_db_manager.upsert_vectors(
-                [(
-                    vector_id,
-                    embedding,
-                    {
-                        "id": entry_id,
-                        "title": entry.get("title", ""),
-                        "content": update_data["content"],
-                        "category": entry.get("category", ""),
-                    },
-                )],
-                namespace="knowledge",
-            )
+        if response_cache:
+            response_cache.invalidate_entry(entry_id)
+
+        # Re-index if anything stored in the vector metadata changed
+        if update_data.keys() & {"title", "content", "category", "tags"}:
+            await index_entries([entry])
+            stale = [chunk_vector_id(entry_id, i) for i in range(len(entry_chunks(entry)), previous_chunks)]
+            if stale and vector_db_manager:
+                await asyncio.to_thread(vector_db_manager.delete_vectors, stale, namespace="knowledge")
 
         return KnowledgeEntry(**entry)
 
@@ -270,19 +915,36 @@ async def update_knowledge(entry_id: int, request: KnowledgeUpdateRequest):
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """Discard a chat session and its saved KV state."""
+    if not sessions or not sessions.delete(session_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    return {"message": "Session deleted successfully"}
+
+
 @app.delete("/knowledge/{entry_id}")
 async def delete_knowledge(entry_id: int):
     """Delete a knowledge entry."""
     try:
         if not knowledge_base:
             raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Knowledge base service unavailable")
+        entry = knowledge_base.get_entry(entry_id)
+        chunk_count = len(entry_chunks(entry)) if entry else 1
         success = knowledge_base.delete_entry(entry_id)
         if not success:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Entry not found")
 
+        if response_cache:
+            response_cache.invalidate_entry(entry_id)
+
         # Delete from vector database
         if vector_db_manager:
-            vector_db_manager.delete_vectors([f"knowledge_{entry_id}"], namespace="knowledge")
+            await asyncio.to_thread(
+                vector_db_manager.delete_vectors,
+                [chunk_vector_id(entry_id, i) for i in range(chunk_count)],
+                namespace="knowledge",
+            )
 
         return {"message": "Entry deleted successfully"}
 
@@ -293,33 +955,86 @@ async def delete_knowledge(entry_id: int):
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
-@app.post("/search", response_model=List[KnowledgeEntry])
+@app.post("/index/sync")
+async def sync_index():
+    """
+    Reconcile the vector index with the knowledge base.
+
+    Re-embeds entries whose vectors are missing or out of date and deletes
+    orphaned vectors. Returns ``{"status": "running"}`` if a sync is already
+    in progress.
+    """
+    if not indexer:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Indexer unavailable")
+    return await run_index_sync()
+
+
+@app.post("/search", response_model=SearchResponse)
 async def search_knowledge(request: SearchRequest):
     """Search knowledge base."""
     try:
         # Generate embedding for search query
         if not embedding_manager or not vector_db_manager or not knowledge_base:
             raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Search service unavailable")
-        query_embedding = embedding_manager.embed_text(request.query)
 
-        # Search vector database
-        results = vector_db_manager.search_vectors(
-            query_embedding=query_embedding,
-            top_k=request.top_k if request.top_k else 5,
-            namespace="knowledge",
-        )
+        fingerprint = search_fingerprint(request)
+        try:
+            offset, last = decode_cursor(request.cursor, fingerprint) if request.cursor else (0, None)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        if offset + request.top_k > settings.search_max_results:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Results are limited to the top {settings.search_max_results}",
+            )
+        query_embedding = await embed(request.query)
 
-        # Extract entry IDs and fetch full entries
-        entries = []
-        for result in results:
-            entry_id = result.get("metadata", {}).get("id")
-            if entry_id:
-                entry = knowledge_base.get_entry(entry_id)
-                if entry:
-                    entries.append(KnowledgeEntry(**entry))
+        # Search vector database (fused with BM25 in hybrid mode), filtered inside the index
+        conditions = []
+        if request.category:
+            conditions.append({"category": request.category})
+        if request.tags:
+            conditions.append({"tags": {"$in": request.tags}})
+        filter = {"$and": conditions} if len(conditions) > 1 else (conditions[0] if conditions else None)
+        # Pages continue after the last result's rank key rather than at an offset: fused scores only
+        # grow with the candidate depth, so a result already served never comes back. Hybrid results
+        # are ordered by fused rank, not score, so min_score filters, and the depth doubles until one
+        # result more than the page (telling whether another page exists) has been found.
+        depth = min(offset + request.top_k + 1, settings.search_max_results)
+        while True:
+            results = await retrieve_sources(request.query, query_embedding, top_k=depth, filter=filter)
+            hits = sorted(
+                (
+                    result
+                    for result in results
+                    if (request.min_score is None or result["score"] >= request.min_score)
+                    and (last is None or rank_key(result) > last)
+                ),
+                key=rank_key,
+            )
+            if len(hits) > request.top_k or len(results) < depth or depth == settings.search_max_results:
+                break
+            depth = min(depth * 2, settings.search_max_results)
+
+        # Results are one per entry; hydrate only the requested page in one multi-get
+        page = hits[:request.top_k]
+        entries = await asyncio.to_thread(knowledge_base.get_entries, [hit["metadata"]["id"] for hit in page])
 
-        return entries
+        matches = [
+            SearchResult(
+                **entries[hit["metadata"]["id"]],
+                score=hit["score"],
+                highlights=highlight_snippets(hit["metadata"].get("content", ""), request.query),
+            )
+            for hit in page
+            if hit["metadata"]["id"] in entries
+        ]
+        more = len(hits) > request.top_k and offset + request.top_k < settings.search_max_results
+        next_cursor = encode_cursor(offset + request.top_k, rank_key(page[-1]), fingerprint) if more else None
+        return SearchResponse(results=matches, next_cursor=next_cursor)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error searching knowledge: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
@@ -0,0 +1,150 @@
+"""Metadata Filter - Pinecone-style metadata filters for the local vector store."""
+
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+# Operators answered from postings; anything else falls back to a scan
+INDEXED_OPERATORS = {"$eq", "$in"}
+
+
+def _values(value: Any) -> List[Any]:
+    """Metadata value as a list; list fields match if any element matches."""
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def _compare(values: List[Any], operator: str, operand: Any) -> bool:
+    if operator == "$eq":
+        return operand in values
+    if operator == "$ne":
+        return operand not in values
+    if operator == "$in":
+        return any(v in operand for v in values)
+    if operator == "$nin":
+        return not any(v in operand for v in values)
+    if operator == "$exists":
+        return (values != [None]) == bool(operand)
+    comparisons = {
+        "$gt": lambda v: v > operand,
+        "$gte": lambda v: v >= operand,
+        "$lt": lambda v: v < operand,
+        "$lte": lambda v: v <= operand,
+    }
+    if operator in comparisons:
+        return any(v is not None and comparisons[operator](v) for v in values)
+    raise ValueError(f"Unsupported filter operator: {operator}")
+
+
+def matches(metadata: Dict[str, Any], filter: Dict[str, Any]) -> bool:
+    """
+    Evaluate a metadata filter.
+
+    Supports the Pinecone filter language: ``{"field": value}`` for
+    equality, ``{"field": {"$op": operand}}`` with $eq, $ne, $in, $nin,
+    $gt, $gte, $lt, $lte and $exists, and ``$and`` / ``$or`` lists.
+
+    Args:
+        metadata: Vector metadata
+        filter: Filter expression
+
+    Returns:
+        Whether the metadata satisfies the filter
+    """
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(matches(metadata, f) for f in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(metadata, f) for f in condition):
+                return False
+        else:
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            values = _values(metadata.get(key))
+            if not all(_compare(values, op, operand) for op, operand in condition.items()):
+                return False
+    return True
+
+
+class MetadataIndex:
+    """
+    Postings from metadata values to row numbers for selected fields.
+
+    Equality and ``$in`` conditions on indexed fields are answered from the
+    postings, so selecting rows costs about the size of the result rather
+    than the namespace. Other conditions scan the metadata.
+    """
+
+    def __init__(self, fields: Iterable[str] = ("category", "tags")):
+        """
+        Initialize Metadata Index.
+
+        Args:
+            fields: Metadata fields to index
+        """
+        self.fields = set(fields)
+        self._postings: Dict[str, Dict[Any, Set[int]]] = {field: {} for field in self.fields}
+
+    def add(self, row: int, metadata: Dict[str, Any]):
+        """Index a row's metadata."""
+        for field in self.fields:
+            for value in _values(metadata.get(field)):
+                try:
+                    self._postings[field].setdefault(value, set()).add(row)
+                except TypeError:
+                    pass  # Unhashable values are only matched by scanning
+
+    def remove(self, row: int, metadata: Dict[str, Any]):
+        """Drop a row's metadata from the postings."""
+        for field in self.fields:
+            postings = self._postings[field]
+            for value in _values(metadata.get(field)):
+                try:
+                    rows = postings.get(value)
+                except TypeError:
+                    continue
+                if rows is not None:
+                    rows.discard(row)
+                    if not rows:
+                        del postings[value]
+
+    def select(self, filter: Dict[str, Any], metadata: List[Dict[str, Any]]) -> Set[int]:
+        """
+        Rows whose metadata satisfies ``filter``.
+
+        Args:
+            filter: Filter expression
+            metadata: Metadata of every row, indexed by row number
+
+        Returns:
+            Set of matching rows
+        """
+        result: Optional[Set[int]] = None
+        for key, condition in filter.items():
+            if key == "$and":
+                rows = self._intersect(self.select(f, metadata) for f in condition)
+            elif key == "$or":
+                rows = set().union(*(self.select(f, metadata) for f in condition))
+            else:
+                rows = self._select_field(key, condition, metadata)
+            result = rows if result is None else result & rows
+            if not result:
+                return set()
+        return result if result is not None else set(range(len(metadata)))
+
+    def _intersect(self, sets: Iterable[Set[int]]) -> Set[int]:
+        result: Optional[Set[int]] = None
+        for rows in sets:
+            result = rows if result is None else result & rows
+        return result or set()
+
+    def _select_field(self, field: str, condition: Any, metadata: List[Dict[str, Any]]) -> Set[int]:
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        if field in self.fields and set(condition) <= INDEXED_OPERATORS:
+            postings = self._postings[field]
+            result: Optional[Set[int]] = None
+            for operator, operand in condition.items():
+                values = [operand] if operator == "$eq" else operand
+                rows = set().union(*(postings.get(v, set()) for v in values))
+                result = rows if result is None else result & rows
+            return result or set()
+        return {row for row, meta in enumerate(metadata) if matches(meta, {field: condition})}
@@ -1,7 +1,7 @@
 """Pydantic models for API requests and responses."""
 
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 
@@ -19,6 +19,7 @@ class ChatRequest(BaseModel):
     query: str = Field(..., description="User query")
     conversation_history: Optional[List[Message]] = Field(default=[], description="Previous messages")
     context_limit: Optional[int] = Field(default=5, description="Number of context messages to use")
+    session_id: Optional[str] = Field(default=None, max_length=64, pattern=r"^[A-Za-z0-9_-]+$", description="Conversation whose KV state is kept between turns")
 
 
 class ChatResponse(BaseModel):
@@ -27,6 +28,8 @@ class ChatResponse(BaseModel):
     response: str = Field(..., description="Assistant response")
     sources: Optional[List[dict]] = Field(default=[], description="Retrieved knowledge sources")
     confidence: Optional[float] = Field(default=0.0, description="Response confidence score")
+    cached: bool = Field(default=False, description="Served from the semantic response cache")
+    session_id: Optional[str] = Field(default=None, description="Conversation the turn was added to")
 
 
 class KnowledgeEntry(BaseModel):
@@ -52,6 +55,24 @@ class KnowledgeRequest(BaseModel):
     source: Optional[str] = None
 
 
+class BulkKnowledgeItemResult(BaseModel):
+    """Outcome of one item in a bulk knowledge request."""
+
+    index: int = Field(..., description="Position of the item in the request")
+    status: str = Field(..., description="'created' or 'error'")
+    id: Optional[int] = Field(default=None, description="Created entry ID")
+    indexed: bool = Field(default=False, description="Embedding stored in the vector database")
+    detail: Optional[str] = Field(default=None, description="Error detail")
+
+
+class BulkKnowledgeResponse(BaseModel):
+    """Bulk knowledge ingestion response."""
+
+    created: int = Field(..., description="Entries created")
+    failed: int = Field(..., description="Items rejected")
+    results: List[BulkKnowledgeItemResult] = Field(default=[], description="Per-item results")
+
+
 class KnowledgeUpdateRequest(BaseModel):
     """Request to update knowledge entry."""
 
@@ -66,8 +87,25 @@ class SearchRequest(BaseModel):
     """Knowledge search request."""
 
     query: str = Field(..., description="Search query")
-    category: Optional[str] = None
-    top_k: int = Field(default=5, description="Number of results to return")
+    category: Optional[str] = Field(default=None, description="Only return entries in this category")
+    tags: Optional[List[str]] = Field(default=None, description="Only return entries carrying any of these tags")
+    top_k: int = Field(default=5, ge=1, description="Number of results per page")
+    min_score: Optional[float] = Field(default=None, description="Drop results scoring below this")
+    cursor: Optional[str] = Field(default=None, description="next_cursor from the previous page")
+
+
+class SearchResult(KnowledgeEntry):
+    """Knowledge entry matched by a search."""
+
+    score: float = Field(..., description="Cosine similarity (relative BM25 score for keyword-only hits)")
+    highlights: List[str] = Field(default=[], description="Matching passages with query terms in <em> tags")
+
+
+class SearchResponse(BaseModel):
+    """One page of search results."""
+
+    results: List[SearchResult]
+    next_cursor: Optional[str] = Field(default=None, description="Cursor for the next page, if any")
 
 
 class HealthResponse(BaseModel):
@@ -77,3 +115,18 @@ class HealthResponse(BaseModel):
     llm_available: bool
     vector_db_available: bool
     embedding_model_available: bool
+
+
+class ComponentStatus(BaseModel):
+    """Load state of one background-loaded component."""
+
+    status: str = Field(..., description="'loading', 'ready' or 'failed'")
+    seconds: Optional[float] = Field(default=None, description="Load and warm-up time")
+
+
+class ReadyResponse(BaseModel):
+    """Readiness probe response."""
+
+    ready: bool
+    startup_seconds: Optional[float] = Field(default=None, description="Time from process start to ready")
+    components: Dict[str, ComponentStatus] = {}
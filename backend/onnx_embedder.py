@@ -0,0 +1,221 @@
+"""ONNX Embedder - Runs sentence-transformers models with ONNX Runtime, optionally int8-quantized."""
+
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Any, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Sentences embedded by both runtimes to check that they agree
+PARITY_TEXTS = [
+    "How do I reset my password?",
+    "The quarterly report is due on Friday and needs sign-off from finance.",
+    "Python list comprehensions build a new list from an iterable in one expression.",
+    "Notes",
+    "Grandma's lasagna: layer pasta, ricotta, sauce and mozzarella, then bake for 45 minutes at 190°C.",
+    "Kubernetes restarts a container when its liveness probe fails repeatedly.",
+    "Meeting moved to 3pm — bring the Q3 numbers.",
+    " ".join(["Long entries are truncated to the model's maximum sequence length."] * 40),
+]
+
+
+def _model_file(model_name: str, filename: str) -> Optional[str]:
+    """Path of a file in a local model directory or, failing that, in the Hugging Face Hub repo."""
+    if os.path.isdir(model_name):
+        path = os.path.join(model_name, filename)
+        return path if os.path.exists(path) else None
+    try:
+        from huggingface_hub import hf_hub_download
+
+        return hf_hub_download(model_name, filename)
+    except Exception:
+        return None
+
+
+def _slug(path: str) -> str:
+    """File-name-safe form of an absolute path."""
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", os.path.abspath(path)).strip("_")[-120:]
+
+
+def _read_json(model_name: str, filename: str) -> Any:
+    path = _model_file(model_name, filename)
+    if path is None:
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class OnnxEmbedder:
+    """
+    Sentence-transformers model exported to ONNX.
+
+    Exposes the parts of ``SentenceTransformer`` the app uses (``encode``
+    and ``tokenizer``) without importing torch. Pooling, normalization and
+    the maximum sequence length are read from the model's
+    sentence-transformers config, so embeddings match the torch model. With
+    ``quantize`` the ONNX graph's weights are dynamically quantized to int8
+    once and the quantized file is reused on later starts.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        onnx_path: str = "",
+        quantize: bool = False,
+        cache_dir: str = "./data/onnx",
+        num_threads: int = 0,
+    ):
+        """
+        Initialize ONNX Embedder.
+
+        Args:
+            model_name: HuggingFace model name or local model directory
+            onnx_path: Exported ONNX file ("" uses ``onnx/model.onnx`` from the model repo)
+            quantize: Quantize weights to int8 with ONNX Runtime dynamic quantization
+            cache_dir: Directory for the quantized model
+            num_threads: ONNX Runtime intra-op threads (0 uses all cores)
+        """
+        import onnxruntime as ort  # type: ignore[import]
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.model_path = onnx_path or _model_file(model_name, "onnx/model.onnx")
+        if not self.model_path or not os.path.exists(self.model_path):
+            raise FileNotFoundError(
+                f"No ONNX export found for {model_name}. Export one with: "
+                f"optimum-cli export onnx --model {model_name} <dir>, then set EMBEDDING_ONNX_PATH"
+            )
+        if quantize:
+            self.model_path = self._quantize(self.model_path, Path(cache_dir))
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        config = _read_json(model_name, "sentence_bert_config.json") or {}
+        self.max_seq_length = min(config.get("max_seq_length") or 512, self.tokenizer.model_max_length)
+        pooling = _read_json(model_name, "1_Pooling/config.json") or {}
+        self.pooling = "cls" if pooling.get("pooling_mode_cls_token") else "mean"
+        modules = _read_json(model_name, "modules.json") or []
+        self.normalize = any(m.get("type", "").endswith("Normalize") for m in modules)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+        self._inputs = {i.name for i in self.session.get_inputs()}
+        dimension = self.session.get_outputs()[0].shape[-1]
+        self.dimension = dimension if isinstance(dimension, int) else self._embed_batch(["dimension"]).shape[1]
+
+    @staticmethod
+    def _quantize(model_path: str, cache_dir: Path) -> str:
+        """Write (once) and return an int8 dynamically quantized copy of the model."""
+        from onnxruntime.quantization import QuantType, quantize_dynamic  # type: ignore[import]
+
+        target = cache_dir / f"{_slug(model_path)}.int8.onnx"
+        if not target.exists() or target.stat().st_mtime < os.path.getmtime(model_path):
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            logger.info(f"Quantizing {model_path} to int8...")
+            partial = target.with_suffix(".partial")
+            quantize_dynamic(str(model_path), str(partial), weight_type=QuantType.QInt8)
+            partial.replace(target)
+        return str(target)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        """Embedding dimension."""
+        return self.dimension
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Tokenize, run and pool one batch."""
+        encoded = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np"
+        )
+        feed = {name: encoded[name].astype(np.int64) for name in self._inputs if name in encoded}
+        if "token_type_ids" in self._inputs and "token_type_ids" not in feed:
+            feed["token_type_ids"] = np.zeros_like(feed["input_ids"])
+        hidden = self.session.run(None, feed)[0]
+
+        if self.pooling == "cls":
+            pooled = hidden[:, 0]
+        else:
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Embed texts.
+
+        Texts are sorted by length before batching so each batch pads to
+        similar lengths, as ``SentenceTransformer.encode`` does.
+
+        Args:
+            texts: Texts to embed
+            batch_size: Texts per forward pass
+
+        Returns:
+            (len(texts), dim) float32 array
+        """
+        order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+        output = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            output[batch] = self._embed_batch([texts[i] for i in batch])
+        return output
+
+
+def parity_check(candidate: Any, model_name: str, record_dir: Optional[str] = None) -> Optional[float]:
+    """
+    Compare an optimized model's embeddings of ``PARITY_TEXTS`` with the torch model's.
+
+    The result is recorded in ``record_dir`` against the candidate's model
+    file, so torch is only loaded again when that file changes.
+
+    Args:
+        candidate: ``OnnxEmbedder`` to check
+        model_name: sentence-transformers model to compare against
+        record_dir: Directory for the parity record (None always recomputes)
+
+    Returns:
+        Lowest cosine similarity between the two embeddings of a text, or
+        None if the torch model is unavailable
+    """
+    model_path = Path(candidate.model_path)
+    key = {"model": str(model_path.resolve()), "mtime": model_path.stat().st_mtime, "reference": model_name}
+    record = Path(record_dir) / f"{_slug(str(model_path))}.parity.json" if record_dir else None
+    if record is not None and record.exists():
+        try:
+            saved = json.loads(record.read_text(encoding="utf-8"))
+            if all(saved.get(k) == v for k, v in key.items()):
+                return float(saved["min_cosine"])
+        except (ValueError, KeyError, OSError):
+            pass
+
+    try:
+        from sentence_transformers import SentenceTransformer
+
+        reference = SentenceTransformer(model_name, device="cpu")
+    except ImportError:
+        logger.warning("sentence-transformers not installed; skipping embedding parity check")
+        return None
+    except Exception as e:
+        logger.error(f"Failed to load reference model for parity check: {e}")
+        return None
+
+    expected = np.asarray(reference.encode(PARITY_TEXTS), dtype=np.float32)
+    actual = np.asarray(candidate.encode(PARITY_TEXTS), dtype=np.float32)
+    norms = np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1)
+    min_cosine = float(((expected * actual).sum(axis=1) / np.clip(norms, 1e-12, None)).min())
+
+    if record is not None:
+        try:
+            record.parent.mkdir(parents=True, exist_ok=True)
+            record.write_text(json.dumps({**key, "min_cosine": min_cosine}), encoding="utf-8")
+        except OSError as e:
+            logger.warning(f"Could not save parity record: {e}")
+    return min_cosine
@@ -0,0 +1,183 @@
+"""Vector Quantization - Compact codes for first-pass similarity scans."""
+
+import logging
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per chunk so temporaries stay small on large namespaces
+SCORE_CHUNK_ROWS = 65536
+
+
+def _kmeans(data: np.ndarray, k: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    """Plain Lloyd's k-means; returns (k, dim) centroids."""
+    k = min(k, len(data))
+    centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        # ||x - c||^2 up to a per-row constant
+        distances = (centroids ** 2).sum(axis=1) - 2 * data @ centroids.T
+        assignment = distances.argmin(axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, data)
+        counts = np.bincount(assignment, minlength=k)
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        centroids[empty] = data[rng.integers(len(data), size=int(empty.sum()))]
+    return centroids
+
+
+class ScalarQuantizer:
+    """
+    Per-dimension 8-bit scalar quantizer.
+
+    Each dimension is mapped linearly from its observed [min, max] range
+    onto 0..255, giving a 4x reduction over float32.
+    """
+
+    def __init__(self, dimension: int):
+        """
+        Initialize Scalar Quantizer.
+
+        Args:
+            dimension: Embedding dimension
+        """
+        self.dimension = dimension
+        self.code_size = dimension
+        self.low: Optional[np.ndarray] = None
+        self.step: Optional[np.ndarray] = None
+
+    @property
+    def is_trained(self) -> bool:
+        return self.low is not None
+
+    def fit(self, vectors: np.ndarray):
+        """Learn per-dimension ranges from sample vectors."""
+        self.low = vectors.min(axis=0).astype(np.float32)
+        high = vectors.max(axis=0).astype(np.float32)
+        self.step = np.maximum(high - self.low, 1e-6) / 255.0
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Encode float vectors to uint8 codes."""
+        codes = np.rint((vectors - self.low) / self.step)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def score(self, codes: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """
+        Approximate dot products between queries and encoded vectors.
+
+        Args:
+            codes: (n, dimension) uint8 codes
+            queries: (q, dimension) float queries
+
+        Returns:
+            (q, n) approximate scores
+        """
+        offset = queries @ self.low
+        scaled = (queries * self.step).T
+        scores = np.empty((len(queries), len(codes)), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_CHUNK_ROWS):
+            chunk = codes[start:start + SCORE_CHUNK_ROWS].astype(np.float32)
+            scores[:, start:start + len(chunk)] = (chunk @ scaled).T
+        return scores + offset[:, None]
+
+
+class ProductQuantizer:
+    """
+    Product quantizer with 256 centroids per subspace.
+
+    The vector is split into ``subspaces`` equal slices, each encoded as
+    one byte, and scored with per-query lookup tables (asymmetric distance
+    computation). 96 subspaces on 384 dims is a 16x reduction.
+    """
+
+    def __init__(self, dimension: int, subspaces: int = 96, iterations: int = 15, seed: int = 0):
+        """
+        Initialize Product Quantizer.
+
+        Args:
+            dimension: Embedding dimension (must be divisible by subspaces)
+            subspaces: Number of one-byte sub-codes per vector
+            iterations: k-means iterations during training
+            seed: Random seed for k-means initialisation
+        """
+        if dimension % subspaces:
+            raise ValueError(f"Dimension {dimension} is not divisible by {subspaces} subspaces")
+        self.dimension = dimension
+        self.subspaces = subspaces
+        self.sub_dim = dimension // subspaces
+        self.code_size = subspaces
+        self.iterations = iterations
+        self.seed = seed
+        self.codebooks: Optional[np.ndarray] = None  # (subspaces, 256, sub_dim)
+
+    @property
+    def is_trained(self) -> bool:
+        return self.codebooks is not None
+
+    def _split(self, vectors: np.ndarray) -> np.ndarray:
+        return vectors.reshape(len(vectors), self.subspaces, self.sub_dim)
+
+    def fit(self, vectors: np.ndarray):
+        """Train one 256-centroid codebook per subspace."""
+        rng = np.random.default_rng(self.seed)
+        parts = self._split(vectors.astype(np.float32))
+        codebooks = np.zeros((self.subspaces, 256, self.sub_dim), dtype=np.float32)
+        for m in range(self.subspaces):
+            centroids = _kmeans(parts[:, m], 256, self.iterations, rng)
+            codebooks[m, : len(centroids)] = centroids
+        self.codebooks = codebooks
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Encode float vectors to (n, subspaces) uint8 codes."""
+        parts = self._split(vectors.astype(np.float32))
+        codes = np.empty((len(vectors), self.subspaces), dtype=np.uint8)
+        for m in range(self.subspaces):
+            book = self.codebooks[m]
+            distances = (book ** 2).sum(axis=1) - 2 * parts[:, m] @ book.T
+            codes[:, m] = distances.argmin(axis=1)
+        return codes
+
+    def score(self, codes: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """
+        Approximate dot products via per-query lookup tables.
+
+        Args:
+            codes: (n, subspaces) uint8 codes
+            queries: (q, dimension) float queries
+
+        Returns:
+            (q, n) approximate scores
+        """
+        # tables[q, m, c] = <query slice m, centroid c of subspace m>
+        tables = np.einsum("qms,mcs->qmc", self._split(queries.astype(np.float32)), self.codebooks)
+        scores = np.zeros((len(queries), len(codes)), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_CHUNK_ROWS):
+            chunk = np.ascontiguousarray(codes[start:start + SCORE_CHUNK_ROWS].T)
+            for q, table in enumerate(tables):
+                out = scores[q, start:start + chunk.shape[1]]
+                for m in range(self.subspaces):
+                    out += table[m][chunk[m]]
+        return scores
+
+
+def create_quantizer(kind: str, dimension: int, pq_subspaces: int = 96):
+    """
+    Build a quantizer by name.
+
+    Args:
+        kind: "none", "int8" or "pq"
+        dimension: Embedding dimension
+        pq_subspaces: Sub-codes per vector for product quantization
+
+    Returns:
+        Quantizer instance or None
+    """
+    if kind in ("", "none"):
+        return None
+    if kind == "int8":
+        return ScalarQuantizer(dimension)
+    if kind == "pq":
+        return ProductQuantizer(dimension, subspaces=pq_subspaces)
+    raise ValueError(f"Unknown quantization: {kind}")
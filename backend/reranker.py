@@ -0,0 +1,210 @@
+"""Reranker - Cross-encoder reranking of retrieved sources under a latency budget."""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CrossEncoderReranker:
+    """
+    Re-scores (query, passage) pairs with a small cross-encoder.
+
+    Uncached pairs are scored in one batch on a dedicated worker thread.
+    If the batch does not finish within the request's budget the sources
+    keep their retrieval order; the batch still completes in the background
+    and its scores are cached, so a repeated query is reranked for free.
+    While such a batch is still running, budgeted requests skip scoring
+    instead of queueing behind it.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        cache_size: int = 10000,
+        max_length: int = 512,
+        batch_size: int = 32,
+    ):
+        """
+        Initialize Cross-Encoder Reranker.
+
+        Args:
+            model_name: HuggingFace cross-encoder model name
+            cache_size: (query, passage) scores kept in the LRU cache
+            max_length: Maximum tokens per (query, passage) pair
+            batch_size: Pairs per forward pass
+        """
+        self.model_name = model_name
+        self.cache_size = cache_size
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self.model = None
+        self._cache: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reranker")
+        self._busy = False  # a batch is running on the worker
+
+
+        self.requests = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.cache_hits = 0
+        self.pairs_scored = 0
+        self.total_ms = 0.0
+
+        self._initialize_model()
+
+    def _initialize_model(self):
+        """Initialize the cross-encoder."""
+        try:
+            from sentence_transformers import CrossEncoder
+
+            logger.info(f"Loading reranker model: {self.model_name}...")
+            self.model = CrossEncoder(self.model_name, max_length=self.max_length, device="cpu")
+            logger.info("Reranker model loaded successfully!")
+
+        except ImportError:
+            logger.warning("sentence-transformers not installed. Install with: pip install sentence-transformers")
+            self.model = None
+        except Exception as e:
+            logger.error(f"Failed to initialize reranker model: {e}")
+            self.model = None
+
+    def warm_up(self) -> float:
+        """
+        Score one pair so the first request's budget is not spent on lazy initialization.
+
+        Returns:
+            Seconds taken (0.0 without a model)
+        """
+        if self.model is None:
+            return 0.0
+
+        try:
+            started = time.perf_counter()
+            self.model.predict([("warm-up", "warm-up")], show_progress_bar=False)
+            seconds = time.perf_counter() - started
+            logger.info(f"Reranker warm-up took {seconds:.2f}s")
+            return seconds
+
+        except Exception as e:
+            logger.error(f"Error warming up reranker: {e}")
+            return 0.0
+
+    @staticmethod
+    def _key(query: str, passage: str) -> str:
+        return hashlib.sha256(f"{query}\0{passage}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def passage(source: Dict[str, Any]) -> str:
+        """Text scored for a source: its title and chunk content."""
+        metadata = source.get("metadata", {})
+        return f"{metadata.get('title', '')}\n{metadata.get('content', '')}".strip()
+
+    def _score(self, query: str, keys: List[str], passages: List[str]) -> List[float]:
+        """Run the model on uncached pairs and cache the scores."""
+        try:
+            scores = self.model.predict(
+                [(query, p) for p in passages], batch_size=self.batch_size, show_progress_bar=False
+            )
+            scores = [float(s) for s in scores]
+        finally:
+            with self._lock:
+                self._busy = False
+        with self._lock:
+            self.pairs_scored += len(scores)
+            for key, score in zip(keys, scores):
+                self._cache[key] = score
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return scores
+
+    def rerank(
+        self, query: str, sources: List[Dict[str, Any]], top_k: int, budget_ms: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Order sources by cross-encoder relevance and keep the best ``top_k``.
+
+        Args:
+            query: User query
+            sources: Retrieved sources, best first
+            top_k: Sources to keep
+            budget_ms: Time allowed for scoring (None waits for the model)
+
+        Returns:
+            Top sources with a ``rerank_score``, or the first ``top_k`` in
+            retrieval order if the model is unavailable, busy with an earlier
+            over-budget batch, or over budget
+        """
+        if self.model is None or len(sources) <= 1:
+            return sources[:top_k]
+
+        started = time.perf_counter()
+        passages = [self.passage(source) for source in sources]
+        keys = [self._key(query, passage) for passage in passages]
+
+        scores: List[Optional[float]] = []
+        with self._lock:
+            self.requests += 1
+            for key in keys:
+                score = self._cache.get(key)
+                if score is not None:
+                    self._cache.move_to_end(key)
+                scores.append(score)
+        missing = [i for i, score in enumerate(scores) if score is None]
+        with self._lock:
+            self.cache_hits += len(sources) - len(missing)
+            skip = missing and budget_ms is not None and self._busy
+            if skip:
+                self.skipped += 1
+            elif missing:
+                self._busy = True
+        if skip:
+            logger.info("Reranker busy with an earlier batch; keeping retrieval order")
+            return sources[:top_k]
+
+        if missing:
+            future = self._executor.submit(self._score, query, [keys[i] for i in missing], [passages[i] for i in missing])
+            timeout = None if budget_ms is None else max(budget_ms / 1000.0 - (time.perf_counter() - started), 0.0)
+            try:
+                for i, score in zip(missing, future.result(timeout=timeout)):
+                    scores[i] = score
+            except FutureTimeoutError:
+                with self._lock:
+                    self.timeouts += 1
+                logger.info(f"Rerank exceeded {budget_ms:.0f}ms budget; keeping retrieval order")
+                return sources[:top_k]
+            except Exception as e:
+                logger.error(f"Error reranking sources: {e}")
+                return sources[:top_k]
+
+        order = sorted(range(len(sources)), key=lambda i: scores[i], reverse=True)[:top_k]
+        with self._lock:
+            self.total_ms += (time.perf_counter() - started) * 1000
+        return [{**sources[i], "rerank_score": scores[i]} for i in order]
+
+    def stats(self) -> Dict[str, Any]:
+        """Reranking counters."""
+        with self._lock:
+            completed = self.requests - self.timeouts - self.skipped
+            return {
+                "model": self.model_name,
+                "available": self.model is not None,
+                "requests": self.requests,
+                "timeouts": self.timeouts,
+                "skipped": self.skipped,
+                "cache_hits": self.cache_hits,
+                "pairs_scored": self.pairs_scored,
+                "cached_scores": len(self._cache),
+                "avg_ms": round(self.total_ms / completed, 1) if completed else 0.0,
+            }
+
+    def close(self):
+        """Stop the scoring worker."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
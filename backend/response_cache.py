@@ -0,0 +1,163 @@
+"""Response Cache - Reuses answers for semantically similar queries."""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Set
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticResponseCache:
+    """
+    Caches chat answers keyed by query embedding.
+
+    A lookup matches the closest stored query by cosine similarity and
+    returns its answer if the similarity clears ``threshold`` and the entry
+    has not expired. Entries are evicted LRU and dropped whenever a
+    knowledge entry they cite is updated or deleted.
+    """
+
+    def __init__(self, dimension: int = 384, threshold: float = 0.95, ttl_seconds: float = 3600, max_entries: int = 512):
+        """
+        Initialize Semantic Response Cache.
+
+        Args:
+            dimension: Embedding dimension
+            threshold: Minimum cosine similarity for a hit
+            ttl_seconds: Entry lifetime
+            max_entries: Maximum cached answers
+        """
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._matrix = np.zeros((max_entries, dimension), dtype=np.float32)
+        self._active = np.zeros(max_entries, dtype=bool)
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()  # slot -> entry, LRU order
+        self._by_knowledge_id: Dict[int, Set[int]] = {}
+        self._free = list(range(max_entries - 1, -1, -1))
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _drop(self, slot: int):
+        entry = self._entries.pop(slot)
+        self._active[slot] = False
+        self._free.append(slot)
+        for knowledge_id in entry["knowledge_ids"]:
+            slots = self._by_knowledge_id.get(knowledge_id)
+            if slots is not None:
+                slots.discard(slot)
+                if not slots:
+                    del self._by_knowledge_id[knowledge_id]
+
+    def lookup(self, query_embedding: List[float]) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached answer for a similar query.
+
+        Args:
+            query_embedding: Query embedding vector
+
+        Returns:
+            Dict with response, sources, confidence and similarity, or None
+        """
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+
+        with self._lock:
+            if not self._entries:
+                self.misses += 1
+                return None
+
+            scores = np.where(self._active, self._matrix @ query, -np.inf)
+            slot = int(np.argmax(scores))
+            if scores[slot] < self.threshold:
+                self.misses += 1
+                return None
+
+            entry = self._entries[slot]
+            if time.monotonic() - entry["created_at"] > self.ttl_seconds:
+                self._drop(slot)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(slot)
+            self.hits += 1
+            return {
+                "response": entry["response"],
+                "sources": entry["sources"],
+                "confidence": entry["confidence"],
+                "similarity": float(scores[slot]),
+            }
+
+    def store(self, query_embedding: List[float], response: str, sources: List[Dict[str, Any]], confidence: float):
+        """
+        Cache an answer.
+
+        Args:
+            query_embedding: Query embedding vector
+            response: Generated answer
+            sources: Retrieved sources cited by the answer
+            confidence: Response confidence score
+        """
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        knowledge_ids = {s["metadata"]["id"] for s in sources if s.get("metadata", {}).get("id") is not None}
+
+        with self._lock:
+            if not self._free:
+                self._drop(next(iter(self._entries)))
+            slot = self._free.pop()
+            self._matrix[slot] = query
+            self._active[slot] = True
+            self._entries[slot] = {
+                "response": response,
+                "sources": sources,
+                "confidence": confidence,
+                "knowledge_ids": knowledge_ids,
+                "created_at": time.monotonic(),
+            }
+            for knowledge_id in knowledge_ids:
+                self._by_knowledge_id.setdefault(knowledge_id, set()).add(slot)
+
+    def invalidate_entry(self, knowledge_id: int) -> int:
+        """
+        Drop cached answers that cite a knowledge entry.
+
+        Args:
+            knowledge_id: Knowledge entry ID
+
+        Returns:
+            Number of answers dropped
+        """
+        with self._lock:
+            slots = list(self._by_knowledge_id.get(knowledge_id, ()))
+            for slot in slots:
+                self._drop(slot)
+            self.invalidations += len(slots)
+        if slots:
+            logger.info(f"Invalidated {len(slots)} cached responses citing entry {knowledge_id}")
+        return len(slots)
+
+    def clear(self):
+        """Drop every cached answer."""
+        with self._lock:
+            for slot in list(self._entries):
+                self._drop(slot)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,289 @@
+"""Session Store - Per-conversation transcripts and llama.cpp KV state for multi-turn chat."""
+
+import asyncio
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def state_size(state: Any) -> int:
+    """Approximate bytes held by a llama.cpp ``LlamaState``."""
+    size = getattr(state, "llama_state_size", 0) or 0
+    for field in ("input_ids", "scores"):
+        size += getattr(getattr(state, field, None), "nbytes", 0)
+    return size
+
+
+class ChatSession:
+    """
+    One conversation: the turns in its transcript and the KV state after the last turn.
+
+    Turns are kept as query and answer only; the context retrieved for a
+    turn is part of that turn's prompt but not of the transcript.
+    """
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.turns: List[Dict[str, Any]] = []
+        self.tokens = 0
+        self.state: Any = None
+        self.state_bytes = 0
+        self.state_path: Optional[Path] = None
+        self.last_used = time.time()
+        self.lock = asyncio.Lock()  # one turn at a time per conversation
+
+    def history(self) -> str:
+        """Transcript text that follows the prompt prefix."""
+        return "".join(turn["text"] for turn in self.turns)
+
+
+class SessionStore:
+    """
+    Keeps chat sessions so each turn only evaluates the new tokens.
+
+    A session's KV state is saved after every turn and restored before the
+    next, so llama.cpp reuses the transcript up to the previous turn and
+    prefills only that turn's query and answer plus the new turn. Retrieved
+    context is left out of the transcript, so it does not count against
+    ``max_history_tokens``. States live in a memory-bounded LRU; the least
+    recently used are pickled to disk and loaded back on their next turn.
+    When the transcript exceeds ``max_history_tokens`` the oldest turns are
+    evicted down to half the budget and the state is dropped; the following
+    turn then prefills the shortened transcript once.
+
+    States are pickled outside the store lock, which ``get`` takes on the
+    event loop: a spill detaches the state under the lock, writes it
+    without the lock, and re-takes it to record the file, unless the
+    session moved on in the meantime.
+    """
+
+    def __init__(
+        self,
+        count_tokens: Callable[[str], int],
+        max_history_tokens: int = 768,
+        max_memory_bytes: int = 1 << 30,
+        disk_dir: Optional[str] = None,
+        max_disk_bytes: int = 8 << 30,
+        ttl_seconds: float = 3600,
+        max_sessions: int = 256,
+    ):
+        """
+        Initialize Session Store.
+
+        Args:
+            count_tokens: Counts tokens with the LLM's tokenizer
+            max_history_tokens: Transcript size that triggers compaction
+            max_memory_bytes: Memory budget for KV states
+            disk_dir: Directory for spilled KV states (None drops them instead)
+            max_disk_bytes: Disk budget for spilled KV states
+            ttl_seconds: Idle time after which a session is discarded
+            max_sessions: Sessions kept before the least recently used is discarded
+        """
+        self.count_tokens = count_tokens
+        self.max_history_tokens = max_history_tokens
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._spilling: Dict[str, Any] = {}  # session id -> state being written to disk
+        self._spill_seq = 0
+        self._lock = threading.Lock()
+
+        self.compactions = 0
+        self.spills = 0
+        self.disk_loads = 0
+
+        if self.disk_dir is not None:
+            try:
+                self.disk_dir.mkdir(parents=True, exist_ok=True)
+                for stale in self.disk_dir.glob("*.state"):  # sessions do not survive restarts
+                    stale.unlink()
+            except OSError as e:
+                logger.error(f"Session spill directory unavailable, states will be dropped instead: {e}")
+                self.disk_dir = None
+
+    def get(self, session_id: str) -> ChatSession:
+        """Get a session, creating it if it does not exist or has expired."""
+        with self._lock:
+            now = time.time()
+            for expired in [s for s in self._sessions.values() if now - s.last_used > self.ttl_seconds]:
+                self._discard(expired)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = ChatSession(session_id)
+                self._sessions[session_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._discard(next(iter(self._sessions.values())))
+            self._sessions.move_to_end(session_id)
+            session.last_used = now
+            return session
+
+    def delete(self, session_id: str) -> bool:
+        """Discard a session; returns whether it existed."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._discard(session)
+            return session is not None
+
+    def load_state(self, session: ChatSession) -> Any:
+        """
+        KV state saved after the session's last turn.
+
+        Args:
+            session: Chat session
+
+        Returns:
+            ``LlamaState`` or None if there is none (the transcript is then prefilled)
+        """
+        with self._lock:
+            spilling = self._spilling.pop(session.id, None)
+            if spilling is not None:
+                # Still being written; keep it in memory and let the write be discarded
+                victims = self._keep(session, spilling)
+            elif session.state is not None or session.state_path is None:
+                return session.state
+            else:
+                path = session.state_path
+        if spilling is not None:
+            self._write_spills(victims)
+            return spilling
+
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load spilled session state: {e}")
+            state = None
+        victims = []
+        with self._lock:
+            self._drop_state(session)
+            if state is not None:
+                self.disk_loads += 1
+                victims = self._keep(session, state)
+        self._write_spills(victims)
+        return state
+
+    def record_turn(self, session: ChatSession, text: str, state: Any):
+        """
+        Append a finished turn and store the KV state that follows it.
+
+        Args:
+            session: Chat session
+            text: The turn's query and answer, as the next prompt's transcript repeats it
+            state: KV state after generation (None if unavailable)
+        """
+        turn = {"text": text, "tokens": self.count_tokens(text)}
+        victims = []
+        with self._lock:
+            session.turns.append(turn)
+            session.tokens += turn["tokens"]
+            self._drop_state(session)
+            if session.tokens > self.max_history_tokens:
+                self._compact(session)
+            elif state is not None and session.id in self._sessions:
+                victims = self._keep(session, state)
+        self._write_spills(victims)
+
+    def _compact(self, session: ChatSession):
+        """Evict the oldest turns down to half the budget."""
+        while len(session.turns) > 1 and sum(t["tokens"] for t in session.turns) > self.max_history_tokens // 2:
+            session.turns.pop(0)
+        session.tokens = sum(t["tokens"] for t in session.turns)
+        self.compactions += 1
+
+    def _keep(self, session: ChatSession, state: Any) -> List[Tuple[ChatSession, Any]]:
+        """
+        Hold a state in memory, detaching least recently used states over budget.
+
+        Returns:
+            (session, state) pairs to pass to ``_write_spills`` once the lock is released
+        """
+        session.state, session.state_bytes = state, state_size(state)
+        self._memory_bytes += session.state_bytes
+        victims = []
+        for other in list(self._sessions.values()):
+            if self._memory_bytes <= self.max_memory_bytes:
+                break
+            if other.state is not None:
+                victims.append((other, other.state))
+                self._memory_bytes -= other.state_bytes
+                other.state, other.state_bytes = None, 0
+                if self.disk_dir is not None:
+                    self._spilling[other.id] = victims[-1][1]
+        return victims
+
+    def _write_spills(self, victims: List[Tuple[ChatSession, Any]]):
+        """Pickle detached states to disk without holding the lock (drops them without a spill directory)."""
+        if self.disk_dir is None:
+            return
+        for session, state in victims:
+            with self._lock:
+                self._spill_seq += 1
+                path = self.disk_dir / f"{session.id}.{self._spill_seq}.state"
+            try:
+                with open(path, "wb") as f:
+                    pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception as e:
+                logger.error(f"Failed to spill session state: {e}")
+                with self._lock:
+                    if self._spilling.get(session.id) is state:
+                        del self._spilling[session.id]
+                path.unlink(missing_ok=True)
+                continue
+
+            with self._lock:
+                if self._spilling.get(session.id) is not state or self._sessions.get(session.id) is not session:
+                    # Loaded back, replaced by a newer turn or discarded while it was written
+                    path.unlink(missing_ok=True)
+                    continue
+                del self._spilling[session.id]
+                session.state_path = path
+                self._disk_bytes += path.stat().st_size
+                self.spills += 1
+                for other in list(self._sessions.values()):
+                    if self._disk_bytes <= self.max_disk_bytes:
+                        break
+                    if other.state_path is not None:
+                        self._drop_state(other)
+
+    def _drop_state(self, session: ChatSession):
+        """Forget a session's state in memory and on disk."""
+        self._memory_bytes -= session.state_bytes
+        session.state, session.state_bytes = None, 0
+        self._spilling.pop(session.id, None)
+        if session.state_path is not None:
+            try:
+                self._disk_bytes -= session.state_path.stat().st_size
+                session.state_path.unlink()
+            except OSError:
+                pass
+            session.state_path = None
+
+    def _discard(self, session: ChatSession):
+        self._drop_state(session)
+        del self._sessions[session.id]
+
+    def stats(self) -> Dict[str, Any]:
+        """Session counters."""
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "states_in_memory": sum(1 for s in self._sessions.values() if s.state is not None),
+                "states_on_disk": sum(1 for s in self._sessions.values() if s.state_path is not None),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+                "compactions": self.compactions,
+                "spills": self.spills,
+                "disk_loads": self.disk_loads,
+            }
@@ -0,0 +1,162 @@
+"""Speculative Decoding - Draft models for llama.cpp speculative generation."""
+
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class GGUFDraftModel:
+    """
+    Drafts tokens greedily with a small GGUF model sharing the main model's vocabulary.
+
+    The draft model keeps its own context and only evaluates the tokens
+    that differ from its previous call, so drafting costs a few small
+    forward passes per round.
+    """
+
+    def __init__(self, model_path: str, num_pred_tokens: int = 10, context_window: int = 2048):
+        """
+        Initialize GGUF Draft Model.
+
+        Args:
+            model_path: Path to the draft GGUF model file
+            num_pred_tokens: Tokens drafted per round
+            context_window: Context window size (match the main model)
+        """
+        from llama_cpp import Llama  # type: ignore[import]
+
+        self.num_pred_tokens = num_pred_tokens
+        self.model = Llama(
+            model_path=model_path,
+            n_ctx=context_window,
+            n_threads=os.cpu_count() or 4,
+            verbose=False,
+        )
+
+    def __call__(self, input_ids: np.ndarray, /, **kwargs: Any) -> np.ndarray:
+        model = self.model
+        ids = input_ids.tolist()
+        cached = model.input_ids[: model.n_tokens].tolist()
+        common = 0
+        for a, b in zip(cached, ids):
+            if a != b:
+                break
+            common += 1
+        common = min(common, len(ids) - 1)  # re-evaluate at least the last token for fresh logits
+        model.n_tokens = common
+        model._ctx.kv_cache_seq_rm(-1, common, -1)
+        model.eval(ids[common:])
+
+        draft = []
+        room = model.n_ctx() - model.n_tokens
+        for _ in range(min(self.num_pred_tokens, room)):
+            token = int(np.argmax(model.scores[model.n_tokens - 1]))
+            if token == model.token_eos():
+                break
+            draft.append(token)
+            model.eval([token])
+        return np.array(draft, dtype=np.intc)
+
+
+class CountingDraftModel:
+    """
+    Wraps a draft model and measures how many drafted tokens are accepted.
+
+    llama.cpp commits the accepted draft tokens plus one sampled token
+    between consecutive draft calls, so acceptance is read from how far the
+    input advanced since the previous call.
+    """
+
+    def __init__(self, draft_model: Any):
+        """
+        Initialize Counting Draft Model.
+
+        Args:
+            draft_model: Callable returning draft tokens for the input so far
+        """
+        self.draft_model = draft_model
+        self.rounds = 0
+        self.drafted = 0
+        self.accepted = 0
+        self._previous: Optional[tuple] = None  # (input length, drafted tokens) of the last call
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Start a new generation; the last round of the previous one is not measured."""
+        self._previous = None
+
+    def __call__(self, input_ids: np.ndarray, /, **kwargs: Any) -> np.ndarray:
+        draft = self.draft_model(input_ids, **kwargs)
+        with self._lock:
+            if self._previous is not None:
+                length, drafted = self._previous
+                advanced = len(input_ids) - length
+                if advanced >= 1:
+                    self.rounds += 1
+                    self.drafted += drafted
+                    self.accepted += min(advanced - 1, drafted)
+            self._previous = (len(input_ids), len(draft))
+        return draft
+
+    def stats(self) -> Dict[str, Any]:
+        """Acceptance counters over measured rounds."""
+        with self._lock:
+            return {
+                "rounds": self.rounds,
+                "drafted_tokens": self.drafted,
+                "accepted_tokens": self.accepted,
+                "acceptance_rate": round(self.accepted / self.drafted, 4) if self.drafted else 0.0,
+                "accepted_per_round": round(self.accepted / self.rounds, 2) if self.rounds else 0.0,
+            }
+
+
+def create_draft_model(
+    mode: str,
+    num_pred_tokens: int = 10,
+    max_ngram_size: int = 2,
+    draft_model_path: str = "",
+    context_window: int = 2048,
+) -> Optional[CountingDraftModel]:
+    """
+    Build the draft model for a speculative decoding mode.
+
+    Args:
+        mode: "none", "prompt_lookup" (n-gram matches in the prompt, e.g. the
+            retrieved context) or "draft_model" (a small GGUF model)
+        num_pred_tokens: Tokens drafted per round
+        max_ngram_size: Longest n-gram matched for prompt lookup
+        draft_model_path: GGUF file for the "draft_model" mode
+        context_window: Context window size
+
+    Returns:
+        Counting draft model, or None when disabled or unavailable
+    """
+    if mode == "none":
+        return None
+    try:
+        if mode == "prompt_lookup":
+            from llama_cpp.llama_speculative import LlamaPromptLookupDecoding  # type: ignore[import]
+
+            draft = LlamaPromptLookupDecoding(max_ngram_size=max_ngram_size, num_pred_tokens=num_pred_tokens)
+        elif mode == "draft_model":
+            if not os.path.exists(draft_model_path):
+                logger.warning(f"Draft model not found at {draft_model_path}; speculative decoding disabled")
+                return None
+            draft = GGUFDraftModel(draft_model_path, num_pred_tokens=num_pred_tokens, context_window=context_window)
+        else:
+            logger.warning(f"Unknown speculative decoding mode '{mode}'; disabled")
+            return None
+    except ImportError:
+        logger.warning("Speculative decoding needs llama-cpp-python >= 0.2.34; disabled")
+        return None
+    except Exception as e:
+        logger.error(f"Failed to initialize speculative decoding: {e}")
+        return None
+
+    logger.info(f"Speculative decoding enabled ({mode}, {num_pred_tokens} tokens per round)")
+    return CountingDraftModel(draft)
@@ -0,0 +1,445 @@
+"""SQLite Knowledge Base - Knowledge storage on SQLite with FTS5 search."""
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from bm25_index import TOKEN_PATTERN
+from metadata_filter import matches
+
+logger = logging.getLogger(__name__)
+
+# Stays under SQLite's default bound-parameter limit
+MAX_QUERY_PARAMS = 900
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    category TEXT NOT NULL DEFAULT 'general',
+    tags TEXT NOT NULL DEFAULT '[]',
+    source TEXT,
+    created_at TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_entries_category ON entries(category);
+
+CREATE TABLE IF NOT EXISTS entry_tags (
+    tag TEXT NOT NULL,
+    entry_id INTEGER NOT NULL REFERENCES entries(id) ON DELETE CASCADE,
+    PRIMARY KEY (tag, entry_id)
+) WITHOUT ROWID;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    title, content, tags, content='entries', content_rowid='id'
+);
+
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts(rowid, title, content, tags) VALUES (new.id, new.title, new.content, new.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, title, content, tags) VALUES ('delete', old.id, old.title, old.content, old.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_au AFTER UPDATE ON entries BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, title, content, tags) VALUES ('delete', old.id, old.title, old.content, old.tags);
+    INSERT INTO entries_fts(rowid, title, content, tags) VALUES (new.id, new.title, new.content, new.tags);
+END;
+"""
+
+COLUMNS = ("title", "content", "category", "tags", "source")
+
+
+def _row_to_entry(row: sqlite3.Row) -> Dict[str, Any]:
+    entry = dict(row)
+    entry["tags"] = json.loads(entry["tags"])
+    return entry
+
+
+def _fts_terms(query: str) -> List[str]:
+    """
+    The query's BM25 terms as FTS5 phrases.
+
+    FTS5 splits compounds such as "ERR-1042" into words, so they become
+    phrases of their parts, matching them the way ``bm25_index.tokenize`` does.
+    """
+    phrases = []
+    for token in dict.fromkeys(TOKEN_PATTERN.findall(query.lower())):
+        words = re.findall(r"[^\W_]+", token)
+        if words:
+            phrases.append('"' + " ".join(words) + '"')
+    return phrases
+
+
+def _fts_all_terms(query: str) -> str:
+    """FTS5 query matching every term of the query, like the JSON backend's search."""
+    return " AND ".join(_fts_terms(query))
+
+
+def _fts_any_terms(query: str) -> str:
+    """FTS5 query matching any of the query's terms."""
+    return " OR ".join(_fts_terms(query))
+
+
+class SQLiteKnowledgeBase:
+    """
+    Knowledge base stored in SQLite (WAL mode).
+
+    Drop-in alternative to ``KnowledgeBase``: point lookups use the primary
+    key, category and tag lookups use indexes, and ``search_entries`` is
+    served by an FTS5 index ranked with BM25. Each thread gets its own
+    connection, so readers run concurrently with the single writer.
+    """
+
+    def __init__(self, file_path: str):
+        """
+        Initialize SQLite Knowledge Base.
+
+        Args:
+            file_path: Path to the SQLite database file
+        """
+        self.file_path = Path(file_path)
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        """Connection owned by the calling thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.file_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._connections.append(conn)
+        return conn
+
+    def _set_tags(self, conn: sqlite3.Connection, entry_id: int, tags: List[str]):
+        conn.execute("DELETE FROM entry_tags WHERE entry_id = ?", (entry_id,))
+        conn.executemany(
+            "INSERT OR IGNORE INTO entry_tags (tag, entry_id) VALUES (?, ?)",
+            [(tag, entry_id) for tag in tags],
+        )
+
+    def add_entry(
+        self,
+        title: str,
+        content: str,
+        category: str = "general",
+        tags: Optional[List[str]] = None,
+        source: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Add a knowledge entry.
+
+        Args:
+            title: Entry title
+            content: Entry content
+            category: Entry category
+            tags: List of tags
+            source: Source of the entry
+
+        Returns:
+            Created entry
+        """
+        now = datetime.now().isoformat()
+        tags = tags or []
+        conn = self._conn()
+        with self._write_lock, conn:
+            cursor = conn.execute(
+                "INSERT INTO entries (title, content, category, tags, source, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (title, content, category, json.dumps(tags), source, now, now),
+            )
+            entry_id = cursor.lastrowid
+            self._set_tags(conn, entry_id, tags)
+
+        logger.info(f"Added knowledge entry: {title}")
+        return {
+            "id": entry_id,
+            "title": title,
+            "content": content,
+            "category": category,
+            "tags": tags,
+            "source": source,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+    def add_entries(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Add several knowledge entries in one transaction.
+
+        Args:
+            items: Dicts of ``add_entry`` arguments
+
+        Returns:
+            Created entries, in input order
+        """
+        now = datetime.now().isoformat()
+        entries = []
+        conn = self._conn()
+        with self._write_lock, conn:
+            for item in items:
+                tags = item.get("tags") or []
+                entry = {
+                    "title": item["title"],
+                    "content": item["content"],
+                    "category": item.get("category") or "general",
+                    "tags": tags,
+                    "source": item.get("source"),
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                cursor = conn.execute(
+                    "INSERT INTO entries (title, content, category, tags, source, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (entry["title"], entry["content"], entry["category"], json.dumps(tags), entry["source"], now, now),
+                )
+                entry = {"id": cursor.lastrowid, **entry}
+                self._set_tags(conn, entry["id"], tags)
+                entries.append(entry)
+        logger.info(f"Added {len(entries)} knowledge entries")
+        return entries
+
+    def is_pristine(self) -> bool:
+        """Whether no entry has ever been added (deleting every entry does not count)."""
+        row = self._conn().execute("SELECT 1 FROM sqlite_sequence WHERE name = 'entries'").fetchone()
+        return row is None
+
+    def last_entry_id(self) -> int:
+        """Highest ID handed out so far, including deleted entries (0 if none)."""
+        row = self._conn().execute("SELECT seq FROM sqlite_sequence WHERE name = 'entries'").fetchone()
+        return row[0] if row else 0
+
+    def import_entries(self, entries: List[Dict[str, Any]], next_id: int = 1) -> int:
+        """
+        Copy entries from another knowledge base, keeping their IDs and timestamps.
+
+        Args:
+            entries: Complete entries
+            next_id: First ID to hand out afterwards (IDs of deleted entries are not reused)
+
+        Returns:
+            Number of entries imported
+        """
+        conn = self._conn()
+        with self._write_lock, conn:
+            for entry in entries:
+                tags = entry.get("tags") or []
+                conn.execute(
+                    "INSERT INTO entries (id, title, content, category, tags, source, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        entry["id"],
+                        entry["title"],
+                        entry["content"],
+                        entry.get("category") or "general",
+                        json.dumps(tags),
+                        entry.get("source"),
+                        entry.get("created_at"),
+                        entry.get("updated_at"),
+                    ),
+                )
+                self._set_tags(conn, entry["id"], tags)
+            last_id = max([next_id - 1, *(entry["id"] for entry in entries)])
+            if last_id > 0:
+                conn.execute("DELETE FROM sqlite_sequence WHERE name = 'entries'")
+                conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('entries', ?)", (last_id,))
+        logger.info(f"Imported {len(entries)} knowledge entries")
+        return len(entries)
+
+    def update_entry(self, entry_id: int, **kwargs) -> Optional[Dict[str, Any]]:
+        """
+        Update a knowledge entry.
+
+        Args:
+            entry_id: Entry ID
+            **kwargs: Fields to update
+
+        Returns:
+            Updated entry
+        """
+        # None means "not given" (title, content and category cannot be NULL)
+        kwargs = {k: v for k, v in kwargs.items() if v is not None}
+        fields = {k: v for k, v in kwargs.items() if k in COLUMNS}
+        if "tags" in fields:
+            fields["tags"] = json.dumps(fields["tags"])
+        fields["updated_at"] = datetime.now().isoformat()
+
+        conn = self._conn()
+        with self._write_lock, conn:
+            assignments = ", ".join(f"{name} = ?" for name in fields)
+            cursor = conn.execute(f"UPDATE entries SET {assignments} WHERE id = ?", (*fields.values(), entry_id))
+            if cursor.rowcount and "tags" in kwargs:
+                self._set_tags(conn, entry_id, kwargs["tags"])
+
+        if not cursor.rowcount:
+            logger.warning(f"Entry not found: {entry_id}")
+            return None
+
+        logger.info(f"Updated knowledge entry: {entry_id}")
+        return self.get_entry(entry_id)
+
+    def delete_entry(self, entry_id: int) -> bool:
+        """
+        Delete a knowledge entry.
+
+        Args:
+            entry_id: Entry ID
+
+        Returns:
+            Success status
+        """
+        conn = self._conn()
+        with self._write_lock, conn:
+            cursor = conn.execute("DELETE FROM entries WHERE id = ?", (entry_id,))
+
+        if cursor.rowcount:
+            logger.info(f"Deleted knowledge entry: {entry_id}")
+            return True
+
+        logger.warning(f"Entry not found: {entry_id}")
+        return False
+
+    def get_entry(self, entry_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get a knowledge entry.
+
+        Args:
+            entry_id: Entry ID
+
+        Returns:
+            Entry or None
+        """
+        row = self._conn().execute("SELECT * FROM entries WHERE id = ?", (entry_id,)).fetchone()
+        return _row_to_entry(row) if row else None
+
+    def get_entries(self, entry_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Get several knowledge entries with one query per batch of IDs.
+
+        Args:
+            entry_ids: Entry IDs
+
+        Returns:
+            Mapping of ID to entry for the IDs that exist
+        """
+        entries: Dict[int, Dict[str, Any]] = {}
+        ids = list(dict.fromkeys(entry_ids))
+        for start in range(0, len(ids), MAX_QUERY_PARAMS):
+            batch = ids[start:start + MAX_QUERY_PARAMS]
+            placeholders = ",".join("?" * len(batch))
+            for row in self._conn().execute(f"SELECT * FROM entries WHERE id IN ({placeholders})", batch):
+                entry = _row_to_entry(row)
+                entries[entry["id"]] = entry
+        return entries
+
+    def search_entries(self, query: str, category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Full-text search over title, content and tags.
+
+        Args:
+            query: Search query
+            category: Filter by category
+
+        Returns:
+            Entries containing every query term, best BM25 match first
+        """
+        sql = (
+            "SELECT e.* FROM entries_fts JOIN entries e ON e.id = entries_fts.rowid "
+            "WHERE entries_fts MATCH ?"
+        )
+        match = _fts_all_terms(query)
+        if not match:
+            return []
+        params: List[Any] = [match]
+        if category:
+            sql += " AND e.category = ?"
+            params.append(category)
+        sql += " ORDER BY entries_fts.rank"
+
+        try:
+            rows = self._conn().execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            logger.error(f"Error searching knowledge base: {e}")
+            return []
+        return [_row_to_entry(row) for row in rows]
+
+    def lexical_search(self, query: str, top_k: int = 10, filter: Optional[Dict[str, Any]] = None) -> List[tuple]:
+        """
+        Rank entries by BM25 against any of the query terms.
+
+        Args:
+            query: Search query
+            top_k: Maximum results
+            filter: Metadata filter on entry fields (same syntax as vector search)
+
+        Returns:
+            List of (entry, score), best first
+        """
+        match = _fts_any_terms(query)
+        if not match:
+            return []
+        try:
+            cursor = self._conn().execute(
+                "SELECT e.*, -bm25(entries_fts) AS score FROM entries_fts JOIN entries e ON e.id = entries_fts.rowid "
+                "WHERE entries_fts MATCH ? ORDER BY entries_fts.rank LIMIT ?",
+                (match, -1 if filter else top_k),
+            )
+            results = []
+            for row in cursor:
+                entry = _row_to_entry(row)
+                score = entry.pop("score")
+                if filter and not matches(entry, filter):
+                    continue
+                results.append((entry, score))
+                if len(results) == top_k:
+                    break
+        except sqlite3.OperationalError as e:
+            logger.error(f"Error searching knowledge base: {e}")
+            return []
+        return results
+
+    def get_all_entries(self) -> List[Dict[str, Any]]:
+        """Get all knowledge entries."""
+        rows = self._conn().execute("SELECT * FROM entries ORDER BY id").fetchall()
+        return [_row_to_entry(row) for row in rows]
+
+    def get_entries_by_category(self, category: str) -> List[Dict[str, Any]]:
+        """Get entries by category."""
+        rows = self._conn().execute("SELECT * FROM entries WHERE category = ? ORDER BY id", (category,)).fetchall()
+        return [_row_to_entry(row) for row in rows]
+
+    def get_entries_by_tag(self, tag: str) -> List[Dict[str, Any]]:
+        """Get entries carrying a tag."""
+        rows = self._conn().execute(
+            "SELECT e.* FROM entry_tags t JOIN entries e ON e.id = t.entry_id WHERE t.tag = ? ORDER BY e.id",
+            (tag,),
+        ).fetchall()
+        return [_row_to_entry(row) for row in rows]
+
+    def flush(self):
+        """No-op: WAL commits survive a process crash once they return."""
+
+    def close(self):
+        """Close every per-thread connection."""
+        for conn in self._connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        self._connections.clear()
+        self._local = threading.local()
@@ -1,16 +1,29 @@
-"""Vector Database Manager - Handles Pinecone integration."""
+"""Vector Database Manager - Handles Pinecone and local vector store integration."""
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 import json
 
 logger = logging.getLogger(__name__)
 
+# Pinecone rejects upsert requests over 2 MB; stay well below it
+MAX_UPSERT_REQUEST_BYTES = 1_500_000
+
 
 class VectorDBManager:
-    """Manages Pinecone vector database operations."""
+    """Manages vector database operations on Pinecone or a local in-process store."""
 
-    def __init__(self, api_key: str, environment: str, index_name: str):
+    def __init__(
+        self,
+        api_key: str,
+        environment: str,
+        index_name: str,
+        backend: str = "auto",
+        dimension: int = 384,
+        local_store_path: Optional[str] = None,
+        local_store_options: Optional[Dict[str, Any]] = None,
+    ):
         """
         Initialize Vector DB Manager.
 
@@ -18,15 +31,38 @@ class VectorDBManager:
             api_key: Pinecone API key
             environment: Pinecone environment
             index_name: Index name
+            backend: "pinecone", "local", or "auto" (Pinecone when a key is configured, else local)
+            dimension: Embedding dimension
+            local_store_path: Directory used to persist the local store
+            local_store_options: Extra keyword arguments for ``LocalVectorStore`` (index type, HNSW tuning, quantization)
         """
         self.api_key = api_key
         self.environment = environment
         self.index_name = index_name
+        self.backend = backend
+        self.dimension = dimension
+        self.local_store_path = local_store_path
+        self.local_store_options = local_store_options or {}
         self.index = None
-        self._initialize_pinecone()
+
+        if backend == "local" or (backend == "auto" and not api_key):
+            self._initialize_local()
+        else:
+            self._initialize_pinecone()
+
+    def _initialize_local(self):
+        """Initialize the in-process NumPy vector store."""
+        from local_vector_store import LocalVectorStore
+
+        self.backend = "local"
+        self.index = LocalVectorStore(
+            dimension=self.dimension, persist_path=self.local_store_path, **self.local_store_options
+        )
+        logger.info(f"✅ Using local vector store ({self.index.index_type})")
 
     def _initialize_pinecone(self):
         """Initialize Pinecone connection."""
+        self.backend = "pinecone"
         if not self.api_key:
             logger.warning("Pinecone API key not configured")
             self.index = None
@@ -48,7 +84,7 @@ class VectorDBManager:
                 try:
                     pc.create_index(
                         name=self.index_name,
-                        dimension=384,  # Dimension for all-MiniLM-L6-v2
+                        dimension=self.dimension,
                         metric="cosine",
                         spec={"serverless": {"cloud": "aws", "region": "us-east-1"}}
                     )
@@ -68,7 +104,7 @@ class VectorDBManager:
 
     def upsert_vectors(self, vectors: List[tuple], namespace: str = "knowledge") -> bool:
         """
-        Upsert vectors to Pinecone.
+        Upsert vectors to the vector store.
 
         Args:
             vectors: List of (id, embedding, metadata) tuples
@@ -78,7 +114,7 @@ class VectorDBManager:
             Success status
         """
         if self.index is None:
-            logger.warning("Pinecone index not available")
+            logger.warning("Vector index not available")
             return False
 
         try:
@@ -90,27 +126,98 @@ class VectorDBManager:
             logger.error(f"Error upserting vectors: {e}")
             return False
 
+    def _upsert_chunks(self, vectors: List[tuple], max_vectors: int) -> List[List[tuple]]:
+        """Split vectors into requests bounded by count and estimated payload size."""
+        chunks: List[List[tuple]] = []
+        chunk: List[tuple] = []
+        chunk_bytes = 0
+        for vector in vectors:
+            # ~12 bytes per serialised float plus the metadata JSON
+            size = 12 * len(vector[1]) + len(json.dumps(vector[2] if len(vector) > 2 else {}, default=str))
+            if chunk and (len(chunk) >= max_vectors or chunk_bytes + size > MAX_UPSERT_REQUEST_BYTES):
+                chunks.append(chunk)
+                chunk, chunk_bytes = [], 0
+            chunk.append(vector)
+            chunk_bytes += size
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def upsert_vectors_chunked(
+        self, vectors: List[tuple], namespace: str = "knowledge", chunk_size: int = 100, workers: int = 4
+    ) -> List[str]:
+        """
+        Upsert many vectors in size-limited requests sent in parallel.
+
+        The local backend takes the whole batch in one call.
+
+        Args:
+            vectors: List of (id, embedding, metadata) tuples
+            namespace: Namespace for vectors
+            chunk_size: Maximum vectors per request
+            workers: Concurrent requests
+
+        Returns:
+            IDs of vectors that could not be upserted
+        """
+        if self.index is None:
+            logger.warning("Vector index not available")
+            return [vector[0] for vector in vectors]
+        if not vectors:
+            return []
+
+        if self.backend == "local":
+            chunks = [vectors]
+        else:
+            chunks = self._upsert_chunks(vectors, chunk_size)
+
+        def upsert(chunk: List[tuple]) -> List[str]:
+            try:
+                self.index.upsert(vectors=chunk, namespace=namespace)
+                return []
+            except Exception as e:
+                logger.error(f"Error upserting {len(chunk)} vectors: {e}")
+                return [vector[0] for vector in chunk]
+
+        if len(chunks) == 1:
+            failed = upsert(chunks[0])
+        else:
+            with ThreadPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+                failed = [vector_id for ids in pool.map(upsert, chunks) for vector_id in ids]
+
+        logger.info(f"Upserted {len(vectors) - len(failed)} vectors to namespace {namespace} in {len(chunks)} requests")
+        return failed
+
     def search_vectors(
-        self, query_embedding: List[float], top_k: int = 5, namespace: str = "knowledge"
+        self,
+        query_embedding: List[float],
+        top_k: int = 5,
+        namespace: str = "knowledge",
+        filter: Optional[Dict[str, Any]] = None,
     ) -> List[Dict[str, Any]]:
         """
         Search for similar vectors.
 
+        A filter is pushed down to the backend: Pinecone applies it as a
+        metadata filter, the local store pre-filters rows before scoring.
+
         Args:
             query_embedding: Query embedding vector
             top_k: Number of top results to return
             namespace: Namespace to search in
+            filter: Pinecone-style metadata filter, e.g. ``{"category": "technical"}``
 
         Returns:
             List of search results with metadata
         """
         if self.index is None:
-            logger.warning("Pinecone index not available")
+            logger.warning("Vector index not available")
             return []
 
         try:
+            kwargs = {"filter": filter} if filter else {}
             results = self.index.query(
-                vector=query_embedding, top_k=top_k, namespace=namespace, include_metadata=True
+                vector=query_embedding, top_k=top_k, namespace=namespace, include_metadata=True, **kwargs
             )
 
             formatted_results = []
@@ -129,9 +236,83 @@ class VectorDBManager:
             logger.error(f"Error searching vectors: {e}")
             return []
 
+    def search_vectors_batch(
+        self,
+        query_embeddings: List[List[float]],
+        top_k: int = 5,
+        namespace: str = "knowledge",
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search for similar vectors for several queries at once.
+
+        The local backend scores the whole batch with one matrix multiply;
+        Pinecone falls back to one query per embedding.
+
+        Args:
+            query_embeddings: Query embedding vectors
+            top_k: Number of top results per query
+            namespace: Namespace to search in
+            filter: Pinecone-style metadata filter
+
+        Returns:
+            One list of search results per query
+        """
+        if self.backend == "local" and self.index is not None:
+            try:
+                return self.index.query_batch(query_embeddings, top_k=top_k, namespace=namespace, filter=filter)
+            except Exception as e:
+                logger.error(f"Error searching vectors: {e}")
+                return [[] for _ in query_embeddings]
+
+        return [self.search_vectors(q, top_k=top_k, namespace=namespace, filter=filter) for q in query_embeddings]
+
+    def list_vectors(self, namespace: str = "knowledge", prefix: str = "") -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Metadata of every vector in a namespace.
+
+        Pinecone IDs are paged with ``list`` (serverless indexes only) and
+        their metadata fetched in batches of 100.
+
+        Args:
+            namespace: Namespace to list
+            prefix: Only include IDs starting with this prefix
+
+        Returns:
+            Dict of vector ID to metadata, or None if listing is unavailable
+        """
+        if self.index is None:
+            logger.warning("Vector index not available")
+            return None
+
+        try:
+            if self.backend == "local":
+                return {
+                    vector_id: metadata
+                    for vector_id, metadata in self.index.list_metadata(namespace).items()
+                    if vector_id.startswith(prefix)
+                }
+
+            if not hasattr(self.index, "list"):
+                logger.warning("Listing Pinecone vectors needs pinecone-client >= 3.1.0")
+                return None
+            ids = [vector_id for page in self.index.list(namespace=namespace, prefix=prefix or None) for vector_id in page]
+            vectors: Dict[str, Dict[str, Any]] = {}
+            for start in range(0, len(ids), 100):
+                fetched = self.index.fetch(ids=ids[start:start + 100], namespace=namespace)
+                fetched = fetched.get("vectors", {}) if isinstance(fetched, dict) else fetched.vectors
+                for vector_id, vector in fetched.items():
+                    metadata = vector.get("metadata") if isinstance(vector, dict) else vector.metadata
+                    vectors[vector_id] = dict(metadata or {})
+            return vectors
+
+        except Exception as e:
+            logger.error(f"Error listing vectors: {e}")
+            return None
+
     def delete_vectors(self, ids: List[str], namespace: str = "knowledge") -> bool:
         """
-        Delete vectors from Pinecone.
+        Delete vectors from the vector store.
 
         Args:
             ids: List of vector IDs to delete
@@ -141,7 +322,7 @@ class VectorDBManager:
             Success status
         """
         if self.index is None:
-            logger.warning("Pinecone index not available")
+            logger.warning("Vector index not available")
             return False
 
         try:
@@ -156,3 +337,13 @@ class VectorDBManager:
     def is_available(self) -> bool:
         """Check if vector database is available."""
         return self.index is not None
+
+    def save(self):
+        """Write the local store to disk (no-op for Pinecone)."""
+        if self.backend == "local" and self.index is not None:
+            self.index.save()
+
+    def close(self):
+        """Flush local state to disk and stop its background saver (no-op for Pinecone)."""
+        if self.backend == "local" and self.index is not None:
+            self.index.close()
@@ -28,13 +28,13 @@ def bulk_add_knowledge(file_path, category="general"):
         if current_entry:
             entries.append(current_entry)
         
-        # Add all entries
-        for entry in entries:
-            response = requests.post(
-                "http://localhost:8000/knowledge",
-                json=entry
-            )
-            print(f"Added: {entry['title']}")
+        # Add all entries in one request
+        response = requests.post(
+            "http://localhost:8000/knowledge/bulk",
+            json=entries
+        )
+        result = response.json()
+        print(f"Added {result['created']} entries ({result['failed']} failed)")
 
 
 # Example 2: Multi-turn conversation
@@ -84,11 +84,11 @@ def analyze_knowledge_base():
             json={"query": search_query, "top_k": 3}
         )
         
-        results = response.json()
+        results = response.json()["results"]
         print(f"\nSearch: '{search_query}'")
         print(f"Found {len(results)} results:")
         for result in results:
-            print(f"  - {result['title']}")
+            print(f"  - {result['title']} ({result['score']:.2f})")
 
 
 # Example 4: Update knowledge entries programmatically
@@ -9,13 +9,58 @@ const api = axios.create({
   },
 })
 
+// Session ids may only use letters, digits, '-' and '_'
+export const newSessionId = () =>
+  (crypto.randomUUID?.() ?? `${Date.now()}-${Math.random().toString(36).slice(2)}`).replace(/[^A-Za-z0-9_-]/g, '')
+
 export const chatAPI = {
-  sendMessage: (query, conversationHistory = []) =>
+  // The server keeps the conversation for sessionId, so history is not re-sent
+  sendMessage: (query, sessionId) =>
     api.post('/chat', {
       query,
-      conversation_history: conversationHistory,
+      session_id: sessionId,
     }),
 
+  // Streams /chat/stream Server-Sent Events; handlers: onSources, onToken
+  streamMessage: async (query, sessionId, { onSources, onToken } = {}) => {
+    const response = await fetch(`${API_BASE_URL}/chat/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({
+        query,
+        session_id: sessionId,
+      }),
+    })
+    if (!response.ok) {
+      throw new Error(`Stream request failed with status ${response.status}`)
+    }
+
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ''
+
+    while (true) {
+      const { value, done } = await reader.read()
+      if (done) break
+      buffer += decoder.decode(value, { stream: true })
+
+      let boundary
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const raw = buffer.slice(0, boundary)
+        buffer = buffer.slice(boundary + 2)
+
+        const event = raw.match(/^event: (.*)$/m)?.[1]
+        const data = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] || '{}')
+        if (event === 'sources') onSources?.(data)
+        else if (event === 'token') onToken?.(data.text)
+        else if (event === 'error') throw new Error(data.detail)
+        else if (event === 'done') return
+      }
+    }
+  },
+
+  deleteSession: (sessionId) => api.delete(`/sessions/${sessionId}`),
+
   getHealth: () => api.get('/health'),
 }
 
@@ -1,6 +1,6 @@
 import React, { useState, useRef, useEffect } from 'react'
 import { Send, Loader, AlertCircle, CheckCircle } from 'lucide-react'
-import { chatAPI } from '../api'
+import { chatAPI, newSessionId } from '../api'
 
 const ChatInterface = () => {
   const [messages, setMessages] = useState([])
@@ -9,6 +9,8 @@ const ChatInterface = () => {
   const [error, setError] = useState('')
   const [health, setHealth] = useState(null)
   const messagesEndRef = useRef(null)
+  // One server-side session per chat, so earlier turns are not re-sent
+  const sessionIdRef = useRef(newSessionId())
 
   useEffect(() => {
     checkHealth()
@@ -48,18 +50,26 @@ const ChatInterface = () => {
     setError('')
     setLoading(true)
 
+    // Placeholder assistant message filled in as tokens stream
+    const updateAssistant = (update) =>
+      setMessages((prev) => {
+        const last = prev[prev.length - 1]
+        return [...prev.slice(0, -1), { ...last, ...update(last) }]
+      })
+
+    setMessages((prev) => [
+      ...prev,
+      { role: 'assistant', content: '', sources: [], confidence: 0, timestamp: new Date() },
+    ])
+
     try {
-      const response = await chatAPI.sendMessage(input, messages)
-      const assistantMessage = {
-        role: 'assistant',
-        content: response.data.response,
-        sources: response.data.sources,
-        confidence: response.data.confidence,
-        timestamp: new Date(),
-      }
-
-      setMessages((prev) => [...prev, assistantMessage])
+      await chatAPI.streamMessage(input, sessionIdRef.current, {
+        onSources: ({ sources, confidence }) => updateAssistant(() => ({ sources, confidence })),
+        onToken: (text) => updateAssistant((last) => ({ content: last.content + text })),
+      })
     } catch (err) {
+      // Drop the placeholder if nothing was streamed
+      setMessages((prev) => (prev[prev.length - 1]?.content ? prev : prev.slice(0, -1)))
       setError('Failed to get response from the assistant')
       console.error('Error:', err)
     } finally {
@@ -109,7 +119,7 @@ const ChatInterface = () => {
           </div>
         )}
 
-        {messages.map((message, index) => (
+        {messages.filter((message) => message.content).map((message, index) => (
           <div
             key={index}
             className={`flex ${message.role === 'user' ? 'justify-end' : 'justify-start'}`}
@@ -147,7 +157,7 @@ const ChatInterface = () => {
           </div>
         ))}
 
-        {loading && (
+        {loading && !messages[messages.length - 1]?.content && (
           <div className="flex justify-start">
             <div className="bg-gray-700 text-gray-100 px-4 py-3 rounded-lg flex items-center gap-2">
               <Loader className="w-4 h-4 animate-spin" />
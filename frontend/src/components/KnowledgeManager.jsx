@@ -44,7 +44,7 @@ const KnowledgeManager = () => {
     setLoading(true)
     try {
       const response = await knowledgeAPI.search(searchQuery)
-      setEntries(response.data)
+      setEntries(response.data.results)
       setError('')
     } catch (err) {
       setError('Failed to search knowledge entries')
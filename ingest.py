@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""Ingest a corpus of markdown, text and JSONL files into the knowledge base and vector store.
+
+Files are parsed, chunked and embedded in a process pool; the parent
+process stores entries and vectors in batches and records finished work in
+a checkpoint file, so an interrupted run resumes where it stopped.
+
+Stop the API server first: it holds the same knowledge base and local
+vector store files open.
+
+Usage:
+    python ingest.py docs/ notes/ --category technical
+    python ingest.py corpus.jsonl --workers 8 --batch-size 512
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from chunker import TextChunker, chunk_metadata, chunk_vector_id, content_hash, parse_chunk_vector_id  # noqa: E402
+from config import settings  # noqa: E402
+from embedding_manager import EmbeddingManager  # noqa: E402
+from knowledge_base import open_knowledge_base  # noqa: E402
+from vector_db import VectorDBManager  # noqa: E402
+
+logger = logging.getLogger("ingest")
+
+TEXT_SUFFIXES = {".md", ".markdown", ".txt"}
+JSONL_SUFFIXES = {".jsonl", ".ndjson"}
+
+# A task is (path, start byte, end byte); text files are one whole-file task
+Task = Tuple[str, int, int]
+
+_model = None
+_chunker: Optional[TextChunker] = None
+
+
+def find_files(paths: List[str]) -> List[Path]:
+    """Supported files under ``paths``, in a stable order."""
+    files = []
+    for path in map(Path, paths):
+        candidates = [path] if path.is_file() else sorted(p for p in path.rglob("*") if p.is_file())
+        files.extend(p for p in candidates if p.suffix.lower() in TEXT_SUFFIXES | JSONL_SUFFIXES)
+    return files
+
+
+def plan_tasks(files: List[Path], jsonl_lines: int) -> Iterator[Task]:
+    """Split files into tasks; JSONL files are cut every ``jsonl_lines`` lines."""
+    for path in files:
+        size = path.stat().st_size
+        if path.suffix.lower() not in JSONL_SUFFIXES:
+            yield str(path), 0, size
+            continue
+        with open(path, "rb") as f:
+            start = offset = lines = 0
+            for line in f:
+                offset += len(line)
+                lines += 1
+                if lines == jsonl_lines:
+                    yield str(path), start, offset
+                    start, lines = offset, 0
+            if offset > start:
+                yield str(path), start, offset
+
+
+def task_key(task: Task) -> str:
+    """Checkpoint key; includes size and mtime so edited files are ingested again."""
+    path, start, end = task
+    stat = os.stat(path)
+    return f"{path}:{stat.st_size}:{int(stat.st_mtime)}:{start}-{end}"
+
+
+def parse_task(task: Task, category: str) -> List[Dict[str, Any]]:
+    """Read the entries covered by a task."""
+    path, start, end = task
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start).decode("utf-8", errors="replace")
+
+    name = Path(path)
+    if name.suffix.lower() not in JSONL_SUFFIXES:
+        content = data.strip()
+        if not content:
+            return []
+        title = name.stem
+        if name.suffix.lower() in (".md", ".markdown"):
+            for line in content.splitlines():
+                if line.startswith("# "):
+                    title = line[2:].strip()
+                    break
+        return [{"title": title, "content": content, "category": category, "tags": [], "source": path}]
+
+    entries = []
+    for number, line in enumerate(data.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            logger.warning(f"Skipping invalid JSON in {path} at byte {start}, line {number}")
+            continue
+        if not isinstance(item, dict) or not item.get("content"):
+            continue
+        entries.append({
+            "title": item.get("title") or f"{name.stem} #{number}",
+            "content": item["content"],
+            "category": item.get("category") or category,
+            "tags": item.get("tags") or [],
+            "source": item.get("source") or path,
+        })
+    return entries
+
+
+def load_embedder(backend: str, onnx_threads: int, parity_threshold: float) -> EmbeddingManager:
+    """Embedding model built the way the API server builds it, without a cache or batcher."""
+    return EmbeddingManager(
+        model_name=settings.embedding_model,
+        backend=backend,
+        onnx_path=settings.embedding_onnx_path,
+        onnx_dir=settings.embedding_onnx_dir,
+        onnx_threads=onnx_threads,
+        parity_threshold=parity_threshold,
+    )
+
+
+def resolve_embedding_backend() -> str:
+    """
+    Backend the workers use.
+
+    ONNX backends are loaded once in the parent so the int8 export and the
+    parity check against torch run once, not in every worker. When the ONNX
+    model fails to load or diverges, the workers fall back to torch, as the
+    server does.
+    """
+    if settings.embedding_backend == "torch":
+        return "torch"
+    embedder = load_embedder(
+        settings.embedding_backend, settings.embedding_onnx_threads, settings.embedding_parity_threshold
+    )
+    if embedder.model is None:
+        raise RuntimeError("Embedding model not available")
+    return embedder.backend
+
+
+def init_worker(backend: str, chunk_tokens: int, overlap_tokens: int):
+    """Load the embedding model once per worker process."""
+    global _model, _chunker
+    try:
+        import torch
+
+        torch.set_num_threads(1)  # one core per process
+    except ImportError:
+        pass
+
+    # Already checked against torch by the parent
+    _model = load_embedder(backend, onnx_threads=1, parity_threshold=0).model
+    if _model is None:
+        raise RuntimeError("Embedding model not available")
+    if chunk_tokens > 0:
+        _chunker = TextChunker(chunk_tokens, overlap_tokens, tokenizer=getattr(_model, "tokenizer", None))
+
+
+def process_task(args: Tuple[Task, str]) -> Tuple[Task, List[Dict[str, Any]]]:
+    """Parse, chunk and embed one task in a worker process."""
+    task, category = args
+    entries = parse_task(task, category)
+    for entry in entries:
+        entry["chunks"] = _chunker.split(entry["content"]) if _chunker else [entry["content"]]
+    texts = [text for entry in entries for text in entry["chunks"]]
+    if texts:
+        embeddings = np.asarray(_model.encode(texts, batch_size=64), dtype=np.float32)
+        offset = 0
+        for entry in entries:
+            entry["embeddings"] = embeddings[offset:offset + len(entry["chunks"])]
+            offset += len(entry["chunks"])
+    return task, entries
+
+
+def load_checkpoint(path: Path) -> Dict[str, Any]:
+    if path.exists():
+        with open(path) as f:
+            return json.load(f)
+    return {"completed": [], "documents": 0}
+
+
+def save_checkpoint(path: Path, checkpoint: Dict[str, Any]):
+    """Atomically replace the checkpoint file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class Ingester:
+    """
+    Stores embedded entries in batches and advances the checkpoint.
+
+    Rewriting the local vector store costs time proportional to its size, so
+    it is saved every ``save_every`` batches rather than after each one, and
+    tasks are only marked completed at those saves. Before the first batch
+    after a save, the checkpoint records the knowledge base's last entry ID
+    as ``pending``; entries above it that a crash left behind are removed by
+    ``discard_pending`` before the run resumes.
+    """
+
+    def __init__(
+        self,
+        knowledge_base,
+        vector_db_manager,
+        checkpoint_path: Path,
+        checkpoint: Dict[str, Any],
+        batch_size: int,
+        save_every: int = 20,
+    ):
+        self.knowledge_base = knowledge_base
+        self.vector_db_manager = vector_db_manager
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint = checkpoint
+        self.completed = set(checkpoint["completed"])
+        self.batch_size = batch_size
+        self.save_every = max(1, save_every)
+        self.pending_entries: List[Dict[str, Any]] = []
+        self.pending_keys: List[str] = []
+        self.unsaved_keys: List[str] = []
+        self.unsaved_documents = 0
+        self.unsaved_batches = 0
+        self.documents = 0
+        # Same layout as the workers' chunkers, for the content hash the index sync checks
+        self.layout = TextChunker(settings.chunk_size_tokens, settings.chunk_overlap_tokens) if settings.chunk_size_tokens > 0 else None
+
+    def discard_pending(self):
+        """Remove entries and vectors stored after the last save by a run that did not finish."""
+        pending = self.checkpoint.get("pending")
+        if pending is None:
+            return
+        after_id = pending["after_id"]
+        stale = [entry["id"] for entry in self.knowledge_base.get_all_entries() if entry["id"] > after_id]
+        for entry_id in stale:
+            self.knowledge_base.delete_entry(entry_id)
+
+        vectors = self.vector_db_manager.list_vectors(namespace="knowledge", prefix="knowledge_")
+        if vectors is None:
+            logger.warning("Cannot list vectors; vectors of discarded entries stay until they are overwritten")
+        else:
+            orphans = [v for v in vectors if (parse_chunk_vector_id(v) or (0, 0))[0] > after_id]
+            if orphans:
+                self.vector_db_manager.delete_vectors(orphans, namespace="knowledge")
+        if stale:
+            print(f"Discarded {len(stale)} entries from an unfinished batch")
+
+        self.knowledge_base.flush()
+        self.vector_db_manager.save()
+        del self.checkpoint["pending"]
+        save_checkpoint(self.checkpoint_path, self.checkpoint)
+
+    def add(self, key: str, entries: List[Dict[str, Any]]):
+        self.pending_entries.extend(entries)
+        self.pending_keys.append(key)
+        if len(self.pending_entries) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Store pending entries and vectors; save and checkpoint every ``save_every`` batches."""
+        if not self.pending_keys:
+            return
+        if self.pending_entries:
+            if "pending" not in self.checkpoint:
+                self.checkpoint["pending"] = {"after_id": self.knowledge_base.last_entry_id()}
+                save_checkpoint(self.checkpoint_path, self.checkpoint)
+            fields = ("title", "content", "category", "tags", "source")
+            stored = self.knowledge_base.add_entries([{k: e[k] for k in fields} for e in self.pending_entries])
+            vectors = []
+            for parsed, entry in zip(self.pending_entries, stored):
+                count = len(parsed["chunks"])
+                entry_hash = content_hash(entry, self.layout)
+                for i, (text, embedding) in enumerate(zip(parsed["chunks"], parsed["embeddings"])):
+                    metadata = chunk_metadata(entry, text, i, count, entry_hash)
+                    vectors.append((chunk_vector_id(entry["id"], i), embedding.tolist(), metadata))
+            failed = self.vector_db_manager.upsert_vectors_chunked(
+                vectors,
+                namespace="knowledge",
+                chunk_size=settings.vector_upsert_batch_size,
+                workers=settings.vector_upsert_workers,
+            )
+            if failed:
+                logger.warning(f"{len(failed)} vectors failed to upsert")
+
+        self.documents += len(self.pending_entries)
+        self.unsaved_documents += len(self.pending_entries)
+        self.unsaved_keys.extend(self.pending_keys)
+        self.unsaved_batches += 1
+        self.pending_entries, self.pending_keys = [], []
+        if self.unsaved_batches >= self.save_every:
+            self.commit()
+
+    def commit(self):
+        """Save the knowledge base and vector store, then mark the stored tasks completed."""
+        if not self.unsaved_keys:
+            return
+        self.knowledge_base.flush()
+        self.vector_db_manager.save()
+        self.completed.update(self.unsaved_keys)
+        self.checkpoint["completed"] = sorted(self.completed)
+        self.checkpoint["documents"] += self.unsaved_documents
+        self.checkpoint.pop("pending", None)
+        save_checkpoint(self.checkpoint_path, self.checkpoint)
+        self.unsaved_keys, self.unsaved_documents, self.unsaved_batches = [], 0, 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest markdown, text and JSONL files into the knowledge base.")
+    parser.add_argument("paths", nargs="+", help="Files or directories to ingest")
+    parser.add_argument("--category", default="general", help="Category for entries without one")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Embedding processes")
+    parser.add_argument("--batch-size", type=int, default=settings.bulk_batch_size, help="Entries stored per batch")
+    parser.add_argument("--save-every", type=int, default=20, help="Batches between vector store saves and checkpoints")
+    parser.add_argument("--jsonl-lines", type=int, default=1000, help="JSONL lines per task")
+    parser.add_argument("--checkpoint", default="./data/ingest_checkpoint.json", help="Checkpoint file")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    args = parser.parse_args()
+
+    checkpoint_path = Path(args.checkpoint)
+    checkpoint = {"completed": [], "documents": 0} if args.restart else load_checkpoint(checkpoint_path)
+    completed = set(checkpoint["completed"])
+
+    tasks = [task for task in plan_tasks(find_files(args.paths), args.jsonl_lines) if task_key(task) not in completed]
+    if completed:
+        print(f"Resuming: {len(completed)} tasks already done, {checkpoint['documents']} documents stored")
+    if not tasks and "pending" not in checkpoint:
+        print("Nothing to ingest.")
+        return
+
+    backend = resolve_embedding_backend()  # before the stores are opened, as it may fail
+    knowledge_base = open_knowledge_base(
+        settings.knowledge_base_path,
+        backend=settings.knowledge_base_backend,
+        import_path=settings.knowledge_base_import_path or None,
+        fsync_interval_ms=settings.knowledge_base_fsync_interval_ms,
+        compact_threshold=settings.knowledge_base_compact_threshold,
+    )
+    vector_db_manager = VectorDBManager(
+        api_key=settings.pinecone_api_key,
+        environment=settings.pinecone_environment,
+        index_name=settings.pinecone_index_name,
+        backend=settings.vector_db_backend,
+        local_store_path=settings.vector_store_path or None,
+        local_store_options={
+            "index_type": settings.vector_index_type,
+            "hnsw_m": settings.hnsw_m,
+            "hnsw_ef_construction": settings.hnsw_ef_construction,
+            "hnsw_ef_search": settings.hnsw_ef_search,
+            "quantization": settings.vector_quantization,
+            "pq_subspaces": settings.pq_subspaces,
+            "rerank_factor": settings.quantization_rerank_factor,
+            "filter_fields": [f.strip() for f in settings.vector_filter_fields.split(",") if f.strip()],
+            "save_interval": 0,  # saved by the ingester every --save-every batches,
+        },
+    )
+    ingester = Ingester(knowledge_base, vector_db_manager, checkpoint_path, checkpoint, args.batch_size, args.save_every)
+    ingester.discard_pending()
+    if not tasks:
+        vector_db_manager.close()
+        knowledge_base.close()
+        print("Nothing to ingest.")
+        return
+    print(f"Ingesting {len(tasks)} tasks with {args.workers} workers ({backend} embeddings)...")
+
+    started = time.perf_counter()
+    context = multiprocessing.get_context("spawn")
+    try:
+        with context.Pool(
+            args.workers,
+            initializer=init_worker,
+            initargs=(backend, settings.chunk_size_tokens, settings.chunk_overlap_tokens),
+        ) as pool:
+            work = ((task, args.category) for task in tasks)
+            for done, (task, entries) in enumerate(pool.imap_unordered(process_task, work), 1):
+                ingester.add(task_key(task), entries)
+                if done % 50 == 0 or done == len(tasks):
+                    elapsed = time.perf_counter() - started
+                    documents = ingester.documents + len(ingester.pending_entries)
+                    print(f"  {done}/{len(tasks)} tasks, {documents} docs, {documents / elapsed:.1f} docs/sec")
+        ingester.flush()
+        ingester.commit()
+    except KeyboardInterrupt:
+        print("\nInterrupted; progress up to the last checkpoint is kept. Re-run to resume.")
+    finally:
+        vector_db_manager.close()
+        knowledge_base.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"\n✓ Ingested {ingester.documents} documents in {elapsed:.1f}s ({ingester.documents / elapsed:.1f} docs/sec)")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    main()
@@ -71,5 +71,6 @@ if __name__ == "__main__":
             print(f"✓ Added: {entry['title']}")
 
         print(f"\nTotal entries: {len(kb.get_all_entries())}")  # type: ignore[union-attr]
+        kb.close()  # type: ignore[union-attr]
     else:
         print("Error: Could not import KnowledgeBase module")
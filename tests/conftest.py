@@ -0,0 +1,6 @@
+"""Make the backend modules importable the way the server imports them."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
@@ -0,0 +1,36 @@
+"""Tests for BM25 lexical search and rank fusion."""
+from bm25_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+def test_tokenize_keeps_compound_identifiers_and_their_parts():
+    assert tokenize("Got ERR-1042 in v2.3") == ["got", "err-1042", "err", "1042", "in", "v2.3", "v2", "3"]
+
+
+def test_search_ranks_exact_identifier_first():
+    index = BM25Index()
+    index.add(1, "Error ERR-1042 means the disk is full")
+    index.add(2, "Errors are logged to the error log")
+    index.add(3, "Disk usage report")
+
+    assert index.search("err-1042")[0][0] == 1
+    assert [doc for doc, _ in index.search("disk full", require_all=True)] == [1]
+    assert [doc for doc, _ in index.search("disk", allowed={3})] == [3]
+
+
+def test_add_replaces_and_remove_drops_document():
+    index = BM25Index()
+    index.add(1, "alpha beta")
+    index.add(1, "gamma")
+    index.add(2, "alpha")
+    assert [doc for doc, _ in index.search("alpha")] == [2]
+
+    index.remove(2)
+    assert index.search("alpha") == []
+    assert len(index) == 1
+
+
+def test_reciprocal_rank_fusion_normalises_to_one():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["a", "c"]], k=60)
+
+    assert fused[0] == ("a", 1.0)
+    assert [doc for doc, _ in fused] == ["a", "c", "b"]
@@ -0,0 +1,44 @@
+"""Tests for NDJSON bulk ingestion."""
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+class FakeKnowledgeBase:
+    def __init__(self):
+        self.entries = []
+
+    def add_entries(self, items):
+        added = [{**item, "id": len(self.entries) + i + 1} for i, item in enumerate(items)]
+        self.entries.extend(added)
+        return added
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def index_entries(entries):
+        return set()
+
+    monkeypatch.setattr(main, "knowledge_base", FakeKnowledgeBase())
+    monkeypatch.setattr(main, "index_entries", index_entries)
+    return TestClient(main.app)
+
+
+def test_undecodable_line_is_a_per_item_error(client, monkeypatch):
+    monkeypatch.setattr(main.settings, "bulk_batch_size", 2)
+    body = b"\n".join([
+        b'{"title": "a", "content": "first"}',
+        b'{"title": "b", "content": "caf\xe9"}',
+        b"",
+        b'{"title": "c", "content": "third"}',
+        b"not json",
+    ])
+    response = client.post("/knowledge/bulk", content=body, headers={"content-type": "application/x-ndjson"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["created"], data["failed"]) == (2, 2)
+    assert [result["status"] for result in data["results"]] == ["created", "error", "created", "error"]
+    assert "utf-8" in data["results"][1]["detail"]
+    assert [result["index"] for result in data["results"]] == [0, 1, 2, 3]
@@ -0,0 +1,48 @@
+"""Tests for knowledge chunking helpers."""
+import pytest
+
+from chunker import TextChunker, chunk_vector_id, content_hash, parse_chunk_vector_id, select_chunk
+
+
+def words(count, prefix="w"):
+    return " ".join(f"{prefix}{i}" for i in range(count))
+
+
+def test_short_text_is_returned_whole():
+    assert TextChunker(chunk_tokens=10, overlap_tokens=2).split("a few words") == ["a few words"]
+
+
+def test_long_text_is_split_into_overlapping_windows():
+    chunks = TextChunker(chunk_tokens=10, overlap_tokens=3).split(words(25))
+
+    assert [len(chunk.split()) for chunk in chunks] == [10, 10, 10, 4]
+    assert chunks[0].split()[-3:] == chunks[1].split()[:3]
+    assert chunks[-1].endswith("w24")
+
+
+def test_overlap_must_be_smaller_than_chunk():
+    with pytest.raises(ValueError):
+        TextChunker(chunk_tokens=10, overlap_tokens=10)
+
+
+def test_select_chunk_prefers_most_query_terms():
+    chunks = ["install python", "configure git remote", "git push"]
+    assert select_chunk(chunks, "git remote") == "configure git remote"
+    assert select_chunk(chunks, "unrelated") == "install python"
+
+
+def test_vector_ids_round_trip():
+    assert chunk_vector_id(7, 0) == "knowledge_7"
+    assert parse_chunk_vector_id(chunk_vector_id(7, 3)) == (7, 3)
+    assert parse_chunk_vector_id("knowledge_7") == (7, 0)
+    assert parse_chunk_vector_id("conversation_1") is None
+
+
+def test_content_hash_tracks_content_and_chunk_layout():
+    entry = {"title": "T", "content": "body", "category": "general", "tags": ["a"]}
+    base = content_hash(entry, TextChunker(10, 2))
+
+    assert content_hash(dict(entry), TextChunker(10, 2)) == base
+    assert content_hash({**entry, "content": "changed"}, TextChunker(10, 2)) != base
+    assert content_hash(entry, TextChunker(20, 2)) != base
+    assert content_hash(entry) != base
@@ -0,0 +1,75 @@
+"""Tests for packing retrieved sources into the context window."""
+from context_builder import ContextBuilder
+
+
+def count_words(text):
+    return len(text.split())
+
+
+def words(start, stop, prefix="w"):
+    return " ".join(f"{prefix}{i}" for i in range(start, stop))
+
+
+def source(entry_id, text, **metadata):
+    return {"id": f"knowledge_{entry_id}", "metadata": {"id": entry_id, "content": text, **metadata}}
+
+
+def test_duplicates_are_dropped_and_boundary_overlap_trimmed():
+    builder = ContextBuilder(count_words, context_window=1000, reserved_tokens=0)
+    sources = [
+        source(1, words(0, 20)),
+        source(2, words(0, 20).upper()),  # same text, different case
+        source(3, words(5, 15)),  # contained in the first source
+        source(4, words(12, 32)),  # continues the first source with 8 words of overlap
+    ]
+
+    prompt, used = builder.build("query", sources)
+
+    assert [s["id"] for s in used] == ["knowledge_1", "knowledge_4"]
+    assert f"1. {words(0, 20)}\n" in prompt
+    assert f"2. {words(20, 32)}\n" in prompt
+    assert prompt.endswith("User Query: query")
+    assert builder.stats()["duplicates_removed"] == 2
+
+
+def test_last_source_is_truncated_to_fit():
+    builder = ContextBuilder(count_words, context_window=100, reserved_tokens=0, min_source_tokens=5)
+    sources = [source(i, words(0, 40, prefix=f"s{i}_")) for i in range(4)]
+
+    prompt, used = builder.build("q", sources)
+
+    assert len(used) == 3
+    assert count_words(prompt) <= builder.context_window
+    last = prompt.split("3. ")[1].split("\n")[0]
+    assert last.endswith(" …") and count_words(last) <= 11
+    stats = builder.stats()
+    assert stats["sources_truncated"] == 1
+    assert stats["sources_dropped"] == 1
+
+
+def test_source_below_minimum_is_dropped_rather_than_truncated():
+    builder = ContextBuilder(count_words, context_window=100, reserved_tokens=0, min_source_tokens=32)
+    sources = [source(i, words(0, 40, prefix=f"s{i}_")) for i in range(3)]
+
+    _, used = builder.build("q", sources)
+
+    assert len(used) == 2
+    assert builder.stats()["sources_truncated"] == 0
+
+
+def test_indexed_token_counts_skip_the_tokenizer():
+    calls = []
+
+    def counting(text):
+        calls.append(text)
+        return count_words(text)
+
+    builder = ContextBuilder(counting, context_window=1000, reserved_tokens=0)
+    calls.clear()
+    builder.build("q", [source(1, words(0, 20), tokens=20)])
+    assert words(0, 20) not in calls
+
+    builder.build("q", [source(2, words(50, 70))])
+    builder.build("q", [source(2, words(50, 70))])
+    assert calls.count(words(50, 70)) == 1
+    assert builder.stats()["cached_counts"] == 1
@@ -0,0 +1,42 @@
+"""Tests for micro-batching of concurrent embedding requests."""
+import pytest
+
+from embedding_manager import EmbeddingBatcher
+
+
+def test_concurrent_requests_share_a_batch():
+    calls = []
+
+    def encode(texts):
+        calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    batcher = EmbeddingBatcher(encode, window_ms=200, max_batch_size=3)
+    futures = [batcher.submit("x" * i) for i in range(1, 6)]
+
+    assert [future.result(timeout=5) for future in futures] == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert [len(batch) for batch in calls] == [3, 2]
+    assert batcher.stats()["avg_batch_size"] == 2.5
+    batcher.close()
+
+
+def test_encode_errors_reach_every_caller():
+    def encode(texts):
+        raise RuntimeError("model failed")
+
+    batcher = EmbeddingBatcher(encode, window_ms=50)
+    futures = [batcher.submit("a"), batcher.submit("b")]
+
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
+    assert batcher.stats()["batches"] == 0
+    batcher.close()
+
+
+def test_close_drains_queued_requests():
+    batcher = EmbeddingBatcher(lambda texts: [[0.0] for _ in texts], window_ms=1000)
+    future = batcher.submit("pending")
+    batcher.close()
+
+    assert future.result(timeout=0) == [0.0]
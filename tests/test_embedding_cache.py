@@ -0,0 +1,70 @@
+"""Tests for the two-tier embedding cache."""
+import sqlite3
+
+import numpy as np
+
+from embedding_cache import EmbeddingCache
+
+
+def vector(value, dimension=4):
+    return np.full(dimension, value, dtype=np.float32)
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = EmbeddingCache(max_bytes=2 * vector(0).nbytes)
+    cache.put_many([("a", vector(1)), ("b", vector(2))])
+    cache.get_many(["a"])
+    cache.put_many([("c", vector(3))])
+
+    a, b, c = cache.get_many(["a", "b", "c"])
+    assert b is None
+    assert a[0] == 1 and c[0] == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_get_cached_skips_disk_and_does_not_count_misses(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    EmbeddingCache(disk_path=path).put_many([("a", vector(1))])
+
+    cache = EmbeddingCache(disk_path=path)
+    assert cache.get_cached("a") is None
+    assert cache.stats()["misses"] == 0
+    assert cache.get_many(["a"])[0][0] == 1
+    assert cache.get_cached("a")[0] == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 0)
+
+
+def test_disk_lookups_are_chunked(tmp_path):
+    cache = EmbeddingCache(max_bytes=0, disk_path=str(tmp_path / "cache.sqlite"))
+    keys = [f"k{i}" for i in range(1200)]
+    cache.put_many([(key, vector(i)) for i, key in enumerate(keys)])
+
+    results = cache.get_many(keys + ["missing"])
+    assert [r[0] for r in results[:-1]] == list(range(1200))
+    assert results[-1] is None
+
+
+def test_disk_tier_prunes_least_recently_used(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = EmbeddingCache(max_bytes=0, disk_path=str(path), max_disk_entries=10)
+    cache.put_many([(f"k{i}", vector(i)) for i in range(10)])
+    cache.get_many(["k0"])  # recently used, so it survives pruning
+    cache.put_many([("k10", vector(10))])
+    cache.close()
+
+    with sqlite3.connect(path) as db:
+        keys = {row[0] for row in db.execute("SELECT key FROM embeddings")}
+    assert len(keys) == 9
+    assert {"k0", "k10"} <= keys
+    assert cache.stats()["disk_evictions"] == 2
+
+
+def test_disk_table_from_older_version_is_migrated(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    with sqlite3.connect(path) as db:
+        db.execute("CREATE TABLE embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        db.execute("INSERT INTO embeddings VALUES (?, ?)", ("a", vector(1).tobytes()))
+
+    cache = EmbeddingCache(disk_path=str(path))
+    assert cache.get_many(["a"])[0][0] == 1
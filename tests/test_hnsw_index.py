@@ -0,0 +1,58 @@
+"""Tests for the HNSW approximate nearest-neighbour graph."""
+import numpy as np
+
+from hnsw_index import HNSWIndex
+
+
+def random_vectors(count, dimension=16, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(count, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def build(count=200, dimension=16):
+    index = HNSWIndex(dimension, m=8, ef_construction=64, ef_search=32, seed=1)
+    vectors = random_vectors(count, dimension)
+    for i, vector in enumerate(vectors):
+        index.add(str(i), vector)
+    return index, vectors
+
+
+def test_search_finds_exact_match_first():
+    index, vectors = build()
+    for i in (0, 57, 199):
+        assert index.search(vectors[i], top_k=1)[0][0] == str(i)
+
+
+def test_overwrite_and_remove_leave_tombstones():
+    index, vectors = build(count=10)
+    index.add("3", vectors[4])
+    assert index.remove("5")
+    assert not index.remove("missing")
+
+    assert len(index) == 9
+    assert index.tombstone_ratio == 2 / 11
+    labels = [label for label, _ in index.search(vectors[5], top_k=10)]
+    assert "5" not in labels
+
+
+def test_rebuild_drops_tombstones_and_keeps_live_nodes():
+    index, vectors = build(count=50)
+    for i in range(0, 50, 2):
+        index.remove(str(i))
+    index.rebuild()
+
+    assert index.tombstone_ratio == 0
+    assert sorted(index.label_to_node, key=int) == [str(i) for i in range(1, 50, 2)]
+    assert index.search(vectors[7], top_k=1)[0][0] == "7"
+
+
+def test_arrays_round_trip():
+    index, vectors = build(count=100)
+    index.remove("10")
+    restored = HNSWIndex.from_arrays(index.to_arrays(), ef_search=32)
+
+    assert restored.label_to_node == index.label_to_node
+    assert restored.deleted == index.deleted
+    assert restored.graph == index.graph
+    for i in (0, 42, 99):
+        assert restored.search(vectors[i], top_k=5) == index.search(vectors[i], top_k=5)
@@ -0,0 +1,76 @@
+"""Tests for LLM admission control and streaming on the scheduler threads."""
+import asyncio
+import threading
+
+import pytest
+
+from inference_scheduler import InferenceScheduler, QueueFullError
+
+
+def test_llm_calls_run_one_at_a_time_and_excess_is_rejected():
+    scheduler = InferenceScheduler(max_queue_size=1)
+    release = threading.Event()
+    running = []
+
+    def job(n):
+        running.append(n)
+        release.wait(5)
+        return n
+
+    async def scenario():
+        first = asyncio.ensure_future(scheduler.run_llm(job, 1))
+        second = asyncio.ensure_future(scheduler.run_llm(job, 2))
+        await asyncio.sleep(0.05)
+        assert running == [1]
+        assert scheduler.queue_depth == 1
+        with pytest.raises(QueueFullError) as error:
+            await scheduler.run_llm(job, 3)
+        assert error.value.retry_after >= 1
+        release.set()
+        return await asyncio.gather(first, second)
+
+    assert asyncio.run(scenario()) == [1, 2]
+    stats = scheduler.stats()
+    assert (stats["completed"], stats["rejected"], stats["queue_depth"]) == (2, 1, 0)
+    scheduler.shutdown()
+
+
+def test_stream_relays_items_and_errors():
+    scheduler = InferenceScheduler()
+
+    def tokens():
+        yield "a"
+        yield "b"
+        raise RuntimeError("model failed")
+
+    async def scenario():
+        items = []
+        with pytest.raises(RuntimeError, match="model failed"):
+            async for item in scheduler.stream_llm(tokens):
+                items.append(item)
+        return items
+
+    assert asyncio.run(scenario()) == ["a", "b"]
+    scheduler.shutdown()
+
+
+def test_closing_a_stream_stops_the_generator():
+    scheduler = InferenceScheduler()
+    produced = []
+    proceed = threading.Event()
+
+    def tokens():
+        for i in range(100):
+            produced.append(i)
+            yield i
+            proceed.wait(0.01)
+
+    async def scenario():
+        stream = scheduler.stream_llm(tokens)
+        assert await stream.__anext__() == 0
+        await stream.aclose()
+        await scheduler.run_llm(lambda: None)  # runs once the generator has stopped
+
+    asyncio.run(scenario())
+    assert len(produced) < 100
+    scheduler.shutdown()
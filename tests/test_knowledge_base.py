@@ -0,0 +1,91 @@
+"""Tests for the JSON knowledge base: operation log, compaction and indexes."""
+import json
+
+from knowledge_base import KnowledgeBase
+
+
+def open_kb(tmp_path, **kwargs):
+    return KnowledgeBase(str(tmp_path / "kb.json"), **kwargs)
+
+
+def test_log_is_replayed_after_a_crash(tmp_path):
+    kb = open_kb(tmp_path)
+    first = kb.add_entry("First", "alpha")
+    kb.add_entries([{"title": "Second", "content": "beta"}, {"title": "Third", "content": "gamma"}])
+    kb.update_entry(first["id"], content="alpha two")
+    kb.delete_entry(3)
+    kb.flush()  # no close: the snapshot was never written
+
+    assert not (tmp_path / "kb.json").exists()
+    recovered = open_kb(tmp_path)
+    assert sorted(recovered.get_entries([1, 2, 3])) == [1, 2]
+    assert recovered.get_entry(1)["content"] == "alpha two"
+    assert recovered.add_entry("Fourth", "delta")["id"] == 4
+    recovered.close()
+    kb.close()
+
+
+def test_torn_last_record_is_truncated(tmp_path):
+    kb = open_kb(tmp_path)
+    kb.add_entry("First", "alpha")
+    kb.flush()
+    with open(tmp_path / "kb.json.log", "a") as f:
+        f.write('{"op": "put", "entry": {"id": 2')
+
+    recovered = open_kb(tmp_path)
+    assert [entry["id"] for entry in recovered.get_all_entries()] == [1]
+    recovered.add_entry("Second", "beta")
+    recovered.flush()
+    lines = (tmp_path / "kb.json.log").read_text().splitlines()
+    assert [json.loads(line)["seq"] for line in lines] == [1, 2]
+    recovered.close()
+    kb.close()
+
+
+def test_compaction_folds_log_into_snapshot(tmp_path):
+    kb = open_kb(tmp_path)
+    for i in range(5):
+        kb.add_entry(f"Entry {i}", "text")
+    kb.delete_entry(5)
+    assert kb.compact()
+    kb.add_entry("After", "text")
+    kb.flush()
+
+    snapshot = json.loads((tmp_path / "kb.json").read_text())
+    assert (len(snapshot["entries"]), snapshot["next_id"], snapshot["last_seq"]) == (4, 6, 6)
+    assert len((tmp_path / "kb.json.log").read_text().splitlines()) == 1
+    reopened = open_kb(tmp_path)
+    assert [entry["id"] for entry in reopened.get_all_entries()] == [1, 2, 3, 4, 6]
+    reopened.close()
+    kb.close()
+
+
+def test_close_compacts_and_ids_are_never_reused(tmp_path):
+    kb = open_kb(tmp_path)
+    kb.add_entry("First", "alpha")
+    kb.add_entry("Second", "beta")
+    kb.delete_entry(2)
+    kb.close()
+
+    assert (tmp_path / "kb.json.log").read_text() == ""
+    reopened = open_kb(tmp_path)
+    assert reopened.last_entry_id() == 2
+    assert reopened.add_entry("Third", "gamma")["id"] == 3
+    reopened.close()
+
+
+def test_secondary_indexes_follow_updates_and_deletes(tmp_path):
+    kb = open_kb(tmp_path)
+    kb.add_entry("Python venv", "Isolated environments", category="technical", tags=["python"])
+    kb.add_entry("Git", "Commit often", category="technical", tags=["git"])
+    kb.update_entry(1, category="howto", tags=["python", "setup"])
+    kb.delete_entry(2)
+
+    assert kb.get_entries_by_category("technical") == []
+    assert [e["id"] for e in kb.get_entries_by_category("howto")] == [1]
+    assert [e["id"] for e in kb.get_entries_by_tag("setup")] == [1]
+    assert kb.get_entries_by_tag("git") == []
+    assert [e["id"] for e in kb.search_entries("isolated python")] == [1]
+    assert kb.search_entries("commit") == []
+    assert kb.lexical_search("environments", filter={"category": "technical"}) == []
+    kb.close()
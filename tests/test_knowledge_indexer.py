@@ -0,0 +1,102 @@
+"""Tests for knowledge base / vector index reconciliation."""
+import pytest
+
+from chunker import TextChunker, chunk_vector_id
+from knowledge_base import KnowledgeBase
+from knowledge_indexer import KnowledgeIndexer
+
+
+class FakeEmbeddingManager:
+    model = object()
+
+    def __init__(self):
+        self.embedded = []
+
+    def embed_texts(self, texts, strict=False):
+        self.embedded.extend(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+class FakeVectorDBManager:
+    def __init__(self):
+        self.vectors = {}
+
+    def list_vectors(self, namespace, prefix=""):
+        return {vid: meta for vid, (_, meta) in self.vectors.items() if vid.startswith(prefix)}
+
+    def upsert_vectors_chunked(self, vectors, namespace, chunk_size, workers):
+        for vector_id, values, metadata in vectors:
+            self.vectors[vector_id] = (values, metadata)
+        return []
+
+    def delete_vectors(self, ids, namespace):
+        for vector_id in ids:
+            self.vectors.pop(vector_id, None)
+
+
+@pytest.fixture
+def indexer(tmp_path):
+    kb = KnowledgeBase(str(tmp_path / "kb.json"))
+    kb.add_entry("Short", "one two three")
+    kb.add_entry("Long", " ".join(f"w{i}" for i in range(25)))
+    indexer = KnowledgeIndexer(kb, FakeVectorDBManager(), FakeEmbeddingManager(), chunker=TextChunker(10, 2))
+    yield indexer
+    kb.close()
+
+
+def test_first_sync_indexes_every_chunk(indexer):
+    summary = indexer.reconcile()
+
+    assert summary["status"] == "ok" and summary["reindexed"] == 2
+    chunks = len(indexer.entry_chunks(indexer.knowledge_base.get_entry(2)))
+    assert chunks > 1
+    expected = {chunk_vector_id(1, 0)} | {chunk_vector_id(2, i) for i in range(chunks)}
+    assert set(indexer.vector_db_manager.vectors) == expected
+
+
+def test_unchanged_entries_are_not_reembedded(indexer):
+    indexer.reconcile()
+    indexer.embedding_manager.embedded.clear()
+
+    summary = indexer.reconcile()
+
+    assert summary["reindexed"] == 0 and summary["orphans_deleted"] == 0
+    assert indexer.embedding_manager.embedded == []
+
+
+def test_changed_entry_is_reembedded_and_extra_chunks_deleted(indexer):
+    indexer.reconcile()
+    indexer.knowledge_base.update_entry(2, content="now short")
+    indexer.embedding_manager.embedded.clear()
+
+    summary = indexer.reconcile()
+
+    assert summary["reindexed"] == 1
+    assert indexer.embedding_manager.embedded == ["now short"]
+    assert sorted(indexer.vector_db_manager.vectors) == ["knowledge_1", "knowledge_2"]
+
+
+def test_vectors_of_deleted_entries_are_removed(indexer):
+    indexer.reconcile()
+    indexer.knowledge_base.delete_entry(2)
+
+    summary = indexer.reconcile()
+
+    assert summary["orphans_deleted"] > 0
+    assert sorted(indexer.vector_db_manager.vectors) == ["knowledge_1"]
+
+
+def test_empty_knowledge_base_keeps_the_index(indexer):
+    indexer.reconcile()
+    count = len(indexer.vector_db_manager.vectors)
+    indexer.knowledge_base.delete_entry(1)
+    indexer.knowledge_base.delete_entry(2)
+
+    assert indexer.reconcile()["orphans_deleted"] == 0
+    assert len(indexer.vector_db_manager.vectors) == count
+
+
+def test_sync_without_embeddings_reports_an_error(indexer):
+    indexer.embedding_manager.model = None
+    assert indexer.reconcile()["status"] == "error"
+    assert indexer.vector_db_manager.vectors == {}
@@ -0,0 +1,175 @@
+"""Tests for the in-process vector store."""
+import numpy as np
+
+from local_vector_store import LocalVectorStore
+
+
+def random_vectors(count, dimension=16, seed=0):
+    return np.random.default_rng(seed).normal(size=(count, dimension)).astype(np.float32)
+
+
+def make_store(**kwargs):
+    options = dict(dimension=16, index_type="hnsw", hnsw_m=8, hnsw_ef_construction=64, save_interval=0)
+    options.update(kwargs)
+    return LocalVectorStore(**options)
+
+
+def upsert(store, vectors, start=0, namespace="knowledge"):
+    store.upsert(
+        [(str(start + i), vector, {"n": start + i}) for i, vector in enumerate(vectors)], namespace=namespace
+    )
+
+
+def top_id(store, vector, **kwargs):
+    return store.query(vector.tolist(), top_k=1, **kwargs)["matches"][0]["id"]
+
+
+def test_deletes_past_threshold_rebuild_graph_in_background():
+    store = make_store()
+    vectors = random_vectors(100)
+    upsert(store, vectors)
+
+    store.delete([str(i) for i in range(40)])
+    store.wait_for_rebuilds()
+
+    ann = store.namespaces["knowledge"].ann
+    assert ann.tombstone_ratio == 0
+    assert len(ann) == store.count() == 60
+    assert top_id(store, vectors[70]) == "70"
+
+
+def test_overwrites_past_threshold_rebuild_graph():
+    store = make_store()
+    vectors = random_vectors(100)
+    upsert(store, vectors)
+
+    upsert(store, random_vectors(50, seed=1))
+    store.wait_for_rebuilds()
+
+    ann = store.namespaces["knowledge"].ann
+    assert ann.tombstone_ratio == 0
+    assert len(ann) == store.count() == 100
+
+
+def test_writes_during_rebuild_are_replayed_into_new_graph():
+    store = make_store()
+    vectors = random_vectors(120)
+    upsert(store, vectors[:100])
+    ns = store.namespaces["knowledge"]
+    with store._lock:
+        # Hold the lock so the rebuild cannot swap before the writes below
+        store.delete([str(i) for i in range(40)])
+        upsert(store, vectors[100:], start=100)
+        store.delete(["50"])
+        assert ns.ann_log is not None
+    store.wait_for_rebuilds()
+
+    assert ns.ann_log is None
+    assert set(ns.ann.label_to_node) == set(ns.ids)
+    assert top_id(store, vectors[110]) == "110"
+    assert "50" not in ns.ann.label_to_node
+
+
+def test_rebuild_takes_over_memmap_working_file(tmp_path):
+    store = make_store(persist_path=str(tmp_path), quantization="int8", quantization_train_size=32)
+    vectors = random_vectors(100)
+    upsert(store, vectors)
+
+    store.delete([str(i) for i in range(40)])
+    store.wait_for_rebuilds()
+
+    ann = store.namespaces["knowledge"].ann
+    assert ann.storage_path == tmp_path / "knowledge.hnsw.mmap"
+    assert not (tmp_path / "knowledge.hnsw.mmap.rebuild").exists()
+    assert top_id(store, vectors[70]) == "70"
+    store.close()
+
+
+def test_save_copies_working_file_as_it_was_when_the_save_started(tmp_path, monkeypatch):
+    import local_vector_store
+
+    store = make_store(persist_path=str(tmp_path), index_type="flat", quantization="int8", quantization_train_size=32)
+    vectors = random_vectors(50)
+    upsert(store, vectors)
+    copy_prefix = local_vector_store._copy_prefix
+
+    def copy_during_writes(source, target, nbytes):
+        # Writes landing while the working file is being copied
+        store.upsert([("3", random_vectors(1, seed=9)[0], {"n": 3})])
+        store.delete(["0"])
+        copy_prefix(source, target, nbytes)
+
+    monkeypatch.setattr(local_vector_store, "_copy_prefix", copy_during_writes)
+    assert store.save()
+    monkeypatch.setattr(local_vector_store, "_copy_prefix", copy_prefix)
+
+    reloaded = make_store(persist_path=str(tmp_path), index_type="flat", quantization="int8")
+    assert reloaded.count() == 50
+    ns = reloaded.namespaces["knowledge"]
+    for i in (0, 3, 49):
+        expected = vectors[i] / np.linalg.norm(vectors[i])
+        assert np.allclose(ns.matrix[ns.id_to_row[str(i)]], expected, atol=1e-6)
+    store.close()
+
+
+def test_save_and_reload_round_trip(tmp_path):
+    store = make_store(persist_path=str(tmp_path))
+    vectors = random_vectors(60)
+    upsert(store, vectors)
+    store.delete(["5"])
+    store.close()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["knowledge.1.f32", "knowledge.1.hnsw.npz", "knowledge.json"]
+    reloaded = make_store(persist_path=str(tmp_path))
+    assert reloaded.count() == 59
+    assert reloaded.list_metadata()["7"] == {"n": 7}
+    assert top_id(reloaded, vectors[7]) == "7"
+    assert "5" not in reloaded.list_metadata()
+
+
+def test_saved_graph_is_loaded_instead_of_rebuilt(tmp_path):
+    store = make_store(persist_path=str(tmp_path))
+    upsert(store, random_vectors(40))
+    store.close()
+    graph = store.namespaces["knowledge"].ann.graph
+
+    reloaded = make_store(persist_path=str(tmp_path))
+    assert reloaded.namespaces["knowledge"].ann.graph == graph
+
+
+def test_each_save_writes_a_new_generation_and_removes_the_old(tmp_path):
+    store = make_store(persist_path=str(tmp_path))
+    upsert(store, random_vectors(10))
+    store.save()
+    upsert(store, random_vectors(5, seed=1), start=10)
+    store.save()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["knowledge.2.f32", "knowledge.2.hnsw.npz", "knowledge.json"]
+    assert make_store(persist_path=str(tmp_path)).count() == 15
+    store.close()
+
+
+def test_unfinished_save_leaves_previous_generation_loadable(tmp_path):
+    store = make_store(persist_path=str(tmp_path))
+    upsert(store, random_vectors(10))
+    store.close()
+    # A crash mid-save leaves temporary and unreferenced files behind
+    (tmp_path / "knowledge.2.f32.tmp").write_bytes(b"partial")
+    (tmp_path / "knowledge.2.f32").write_bytes(b"orphan")
+
+    reloaded = make_store(persist_path=str(tmp_path))
+    assert reloaded.count() == 10
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["knowledge.1.f32", "knowledge.1.hnsw.npz", "knowledge.json"]
+
+
+def test_only_modified_namespaces_are_saved(tmp_path):
+    store = make_store(persist_path=str(tmp_path))
+    upsert(store, random_vectors(10), namespace="a")
+    upsert(store, random_vectors(10), namespace="b")
+    store.save()
+    upsert(store, random_vectors(1, seed=1), start=10, namespace="a")
+    store.save()
+
+    assert (tmp_path / "a.2.f32").exists()
+    assert (tmp_path / "b.1.f32").exists()
+    store.close()
@@ -0,0 +1,57 @@
+"""Tests for Pinecone-style metadata filters and their postings index."""
+import numpy as np
+import pytest
+
+from local_vector_store import LocalVectorStore
+from metadata_filter import MetadataIndex, matches
+
+METADATA = [
+    {"category": "technical", "tags": ["python", "venv"], "year": 2021},
+    {"category": "technical", "tags": ["git"], "year": 2023},
+    {"category": "personal", "tags": ["python"], "year": 2024},
+    {"category": "personal", "tags": []},
+]
+
+FILTERS = [
+    {"category": "technical"},
+    {"tags": {"$in": ["git", "venv"]}},
+    {"$and": [{"category": "personal"}, {"tags": "python"}]},
+    {"$or": [{"category": "technical", "year": {"$gte": 2023}}, {"tags": {"$eq": "venv"}}]},
+    {"tags": {"$nin": ["python"]}},
+    {"year": {"$exists": False}},
+    {"category": {"$ne": "personal"}, "year": {"$lt": 2022}},
+]
+
+
+@pytest.mark.parametrize("filter", FILTERS)
+def test_index_selection_agrees_with_scanning(filter):
+    index = MetadataIndex(("category", "tags"))
+    for row, meta in enumerate(METADATA):
+        index.add(row, meta)
+
+    expected = {row for row, meta in enumerate(METADATA) if matches(meta, filter)}
+    assert index.select(filter, METADATA) == expected
+
+
+def test_removed_rows_leave_the_postings():
+    index = MetadataIndex(("category", "tags"))
+    for row, meta in enumerate(METADATA):
+        index.add(row, meta)
+    index.remove(0, METADATA[0])
+
+    assert index.select({"tags": "venv"}, METADATA) == set()
+    assert index.select({"category": "technical"}, METADATA) == {1}
+
+
+def test_unsupported_operator_is_rejected():
+    with pytest.raises(ValueError):
+        matches(METADATA[0], {"year": {"$regex": "20"}})
+
+
+def test_store_applies_filter_before_top_k():
+    store = LocalVectorStore(dimension=8, save_interval=0)
+    vectors = np.random.default_rng(0).normal(size=(200, 8)).astype(np.float32)
+    store.upsert([(str(i), v, {"category": "rare" if i % 50 == 0 else "common"}) for i, v in enumerate(vectors)])
+
+    found = store.query(vectors[1].tolist(), top_k=10, filter={"category": "rare"})["matches"]
+    assert sorted(int(m["id"]) for m in found) == [0, 50, 100, 150]
@@ -0,0 +1,52 @@
+"""Tests for the ONNX embedder's batching and the recorded parity check."""
+import sys
+import types
+
+import numpy as np
+
+from onnx_embedder import OnnxEmbedder, parity_check
+
+
+def embed_lengths(texts):
+    return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+
+def test_encode_batches_by_length_and_restores_order():
+    embedder = OnnxEmbedder.__new__(OnnxEmbedder)  # skips loading a model
+    embedder.dimension = 2
+    batches = []
+
+    def embed_batch(texts):
+        batches.append(texts)
+        return embed_lengths(texts)
+
+    embedder._embed_batch = embed_batch
+    texts = ["a", "ccc", "bb", "dddd", ""]
+
+    output = embedder.encode(texts, batch_size=2)
+
+    assert output[:, 0].tolist() == [1, 3, 2, 4, 0]
+    assert batches == [["dddd", "ccc"], ["bb", "a"], [""]]
+
+
+def test_parity_is_recorded_per_model_file(tmp_path, monkeypatch):
+    model_file = tmp_path / "model.onnx"
+    model_file.write_bytes(b"onnx")
+    candidate = types.SimpleNamespace(model_path=str(model_file), encode=embed_lengths)
+    loads = []
+
+    class ReferenceModel:
+        def __init__(self, name, device=None):
+            loads.append(name)
+
+        def encode(self, texts):
+            return embed_lengths(texts) * 2  # same direction as the candidate
+
+    monkeypatch.setitem(sys.modules, "sentence_transformers", types.SimpleNamespace(SentenceTransformer=ReferenceModel))
+
+    assert abs(parity_check(candidate, "ref", str(tmp_path / "parity")) - 1.0) < 1e-6
+    assert abs(parity_check(candidate, "ref", str(tmp_path / "parity")) - 1.0) < 1e-6
+    assert len(loads) == 1  # the second check read the record
+
+    parity_check(candidate, "other-ref", str(tmp_path / "parity"))
+    assert len(loads) == 2  # a different reference model is checked again
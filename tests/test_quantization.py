@@ -0,0 +1,36 @@
+"""Tests for int8 and product quantization."""
+import numpy as np
+import pytest
+
+from local_vector_store import normalize
+from quantization import ProductQuantizer, ScalarQuantizer, create_quantizer
+
+
+def sample(count=2000, dimension=32, seed=0):
+    return normalize(np.random.default_rng(seed).normal(size=(count, dimension)).astype(np.float32))
+
+
+@pytest.mark.parametrize("quantizer", [ScalarQuantizer(32), ProductQuantizer(32, subspaces=8, iterations=5)])
+def test_quantized_scores_approximate_exact_scores(quantizer):
+    vectors = sample()
+    queries = sample(10, seed=1)
+    quantizer.fit(vectors)
+    codes = quantizer.encode(vectors)
+
+    assert codes.dtype == np.uint8
+    assert codes.shape == (len(vectors), quantizer.code_size)
+    approx = quantizer.score(codes, queries)
+    exact = queries @ vectors.T
+    for q in range(len(queries)):
+        # The exact best match is within the quantized shortlist
+        assert np.argmax(exact[q]) in np.argsort(-approx[q])[:40]
+
+
+def test_factory():
+    assert create_quantizer("none", 32) is None
+    assert isinstance(create_quantizer("int8", 32), ScalarQuantizer)
+    assert create_quantizer("pq", 32, pq_subspaces=8).code_size == 8
+    with pytest.raises(ValueError):
+        create_quantizer("pq", 30, pq_subspaces=8)
+    with pytest.raises(ValueError):
+        create_quantizer("fp4", 32)
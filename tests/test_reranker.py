@@ -0,0 +1,60 @@
+"""Tests for cross-encoder reranking under a latency budget."""
+import threading
+
+from reranker import CrossEncoderReranker
+
+
+class FakeModel:
+    """Scores a pair by passage length; ``gate`` holds predict until set."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.gate.set()
+        self.calls = 0
+
+    def predict(self, pairs, **kwargs):
+        self.calls += 1
+        self.gate.wait()
+        return [len(passage) for _, passage in pairs]
+
+
+def make_reranker():
+    reranker = CrossEncoderReranker()
+    reranker.model = FakeModel()
+    return reranker
+
+
+def sources(*contents):
+    return [{"id": i, "metadata": {"title": "", "content": content}} for i, content in enumerate(contents)]
+
+
+def test_orders_by_score_and_caches_pairs():
+    reranker = make_reranker()
+    ranked = reranker.rerank("q", sources("a", "ccc", "bb"), top_k=2)
+
+    assert [s["id"] for s in ranked] == [1, 2]
+    assert ranked[0]["rerank_score"] == 3
+    reranker.rerank("q", sources("a", "ccc", "bb"), top_k=2)
+    assert reranker.model.calls == 1
+    assert reranker.stats()["cache_hits"] == 3
+    reranker.close()
+
+
+def test_over_budget_batch_keeps_order_and_later_requests_skip():
+    reranker = make_reranker()
+    reranker.model.gate.clear()
+
+    first = reranker.rerank("q", sources("a", "ccc"), top_k=2, budget_ms=10)
+    second = reranker.rerank("q", sources("dddd", "ee"), top_k=2, budget_ms=10)
+
+    assert [s["id"] for s in first] == [0, 1]
+    assert [s["id"] for s in second] == [0, 1]
+    stats = reranker.stats()
+    assert (stats["timeouts"], stats["skipped"]) == (1, 1)
+    assert reranker.model.calls == 1
+
+    reranker.model.gate.set()
+    reranker._executor.submit(lambda: None).result()  # wait for the running batch
+    ranked = reranker.rerank("q", sources("a", "ccc"), top_k=2, budget_ms=1000)
+    assert [s["id"] for s in ranked] == [1, 0]
+    reranker.close()
@@ -0,0 +1,58 @@
+"""Tests for the semantic response cache."""
+import response_cache
+from response_cache import SemanticResponseCache
+
+
+def sources(*ids):
+    return [{"id": f"knowledge_{i}", "metadata": {"id": i}} for i in ids]
+
+
+def test_similar_query_hits_and_distant_query_misses():
+    cache = SemanticResponseCache(dimension=3, threshold=0.95)
+    cache.store([1.0, 0.0, 0.0], "answer", sources(1), 0.8)
+
+    hit = cache.lookup([10.0, 0.5, 0.0])  # same direction, different scale
+    assert hit["response"] == "answer" and hit["confidence"] == 0.8
+    assert hit["similarity"] > 0.95
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_expired_entry_is_dropped(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "monotonic", lambda: now[0])
+    cache = SemanticResponseCache(dimension=3, ttl_seconds=60)
+    cache.store([1.0, 0.0, 0.0], "answer", sources(1), 0.8)
+
+    now[0] += 61
+    assert cache.lookup([1.0, 0.0, 0.0]) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SemanticResponseCache(dimension=3, max_entries=2)
+    cache.store([1.0, 0.0, 0.0], "x", sources(1), 0.5)
+    cache.store([0.0, 1.0, 0.0], "y", sources(2), 0.5)
+    assert cache.lookup([1.0, 0.0, 0.0])["response"] == "x"  # y is now least recent
+
+    cache.store([0.0, 0.0, 1.0], "z", sources(3), 0.5)
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+    assert cache.lookup([1.0, 0.0, 0.0])["response"] == "x"
+    assert cache.lookup([0.0, 0.0, 1.0])["response"] == "z"
+
+
+def test_updating_a_cited_entry_invalidates_its_answers():
+    cache = SemanticResponseCache(dimension=3)
+    cache.store([1.0, 0.0, 0.0], "x", sources(1, 2), 0.5)
+    cache.store([0.0, 1.0, 0.0], "y", sources(2), 0.5)
+    cache.store([0.0, 0.0, 1.0], "z", sources(3), 0.5)
+
+    assert cache.invalidate_entry(2) == 2
+    assert cache.invalidate_entry(2) == 0
+    assert cache.lookup([1.0, 0.0, 0.0]) is None
+    assert cache.lookup([0.0, 0.0, 1.0])["response"] == "z"
+
+    cache.clear()
+    assert cache.stats()["entries"] == 0
+    cache.store([1.0, 0.0, 0.0], "again", sources(1), 0.5)  # freed slots are reused
+    assert cache.lookup([1.0, 0.0, 0.0])["response"] == "again"
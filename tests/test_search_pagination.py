@@ -0,0 +1,88 @@
+"""Tests for /search cursor pagination and highlights."""
+import asyncio
+
+import pytest
+
+import main
+from chunker import highlight_snippets
+from models import SearchRequest
+
+
+class FakeKnowledgeBase:
+    def get_entries(self, ids):
+        return {
+            entry_id: {"id": entry_id, "title": f"Entry {entry_id}", "content": "text", "category": "general"}
+            for entry_id in ids
+        }
+
+
+def fake_retrieve(count):
+    """Ranking whose fused scores grow with the requested depth, like RRF over deeper candidate lists."""
+
+    async def retrieve_sources(query, query_embedding, top_k=5, filter=None):
+        results = [
+            {
+                "id": f"knowledge_{i}",
+                "score": 0.9 if i % 3 else 0.1,
+                "rrf_score": (count - i) / count + top_k / 10000,
+                "metadata": {"id": i, "content": "text"},
+            }
+            for i in range(count)
+        ]
+        return results[:top_k]
+
+    return retrieve_sources
+
+
+@pytest.fixture
+def search(monkeypatch):
+    async def embed(text):
+        return [0.0]
+
+    monkeypatch.setattr(main, "embedding_manager", object())
+    monkeypatch.setattr(main, "vector_db_manager", object())
+    monkeypatch.setattr(main, "knowledge_base", FakeKnowledgeBase())
+    monkeypatch.setattr(main, "embed", embed)
+    monkeypatch.setattr(main, "retrieve_sources", fake_retrieve(40))
+
+    def run(**kwargs):
+        return asyncio.run(main.search_knowledge(SearchRequest(query="q", **kwargs)))
+
+    return run
+
+
+def collect(search, **kwargs):
+    ids, cursor = [], None
+    while True:
+        response = search(cursor=cursor, **kwargs)
+        ids.extend(result.id for result in response.results)
+        cursor = response.next_cursor
+        if cursor is None:
+            return ids
+
+
+def test_pages_never_repeat_or_skip_results(search):
+    assert collect(search, top_k=7) == list(range(40))
+
+
+def test_min_score_filters_without_cutting_pages_short(search):
+    first = search(top_k=5, min_score=0.5)
+    assert [result.id for result in first.results] == [1, 2, 4, 5, 7]
+    assert collect(search, top_k=5, min_score=0.5) == [i for i in range(40) if i % 3]
+
+
+def test_cursor_from_another_search_is_rejected(search):
+    cursor = search(top_k=5).next_cursor
+    with pytest.raises(main.HTTPException) as error:
+        search(top_k=5, cursor=cursor, category="other")
+    assert error.value.status_code == 400
+
+
+def test_highlights_mark_query_terms():
+    text = "Virtual environments keep Python packages isolated. " + "Filler text. " * 30 + "Python 3.12 is current."
+    snippets = highlight_snippets(text, "python", width=80)
+
+    assert len(snippets) == 2
+    assert "<em>Python</em> packages" in snippets[0]
+    assert snippets[1].startswith("… ") and "<em>Python</em> 3.12" in snippets[1]
+    assert highlight_snippets("no match here", "python") == ["no match here"]
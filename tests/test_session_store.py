@@ -0,0 +1,77 @@
+import pickle
+
+from session_store import SessionStore
+
+
+class FakeState:
+    """Stands in for a ``LlamaState``; ``state_size`` reads ``llama_state_size``."""
+
+    def __init__(self, turn: int, size: int = 1000):
+        self.turn = turn
+        self.llama_state_size = size
+
+
+def count_words(text: str) -> int:
+    return len(text.split())
+
+
+def turn_text(n: int, words: int = 60) -> str:
+    return f"User Query: question {n}\n" + " ".join(["answer"] * words) + "\n\n"
+
+
+def test_state_is_kept_between_turns():
+    store = SessionStore(count_words, max_history_tokens=768)
+    session = store.get("s1")
+    assert store.load_state(session) is None
+
+    for n in range(5):
+        state = store.load_state(session)
+        assert n == 0 or (state is not None and state.turn == n - 1)
+        store.record_turn(session, turn_text(n), FakeState(n))
+
+    assert store.load_state(session).turn == 4
+    assert store.compactions == 0
+    assert len(session.turns) == 5
+
+
+def test_compaction_evicts_oldest_turns_and_drops_state():
+    store = SessionStore(count_words, max_history_tokens=200)
+    session = store.get("s1")
+    for n in range(4):
+        store.record_turn(session, turn_text(n), FakeState(n))
+
+    assert store.compactions == 1
+    assert session.tokens <= 100
+    assert session.turns[-1]["text"] == turn_text(3)
+    assert store.load_state(session) is None
+
+    store.record_turn(session, turn_text(4, words=10), FakeState(4))
+    assert store.load_state(session).turn == 4
+
+
+def test_states_over_budget_spill_to_disk_and_load_back(tmp_path):
+    store = SessionStore(count_words, max_memory_bytes=1500, disk_dir=str(tmp_path))
+    first, second = store.get("a"), store.get("b")
+    store.record_turn(first, turn_text(0), FakeState(0))
+    store.record_turn(second, turn_text(0), FakeState(1))
+
+    assert first.state is None and first.state_path is not None
+    assert store.spills == 1
+    with open(first.state_path, "rb") as f:
+        assert pickle.load(f).turn == 0
+
+    store.get("a")
+    assert store.load_state(first).turn == 0
+    assert store.disk_loads == 1
+
+
+def test_expired_and_deleted_sessions_are_discarded(tmp_path):
+    store = SessionStore(count_words, ttl_seconds=-1, disk_dir=str(tmp_path))
+    session = store.get("a")
+    store.record_turn(session, turn_text(0), FakeState(0))
+    assert store.get("b") is not session
+    assert store.stats()["sessions"] == 1
+    assert not list(tmp_path.iterdir())
+
+    store.get("c")
+    assert store.delete("c") and not store.delete("c")
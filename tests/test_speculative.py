@@ -0,0 +1,36 @@
+"""Tests for speculative decoding acceptance counting."""
+import numpy as np
+
+from speculative import CountingDraftModel, create_draft_model
+
+
+def fixed_draft(size):
+    return lambda input_ids, **kwargs: np.arange(size, dtype=np.intc)
+
+
+def test_acceptance_is_read_from_input_growth():
+    model = CountingDraftModel(fixed_draft(4))
+    model(np.zeros(10, dtype=np.intc))
+    model(np.zeros(13, dtype=np.intc))  # 2 drafted tokens accepted + 1 sampled
+    model(np.zeros(18, dtype=np.intc))  # all 4 accepted + 1 sampled
+
+    stats = model.stats()
+    assert stats["rounds"] == 2
+    assert stats["drafted_tokens"] == 8
+    assert stats["accepted_tokens"] == 6
+    assert stats["acceptance_rate"] == 0.75
+
+
+def test_reset_skips_the_round_across_generations():
+    model = CountingDraftModel(fixed_draft(4))
+    model(np.zeros(10, dtype=np.intc))
+    model.reset()
+    model(np.zeros(50, dtype=np.intc))
+
+    assert model.stats()["rounds"] == 0
+
+
+def test_disabled_and_unknown_modes_return_none():
+    assert create_draft_model("none") is None
+    assert create_draft_model("medusa") is None
+    assert create_draft_model("draft_model", draft_model_path="/nonexistent/draft.gguf") is None
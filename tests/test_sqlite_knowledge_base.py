@@ -0,0 +1,55 @@
+"""Tests for the SQLite knowledge base and the JSON import on first open."""
+from knowledge_base import KnowledgeBase, open_knowledge_base
+from sqlite_knowledge_base import SQLiteKnowledgeBase
+
+
+def test_crud_and_indexed_lookups(tmp_path):
+    kb = SQLiteKnowledgeBase(str(tmp_path / "kb.db"))
+    kb.add_entry("Python venv", "Isolated environments", category="technical", tags=["python"])
+    kb.add_entries([{"title": "Git", "content": "Commit often", "category": "technical", "tags": ["git"]}])
+    kb.update_entry(1, category="howto", tags=["python", "setup"])
+
+    assert [e["id"] for e in kb.get_entries_by_category("howto")] == [1]
+    assert [e["id"] for e in kb.get_entries_by_tag("setup")] == [1]
+    assert kb.get_entry(1)["tags"] == ["python", "setup"]
+    assert sorted(kb.get_entries([1, 2, 99])) == [1, 2]
+
+    assert kb.delete_entry(2)
+    assert not kb.delete_entry(2)
+    assert kb.get_entries_by_tag("git") == []
+    assert kb.add_entry("Third", "text")["id"] == 3
+    kb.close()
+
+
+def test_full_text_and_lexical_search(tmp_path):
+    kb = SQLiteKnowledgeBase(str(tmp_path / "kb.db"))
+    kb.add_entry("Disk errors", "ERR-1042 means the disk is full", category="ops")
+    kb.add_entry("Logging", "Errors are written to the log", category="dev")
+
+    assert [e["id"] for e in kb.search_entries("disk full")] == [1]
+    assert kb.search_entries("disk", category="dev") == []
+    ranked = kb.lexical_search("disk log")
+    assert sorted(entry["id"] for entry, _ in ranked) == [1, 2]
+    assert all(score > 0 for _, score in ranked)
+    assert [entry["id"] for entry, _ in kb.lexical_search("disk log", filter={"category": "dev"})] == [2]
+    kb.close()
+
+
+def test_json_knowledge_base_is_imported_once_with_ids(tmp_path):
+    legacy = KnowledgeBase(str(tmp_path / "kb.json"))
+    legacy.add_entry("First", "alpha")
+    legacy.add_entry("Second", "beta")
+    legacy.delete_entry(2)
+    legacy.close()
+
+    kb = open_knowledge_base(str(tmp_path / "kb.db"))
+    assert isinstance(kb, SQLiteKnowledgeBase)
+    assert [e["id"] for e in kb.get_all_entries()] == [1]
+    assert kb.last_entry_id() == 2
+    kb.delete_entry(1)
+    kb.close()
+
+    reopened = open_knowledge_base(str(tmp_path / "kb.db"))
+    assert reopened.get_all_entries() == []  # not imported again
+    assert reopened.add_entry("Third", "gamma")["id"] == 3
+    reopened.close()